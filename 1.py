@@ -1,6 +1,5 @@
-import os
-import re
 import nltk
+from corpus_loader import iter_articles
 from nltk.sentiment import SentimentIntensityAnalyzer
 
 # 下载VADER词典（用于情感分析）
@@ -17,39 +16,29 @@ positive_articles = []
 negative_articles = []
 neutral_articles = []
 
-# 遍历articles文件夹中的所有txt文件
-for file in os.listdir('articles'):
-    if file.endswith('.txt'):
-        file_path = os.path.join('articles', file)
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-                # 提取标题
-                title_match = re.search(r'标题: (.*?)(?:\n|$)', content)
-                title = title_match.group(1) if title_match else file
-                
-                # 提取正文内容（位于"正文内容:"和"图片列表:"之间）
-                match = re.search(r'正文内容:(.*?)(?:图片列表:|$)', content, re.DOTALL)
-                if match:
-                    text = match.group(1).strip()
-                    
-                    # 进行情感分析
-                    scores = sia.polarity_scores(text)
-                    compound_score = scores['compound']
-                    
-                    # 根据复合得分分类
-                    if compound_score >= 0.05:
-                        positive += 1
-                        positive_articles.append((title, compound_score))
-                    elif compound_score <= -0.05:
-                        negative += 1
-                        negative_articles.append((title, compound_score))
-                    else:
-                        neutral += 1
-                        neutral_articles.append((title, compound_score))
-        except Exception as e:
-            print(f"处理文件 {file} 时出错: {e}")
+# 遍历articles文件夹中的所有文章（内容来自文章存储，没有变化时使用缓存）
+for article in iter_articles():
+    file = article.filename
+    try:
+        title = article.display_title
+        text = article.text
+        if text:
+            # 进行情感分析
+            scores = sia.polarity_scores(text)
+            compound_score = scores['compound']
+            
+            # 根据复合得分分类
+            if compound_score >= 0.05:
+                positive += 1
+                positive_articles.append((title, compound_score))
+            elif compound_score <= -0.05:
+                negative += 1
+                negative_articles.append((title, compound_score))
+            else:
+                neutral += 1
+                neutral_articles.append((title, compound_score))
+    except Exception as e:
+        print(f"处理文件 {file} 时出错: {e}")
 
 # 按情感得分排序
 positive_articles.sort(key=lambda x: x[1], reverse=True)
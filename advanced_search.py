@@ -6,10 +6,12 @@ import sys
 import requests
 from bs4 import BeautifulSoup
 import json
-import time
 from config import *
 from urllib.parse import urljoin
-import random
+from rate_limiter import RateLimitedAdapter, RateLimiter
+
+# 按主机的令牌桶限速器，代替每页之后的固定休眠
+rate_limiter = RateLimiter()
 
 def advanced_search(keyword, start_date=None, end_date=None, max_pages=5):
     """
@@ -29,6 +31,9 @@ def advanced_search(keyword, start_date=None, end_date=None, max_pages=5):
     # 创建会话
     session = requests.Session()
     session.headers.update(HEADERS)
+    adapter = RateLimitedAdapter(limiter=rate_limiter)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
     
     for page in range(1, max_pages + 1):
         try:
@@ -90,9 +95,6 @@ def advanced_search(keyword, start_date=None, end_date=None, max_pages=5):
                     'title': title
                 })
             
-            # 避免请求过快
-            time.sleep(random.uniform(REQUEST_DELAY[0], REQUEST_DELAY[1]))
-            
         except Exception as e:
             print(f"搜索页面{page}时出错: {e}")
     
@@ -161,6 +163,7 @@ def main():
             unique_urls.add(article['url'])
     
     print(f"\n总共找到 {len(unique_results)} 篇独特文章")
+    rate_limiter.print_summary()
     
     # 保存结果
     save_search_results(unique_results, 'advanced_search_results.json')
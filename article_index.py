@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章编号和标题索引
+
+文章文件以规范化URL生成的稳定编号命名（articles/<编号>.txt），不同URL的文章即使标题相同
+也不会互相覆盖，同一篇文章重新提取时写回同一个文件。
+编号与标题、网址、文件名的对应关系保存在爬取队列的SQLite文件中（按标题建立索引），
+需要可读的名称时从这里查询。
+
+用法:
+    python article_index.py              # 列出所有文章的编号和标题
+    python article_index.py 关键词        # 按标题查找文章
+    python article_index.py --migrate    # 把 articles/ 中按标题命名的旧文件改为按编号命名
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from article_store import ArticleStore, parse_article_file, set_article_file_title
+from config import ARTICLE_STORE_FILE, ARTICLES_DIR, FRONTIER_DB
+from url_router import url_id
+
+# 按编号命名的文章文件名
+ID_FILENAME = re.compile(r'^[0-9a-f]{16}\.txt$')
+
+
+def article_filename(url, extension='.txt'):
+    """文章文件名：规范化URL的编号"""
+    return f"{url_id(url)}{extension}"
+
+
+class ArticleIndex:
+    def __init__(self, path=FRONTIER_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.setup_database()
+
+    def setup_database(self):
+        """创建数据表"""
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS article_titles (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT,
+                filename TEXT NOT NULL,
+                updated_at REAL
+            )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_article_titles_title ON article_titles (title)")
+            self.conn.commit()
+
+    def record(self, url, title, filename):
+        """记录（或更新）一篇文章的标题和文件名，返回编号"""
+        article_id = url_id(url)
+        with self.lock:
+            self.conn.execute("""
+            INSERT INTO article_titles (id, url, title, filename, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                url = excluded.url,
+                title = COALESCE(excluded.title, article_titles.title),
+                filename = excluded.filename,
+                updated_at = excluded.updated_at
+            """, (article_id, url, title, filename, time.time()))
+            self.conn.commit()
+        return article_id
+
+    def set_title(self, url, title):
+        """只更新标题（如没有标题的文章使用编号作为标题）"""
+        with self.lock:
+            self.conn.execute("UPDATE article_titles SET title = ?, updated_at = ? WHERE id = ?",
+                              (title, time.time(), url_id(url)))
+            self.conn.commit()
+
+    def title(self, url):
+        """索引中记录的标题，没有记录时返回None"""
+        with self.lock:
+            row = self.conn.execute("SELECT title FROM article_titles WHERE id = ?", (url_id(url),)).fetchone()
+        return row[0] if row else None
+
+    def find(self, title):
+        """标题完全相同的文章 [(编号, 网址, 文件名)]"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, url, filename FROM article_titles WHERE title = ?", (title,)
+            ).fetchall()
+
+    def search(self, text):
+        """标题中包含 text 的文章 [(编号, 标题, 文件名)]"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, title, filename FROM article_titles WHERE title LIKE ? ORDER BY title",
+                (f"%{text}%",)
+            ).fetchall()
+
+    def names(self):
+        """所有文章的 {编号: 可读名称}，标题相同的文章按保存顺序加上序号，没有标题时使用编号"""
+        with self.lock:
+            rows = self.conn.execute("SELECT id, title FROM article_titles ORDER BY updated_at").fetchall()
+        names, counts = {}, {}
+        for article_id, title in rows:
+            if not title:
+                names[article_id] = article_id
+                continue
+            counts[title] = counts.get(title, 0) + 1
+            names[article_id] = title if counts[title] == 1 else f"{title} ({counts[title]})"
+        return names
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def migrate(index, articles_dir=ARTICLES_DIR):
+    """
+    把按标题命名的旧文章文件改为按编号命名，并记录标题
+    同一URL已有按编号命名的文件时保留较新的一个
+    没有标题的文章（标题行为 None）使用原文件名或索引中的标题，并写回文件的标题行
+    """
+    store = ArticleStore(ARTICLE_STORE_FILE)
+    renamed, replaced, skipped, titled = 0, 0, 0, 0
+    for filename in sorted(os.listdir(articles_dir)):
+        if not filename.endswith('.txt'):
+            continue
+        path = os.path.join(articles_dir, filename)
+        if ID_FILENAME.match(filename):
+            # 已按编号命名：只补写索引中已有的标题
+            record = parse_article_file(path)
+            title = index.title(record['url']) if record['url'] and not record['title'] else None
+            if title:
+                set_article_file_title(path, title)
+                titled += 1
+            continue
+        record = parse_article_file(path)
+        if not record['url']:
+            print(f"没有网址，保留原文件名: {filename}")
+            skipped += 1
+            continue
+        new_filename = article_filename(record['url'])
+        new_path = os.path.join(articles_dir, new_filename)
+        exists = os.path.exists(new_path)
+        if exists:
+            replaced += 1
+            if os.path.getmtime(new_path) >= os.path.getmtime(path):
+                os.remove(path)
+                continue
+        else:
+            renamed += 1
+        title = record['title']
+        if not title:
+            title = filename[:-4]
+            set_article_file_title(path, title)
+            titled += 1
+        os.replace(path, new_path)
+        index.record(record['url'], title, new_filename)
+        if os.path.exists(store.path):
+            store.update(record['url'], title=title, filename=new_filename)
+    print(f"改为按编号命名 {renamed} 个文件，删除同一URL的旧文件 {replaced} 个，保留 {skipped} 个，"
+          f"补写标题 {titled} 个")
+
+
+def main():
+    index = ArticleIndex()
+    if '--migrate' in sys.argv[1:]:
+        migrate(index)
+    elif len(sys.argv) > 1:
+        for article_id, title, filename in index.search(' '.join(sys.argv[1:])):
+            print(f"{article_id}  {title}  ({filename})")
+    else:
+        for article_id, name in index.names().items():
+            print(f"{article_id}  {name}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+结构化的文章存储（JSONL，可导出Parquet）
+
+爬虫保存 articles/*.txt 的同时，把每篇文章作为一行JSON追加到 ARTICLE_STORE_FILE：
+编号、网址、标题、段落列表、图片视频列表、发布时间、正文哈希和文件名。
+同一网址的后一行覆盖前一行的字段（如图片下载完成后补全媒体列表、无标题文章改名），
+读取时按网址合并，compact() 把合并结果重写为每篇文章一行。
+load_records() / load_frame() 只读取需要的字段；分析脚本通过 corpus_loader.py 从这里读取文章。
+
+用法:
+    python article_store.py            # 从 articles/ 中已有的文章文件建立存储并整理
+    python article_store.py --parquet  # 另外导出为Parquet（需要安装 pyarrow）
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from config import ARTICLE_STORE_FILE, ARTICLE_STORE_PARQUET, ARTICLES_DIR
+from url_router import url_id
+
+# 每条记录包含的字段
+COLUMNS = ['id', 'url', 'title', 'paragraphs', 'images', 'videos', 'published',
+           'content_hash', 'filename', 'updated_at']
+
+
+def content_hash(paragraphs):
+    """正文的SHA-256，内容相同的文章哈希相同"""
+    return hashlib.sha256("\n\n".join(paragraphs).encode('utf-8')).hexdigest()
+
+
+def parse_article_file(path):
+    """解析 articles/ 中的文章文件，返回与存储相同格式的记录（没有发布时间）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    title_match = re.search(r'^标题: (.*)$', content, re.MULTILINE)
+    url_match = re.search(r'^网址: (.*)$', content, re.MULTILINE)
+    body = content.split("正文内容:\n", 1)[-1]
+    sections = re.split(r'\n\n(图片列表|视频列表):\n', body)
+
+    paragraphs = [paragraph.strip() for paragraph in sections[0].split("\n\n") if paragraph.strip()]
+    images, videos = [], []
+    for name, listing in zip(sections[1::2], sections[2::2]):
+        for line in listing.splitlines():
+            match = re.match(r'\d+\. (.+?)(?: - (.*))?$', line.strip())
+            if not match:
+                continue
+            if name == '图片列表':
+                images.append({'filename': match.group(1), 'caption': match.group(2) or ""})
+            else:
+                videos.append({'filename': match.group(1)})
+
+    title = title_match.group(1).strip() if title_match else None
+    url = url_match.group(1).strip() if url_match else None
+    return {
+        'id': url_id(url) if url else None,
+        'url': url,
+        'title': title if title and title != 'None' else None,
+        'paragraphs': paragraphs,
+        'images': images,
+        'videos': videos,
+        'published': None,
+        'content_hash': content_hash(paragraphs),
+        'filename': os.path.basename(path),
+        'updated_at': os.path.getmtime(path),
+    }
+
+
+def set_article_file_title(path, title):
+    """改写文章文件第一行的标题（先写入临时文件再替换），文件不存在时返回False"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return False
+    content = re.sub(r'^标题: .*$', lambda _: f"标题: {title}", content, count=1, flags=re.MULTILINE)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+class ArticleStore:
+    def __init__(self, path=ARTICLE_STORE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def append(self, record):
+        """
+        追加一行记录
+        整行用一次 write 写入以追加方式打开的文件，多个线程或进程同时写入时行不会交错
+        """
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self.lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+    def add(self, url, title, paragraphs, images, videos, filename, published=None):
+        """保存一篇文章的完整记录"""
+        self.append({
+            'id': url_id(url),
+            'url': url,
+            'title': title,
+            'paragraphs': paragraphs,
+            'images': [{'filename': img['filename'], 'caption': img.get('caption', "")} for img in images],
+            'videos': [{'filename': vid['filename']} for vid in videos],
+            'published': published,
+            'content_hash': content_hash(paragraphs),
+            'filename': filename,
+            'updated_at': time.time(),
+        })
+
+    def update(self, url, **fields):
+        """只更新部分字段（如改名后的标题和文件名）"""
+        self.append(dict(fields, url=url, updated_at=time.time()))
+
+    def records(self, columns=None):
+        """
+        按网址合并后的所有记录，按首次保存的顺序返回
+        columns 不为空时只保留这些字段
+        """
+        merged = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 程序中断时最后一行可能不完整
+                        continue
+                    # 后一行中为空的字段不覆盖已有的值（如没有标题的文章命名后重写）
+                    current = merged.setdefault(record['url'], {})
+                    current.update((key, value) for key, value in record.items()
+                                   if value is not None or key not in current)
+        for record in merged.values():
+            if columns:
+                yield {column: record.get(column) for column in columns}
+            else:
+                yield record
+
+    def compact(self):
+        """把合并后的记录重写为每篇文章一行（先写临时文件再替换）"""
+        tmp_path = self.path + '.tmp'
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self.records():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        with self.lock:
+            os.replace(tmp_path, self.path)
+        return count
+
+    def import_articles_dir(self, articles_dir=ARTICLES_DIR):
+        """从已有的文章文件建立记录（已有记录的网址跳过），返回导入的数量"""
+        known_urls = {record['url'] for record in self.records(['url'])}
+        count = 0
+        for filename in sorted(os.listdir(articles_dir)):
+            if not filename.endswith('.txt'):
+                continue
+            try:
+                record = parse_article_file(os.path.join(articles_dir, filename))
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"读取文件失败 {filename}: {e}")
+                continue
+            # 没有网址的文件用文件名区分
+            record['url'] = record['url'] or filename
+            record['id'] = url_id(record['url'])
+            if record['url'] in known_urls:
+                continue
+            known_urls.add(record['url'])
+            self.append(record)
+            count += 1
+        return count
+
+    def export_parquet(self, path=ARTICLE_STORE_PARQUET):
+        """导出为Parquet，之后 load_frame 可以只读取需要的列"""
+        import pandas as pd
+        frame = pd.DataFrame(list(self.records()), columns=COLUMNS)
+        try:
+            frame.to_parquet(path, index=False)
+        except ImportError as e:
+            print(f"无法导出Parquet（需要安装 pyarrow）: {e}")
+            return False
+        return True
+
+
+def load_records(columns=None, path=ARTICLE_STORE_FILE):
+    """
+    读取文章记录（只保留需要的字段）
+    存储文件还不存在时先从 articles/ 中的文章文件建立
+    """
+    store = ArticleStore(path)
+    if not os.path.exists(path) and os.path.isdir(ARTICLES_DIR):
+        count = store.import_articles_dir()
+        print(f"从 {ARTICLES_DIR}/ 建立文章存储 {path}: {count} 篇文章")
+    return store.records(columns)
+
+
+def load_frame(columns=None, path=ARTICLE_STORE_FILE, parquet_path=ARTICLE_STORE_PARQUET):
+    """读取为 pandas DataFrame；Parquet文件比JSONL新时直接从Parquet读取需要的列"""
+    import pandas as pd
+    if (os.path.exists(parquet_path) and os.path.exists(path)
+            and os.path.getmtime(parquet_path) >= os.path.getmtime(path)):
+        try:
+            return pd.read_parquet(parquet_path, columns=columns)
+        except ImportError:
+            pass
+    return pd.DataFrame(list(load_records(columns, path)), columns=columns or COLUMNS)
+
+
+def main():
+    store = ArticleStore()
+    count = store.import_articles_dir()
+    print(f"从 {ARTICLES_DIR}/ 导入 {count} 篇文章")
+    total = store.compact()
+    print(f"文章存储 {store.path}: 共 {total} 篇文章，{os.path.getsize(store.path) / 1024:.1f} KB")
+    if '--parquet' in sys.argv[1:] and store.export_parquet():
+        print(f"已导出 {ARTICLE_STORE_PARQUET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基于asyncio的并发爬取引擎
+
+bbc_crawler.main() 每次只处理一篇文章，这里使用asyncio调度多篇文章同时抓取，
+并按主机限制并发数。页面请求仍然通过 bbc_crawler 的共享 session 完成，
+解析和保存沿用 extract_article_content 的逻辑，输出同样的 articles/*.txt 文件。
+图片和视频交给 media_pool 后台下载，不占用页面抓取的并发数。
+
+搜索阶段各关键词并发进行，每个关键词按窗口同时请求多页，某页没有新文章时提前结束；
+搜索到的文章立即进入按相关度和发布时间排序的调度队列，不必等所有搜索完成。
+与主题相关的文章达到目标数量后，停止搜索和下载。
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from tqdm import tqdm
+
+from bbc_crawler import (
+    declared_encoding,
+    discover_feed_articles,
+    extract_article_content,
+    feed_discovery,
+    fetch_page,
+    frontier,
+    http_cache,
+    image_gate,
+    media_store,
+    near_duplicate_index,
+    rate_limiter,
+    relevance_scorer,
+    response_archive,
+    selector_cache,
+    name_untitled_article,
+    route_pending,
+    search_page,
+    url_router,
+)
+from crawl_scheduler import CrawlScheduler
+from media_pool import MediaDownloadPool
+from metrics import metrics
+from rate_limiter import CircuitOpenError
+from config import (
+    BBC_NEWS_URL,
+    CONCURRENCY_PER_HOST,
+    DISCOVERY_MODE,
+    MAX_CONCURRENT_FETCHES,
+    MAX_PAGES_PER_KEYWORD,
+    METRICS_PORT,
+    METRICS_SUMMARY_FILE,
+    SEARCH_KEYWORDS,
+    SEARCH_MAX_STALE_PAGES,
+    SEARCH_PAGE_WINDOW,
+    TARGET_ARTICLE_COUNT,
+)
+
+
+class AsyncCrawlEngine:
+    def __init__(self, max_concurrency=MAX_CONCURRENT_FETCHES, per_host=CONCURRENCY_PER_HOST,
+                 target=TARGET_ARTICLE_COUNT):
+        # 阻塞的requests调用放在线程池中执行，由事件循环统一调度
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.per_host = per_host
+        self.host_limits = {}
+        self.no_title_counter = 1  # 用于无标题文章的编号
+        self.max_concurrency = max_concurrency
+        self.stats = {'succeeded': 0, 'failed': 0, 'search_pages': 0, 'discovered': 0}
+        self.media_pool = MediaDownloadPool()
+        self.scheduler = CrawlScheduler(relevance_scorer, target)
+        # 搜索发现新文章或有文章处理完成时唤醒等待中的下载任务
+        self.wakeup = None
+        self.discovery_finished = False
+        self.in_flight = 0
+
+    def host_semaphore(self, url):
+        """获取某个主机的并发限制信号量"""
+        host = urlparse(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self.host_limits[host]
+
+    async def fetch(self, url, func=fetch_page, *args):
+        """在url所在主机的并发限制内执行请求函数，默认抓取url本身"""
+        loop = asyncio.get_running_loop()
+        async with self.host_semaphore(url):
+            return await loop.run_in_executor(self.executor, func, *(args or (url,)))
+
+    async def search(self, keyword, page):
+        """请求一页搜索结果，出错时返回空列表（不计入无新文章的页数）"""
+        try:
+            return await self.fetch(BBC_NEWS_URL, search_page, keyword, page)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"搜索页面{page}时出错: {e}")
+            return []
+        finally:
+            self.stats['search_pages'] += 1
+
+    async def discover_keyword(self, keyword, progress):
+        """
+        按页搜索一个关键词，每次同时请求 SEARCH_PAGE_WINDOW 页
+        新发现的文章立即放入调度队列，达到目标数量后停止搜索
+        """
+        stale_pages = 0
+        for first_page in range(1, MAX_PAGES_PER_KEYWORD + 1, SEARCH_PAGE_WINDOW):
+            if self.scheduler.done():
+                return
+            pages = range(first_page, min(first_page + SEARCH_PAGE_WINDOW, MAX_PAGES_PER_KEYWORD + 1))
+            try:
+                page_results = await asyncio.gather(*(self.search(keyword, page) for page in pages))
+            except CircuitOpenError as e:
+                print(f"搜索关键词 {keyword} 时出错: {e}")
+                return
+
+            # 按页码顺序处理，保证提前结束的判断与逐页搜索一致
+            for page, results in zip(pages, page_results):
+                if results is None:
+                    # 已到达最后一页
+                    return
+
+                if not results:
+                    continue
+
+                articles = [article for article in results if article['url'] not in self.scheduler.seen_urls]
+                new_articles = frontier.add_discovered(articles, keyword)
+
+                if not new_articles:
+                    stale_pages += 1
+                    if stale_pages >= SEARCH_MAX_STALE_PAGES:
+                        return
+                    continue
+                stale_pages = 0
+
+                self.stats['discovered'] += len(new_articles)
+                progress.total += self.scheduler.add(new_articles)
+                progress.refresh()
+                self.wakeup.set()
+
+    async def process_article(self, article):
+        """抓取并解析单篇文章"""
+        loop = asyncio.get_running_loop()
+        url = article['url']
+
+        try:
+            response = await self.fetch(url)
+        except CircuitOpenError as e:
+            # 主机熔断时不计入失败次数，留在队列中等下次处理
+            print(f"处理文章失败: {url}, 错误: {e}")
+            self.stats['failed'] += 1
+            return None
+        except Exception as e:
+            print(f"处理文章失败: {url}, 错误: {e}")
+            frontier.mark_failed(url, e)
+            self.stats['failed'] += 1
+            return None
+        frontier.mark_fetched(url)
+
+        # 解析和写文件同样在线程池中进行，不阻塞事件循环；直接解析字节，不经过response.text解码
+        result = await loop.run_in_executor(
+            self.executor, extract_article_content, url, article['title'],
+            response.content, self.media_pool, declared_encoding(response.headers)
+        )
+        if not result:
+            self.stats['failed'] += 1
+            return None
+
+        if not result['title']:
+            # 如果文章没有标题，使用编号作为标题（加锁避免与媒体下载完成后的重写冲突）
+            with self.media_pool.lock:
+                name_untitled_article(url, result, self.no_title_counter)
+            self.no_title_counter += 1
+
+        result['url'] = url
+        self.stats['succeeded'] += 1
+        return result
+
+    async def download_worker(self, results, progress):
+        """
+        按优先级取出文章并处理，直到达到目标数量，或搜索结束且队列为空
+        正在处理的文章数不超过距离目标还差的数量，全部成功时不会多抓取
+        """
+        while not self.scheduler.done():
+            if not self.scheduler:
+                if self.discovery_finished:
+                    return
+            elif self.in_flight < self.scheduler.remaining():
+                article = self.scheduler.pop()
+                self.in_flight += 1
+                try:
+                    result = await self.process_article(article)
+                finally:
+                    self.in_flight -= 1
+                if result:
+                    results.append(result)
+                self.scheduler.record(article['url'], result)
+                progress.set_postfix(media_queue=self.media_pool.queue_depth())
+                progress.update(1)
+                # 唤醒等待中的下载任务，重新判断是否继续
+                self.wakeup.set()
+                continue
+
+            self.wakeup.clear()
+            await self.wakeup.wait()
+
+    async def crawl(self, articles=(), keywords=()):
+        """
+        并发处理给定的文章，同时搜索关键词并处理新发现的文章
+        返回成功的结果列表
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        results = []
+
+        self.wakeup = asyncio.Event()
+        self.discovery_finished = False
+        self.scheduler.add(articles)
+
+        with tqdm(total=len(self.scheduler), desc="下载文章") as progress:
+            workers = [asyncio.create_task(self.download_worker(results, progress))
+                       for _ in range(self.max_concurrency)]
+
+            # 搜索与下载同时进行，所有关键词搜索完成后通知下载任务队列为空时结束
+            await asyncio.gather(*(self.discover_keyword(keyword, progress) for keyword in keywords))
+            self.discovery_finished = True
+            self.wakeup.set()
+            await asyncio.gather(*workers)
+
+        elapsed = time.perf_counter() - start
+        rate = self.stats['succeeded'] / elapsed if elapsed > 0 else 0.0
+        if keywords:
+            print(f"\n搜索 {self.stats['search_pages']} 页，新发现 {self.stats['discovered']} 篇文章")
+        print(f"\n成功 {self.stats['succeeded']} 篇，失败 {self.stats['failed']} 篇，"
+              f"耗时 {elapsed:.1f} 秒，速度 {rate:.2f} 篇/秒")
+        self.scheduler.print_summary()
+
+        # 等待后台媒体下载完成，报告中的图片视频数量此时才是最终结果
+        print("等待图片和视频下载完成...")
+        await loop.run_in_executor(self.executor, self.media_pool.close)
+        self.media_pool.print_summary()
+        return results
+
+    def run(self, articles=(), keywords=()):
+        """同步入口"""
+        try:
+            return asyncio.run(self.crawl(articles, keywords))
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+def main():
+    """主函数"""
+    metrics.start_server(METRICS_PORT)
+
+    # 订阅中的新文章先记录到爬取队列，与上次未完成的文章一起处理
+    if DISCOVERY_MODE in ('feeds', 'both'):
+        discover_feed_articles()
+
+    # 处理队列中未完成的文章，同时并发搜索所有关键词
+    pending_articles = route_pending(frontier.pending())
+    print(f"待处理 {len(pending_articles)} 篇文章")
+
+    keywords = SEARCH_KEYWORDS if DISCOVERY_MODE in ('search', 'both') else ()
+    engine = AsyncCrawlEngine()
+    successful_articles = engine.run(pending_articles, keywords)
+    frontier.print_summary()
+    url_router.print_summary()
+    relevance_scorer.print_summary()
+    near_duplicate_index.print_summary()
+    feed_discovery.print_summary()
+    http_cache.print_summary()
+    rate_limiter.print_summary()
+    media_store.print_summary()
+    image_gate.print_summary()
+    selector_cache.print_summary()
+    if response_archive:
+        response_archive.print_summary()
+    metrics.print_summary()
+    metrics.save_summary(METRICS_SUMMARY_FILE)
+
+    # 保存下载报告
+    with open('download_report.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_articles': len(successful_articles),
+            'articles': successful_articles
+        }, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
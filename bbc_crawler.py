@@ -3,43 +3,77 @@
 
 import os
 import re
-import time
-import random
 import requests
 import urllib.parse
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import PreformattedString
 from urllib.parse import urljoin
 from tqdm import tqdm
 import json
-import hashlib
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import atexit
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
 import ssl
 from config import *
+from article_index import ArticleIndex, article_filename
+from article_store import ArticleStore, set_article_file_title
+from crawl_frontier import CrawlFrontier
+from crawl_scheduler import CrawlScheduler
+from feed_discovery import FeedDiscovery
+from http_cache import CachingHTTPAdapter, HttpCache
+from image_gate import ImageGate, choose_srcset
+from media_store import MediaStore
+from metrics import InstrumentedAdapter, metrics
+from near_duplicates import NearDuplicateIndex
+from ranged_download import download_ranged
+from relevance import RelevanceScorer
+from response_archive import ResponseArchive
+from selector_cache import SelectorCache
+from url_router import UrlRouter
+from rate_limiter import CircuitOpenError, RateLimitedAdapter, RateLimiter, make_retry
 
 # 创建文件夹
 os.makedirs(ARTICLES_DIR, exist_ok=True)
 os.makedirs(IMAGES_DIR, exist_ok=True)
 os.makedirs(VIDEOS_DIR, exist_ok=True)
 
-# 已下载的URL列表，避免重复下载
-downloaded_urls = set()
+# 持久化的爬取队列：记录文章URL状态，重启后不会重复下载
+frontier = CrawlFrontier(FRONTIER_DB)
+atexit.register(frontier.extracted_filter.close)
 
-# 已下载的图片和视频URL，避免重复下载
-downloaded_media_urls = set()
+# 按内容寻址的媒体存储：相同内容的图片视频只保存一份，已下载的URL不再请求
+media_store = MediaStore(FRONTIER_DB)
+atexit.register(media_store.url_filter.close)
+
+# 结构化的文章存储，与 articles/*.txt 同时写入，供分析脚本读取
+article_store = ArticleStore(ARTICLE_STORE_FILE)
+
+# 文章文件以URL编号命名，编号与标题的对应关系记录在标题索引中
+article_index = ArticleIndex(FRONTIER_DB)
+
+# 近似重复文章检测：提取正文后与已有文章比较，重复的文章不再下载图片视频
+near_duplicate_index = NearDuplicateIndex(FRONTIER_DB)
 
 # 创建会话对象，保持连接
 session = requests.Session()
 
-# 配置重试策略
-retry_strategy = Retry(
-    total=5,  # 最大重试次数
-    backoff_factor=1,  # 重试间隔
-    status_forcelist=[500, 502, 503, 504, 429],  # 需要重试的HTTP状态码
-)
+# 配置重试策略（429和503由限速器退避后重试）
+retry_strategy = make_retry(5)
+
+# 按主机的令牌桶限速器，代替每次请求后的固定休眠
+rate_limiter = RateLimiter()
+
+
+class CrawlerAdapter(CachingHTTPAdapter, RateLimitedAdapter, InstrumentedAdapter):
+    """先查本地缓存，需要发送请求时再经过限速，实际发出的请求记录耗时"""
 
-# 创建适配器并添加到会话
-adapter = HTTPAdapter(max_retries=retry_strategy)
+# 本地HTTP缓存：保存页面及其ETag/Last-Modified，再次请求时发送条件请求
+http_cache = HttpCache(HTTP_CACHE_DIR)
+
+# 创建适配器并添加到会话（连接池大小与并发抓取数一致）
+adapter = CrawlerAdapter(http_cache, limiter=rate_limiter, max_retries=retry_strategy,
+                         pool_maxsize=MAX_CONCURRENT_FETCHES)
 session.mount("http://", adapter)
 session.mount("https://", adapter)
 
@@ -58,30 +92,56 @@ session.headers.update({
     'Cache-Control': 'max-age=0'
 })
 
+# URL规范化和分类：同一篇文章的不同写法只抓取一次，直播、音频、视频等页面不抓取
+url_router = UrlRouter(SKIPPED_URL_TYPES)
+
+# 抓取前按搜索结果的标题、摘要和URL路径评分，跳过与主题无关的文章
+relevance_scorer = RelevanceScorer()
+
+# RSS和新闻站点地图的增量发现，记录每个订阅已处理到的时间
+feed_discovery = FeedDiscovery(FEED_STATE_FILE)
+
+# 下载前的图片筛选：按 Content-Length 和文件头中的宽高跳过图标、占位图等小图片
+image_gate = ImageGate()
+
+# 原始响应存档：开启后每个页面响应都写入WARC存档，之后修改提取规则时可以离线重新提取
+response_archive = None
+if ARCHIVE_RESPONSES:
+    response_archive = ResponseArchive(ARCHIVE_DIR, ARCHIVE_MAX_SIZE)
+    session.hooks['response'].append(response_archive.hook)
+    atexit.register(response_archive.close)
+
+# 标题和正文选择器的命中统计，按页面类型调整尝试顺序，程序退出时保存
+selector_cache = SelectorCache(SELECTOR_STATS_FILE)
+atexit.register(selector_cache.save)
+
 # 禁用SSL验证警告
 requests.packages.urllib3.disable_warnings()
 
-def generate_filename(url, title=None, extension='.txt'):
-    """生成唯一的文件名"""
-    if title:
-        # 移除不合法的文件名字符
-        title = re.sub(r'[\\/*?:"<>|]', "", title)
-        title = title.strip()
-        if len(title) > 100:
-            title = title[:100]  # 限制长度
-        
-        # 如果标题为空，使用URL的哈希值
-        if not title:
-            title = hashlib.md5(url.encode()).hexdigest()
-        
-        return f"{title}{extension}"
-    else:
-        return f"{hashlib.md5(url.encode()).hexdigest()}{extension}"
-
-def get_article_title(soup):
-    """从文章页面提取标题"""
-    # 尝试多种可能的标题选择器
-    title_selectors = [
+def fetch_page(url, params=None):
+    """请求网页并返回响应对象"""
+    with metrics.timer('fetch'):
+        # 添加verify=False参数禁用SSL验证
+        response = session.get(url, params=params, verify=False, timeout=30)
+        response.raise_for_status()
+    metrics.add_bytes('fetch', len(response.content))
+    return response
+
+def name_untitled_article(url, result, number):
+    """
+    为没有标题的文章使用编号作为标题（文件名由URL决定，不需要重命名）
+    文件中的标题行、文章存储和标题索引都改为这个标题
+    """
+    result['title'] = f"Untitled Article {number}"
+    set_article_file_title(os.path.join(ARTICLES_DIR, result['filename']), result['title'])
+    article_index.set_title(url, result['title'])
+    article_store.update(url, title=result['title'])
+    return result
+
+# 标题选择器，按组依次尝试（组的顺序固定）；
+# 同一组内是不同页面布局使用的特定选择器，按该类型页面的命中次数调整顺序
+TITLE_SELECTORS = [
+    [
         'h1.ssrcss-15xko80-StyledHeading',
         'h1.ssrcss-1f3bvyz-Headline',
         'h1.article__title',
@@ -89,7 +149,9 @@ def get_article_title(soup):
         'h1.article-headline',
         'h1.headline',
         'h1.title',
-        'h1',
+    ],
+    ['h1'],
+    [
         'h2.ssrcss-15xko80-StyledHeading',
         'h2.ssrcss-1f3bvyz-Headline',
         'h2.article__title',
@@ -97,14 +159,47 @@ def get_article_title(soup):
         'h2.article-headline',
         'h2.headline',
         'h2.title',
-        'h2'
-    ]
-    
-    for selector in title_selectors:
+    ],
+    ['h2'],
+]
+
+# 文章主体选择器，按组依次尝试（组的顺序固定），同一组内按命中次数调整顺序
+BODY_SELECTORS = [
+    ['article'],
+    ['div.ssrcss-1ocoo3l-Wrap'],
+    [
+        'div.story-body__inner',
+        'div.article__body',
+        'div.article-body',
+        'div.article-content',
+        'div.article-text',
+        'div.article-body-content',
+        'div.article__body-content',
+        'div.article__content',
+    ],
+]
+
+# 找不到文章主体时，收集这些容器中的段落
+TEXT_CONTAINER_SELECTOR = 'div[class*="content"] p, div[class*="body"] p, div[class*="text"] p'
+
+# 快速解析时保留的标签：标题、meta信息和文章主体（图片、视频都在主体内）
+FAST_PARSE_TAGS = ['h1', 'h2', 'meta', 'article']
+
+# 段落所在容器中出现这些标记（标签名、class、role等属性，以及文字、注释和脚本内容）时不作为正文
+EXCLUDED_MARKERS = ('footer', 'caption')
+
+def get_article_title(soup, page_url=None):
+    """从文章页面提取标题
+
+    page_url 用于按页面类型调整选择器的尝试顺序
+    """
+    # 尝试多种可能的标题选择器，同一组中该类型页面命中最多的优先
+    for selector in selector_cache.ordered('title', page_url, TITLE_SELECTORS):
         title_elem = soup.select_one(selector)
         if title_elem:
             title = title_elem.text.strip()
             if title and title != "BBC News":
+                selector_cache.record('title', page_url, selector)
                 return title
     
     # 如果找不到标题，尝试从meta标签获取
@@ -112,6 +207,7 @@ def get_article_title(soup):
     if meta_title:
         title = meta_title.get('content', '').strip()
         if title and title != "BBC News":
+            selector_cache.record('title', page_url, 'meta[property="og:title"]')
             return title
     
     # 尝试从URL中提取标题
@@ -124,355 +220,674 @@ def get_article_title(soup):
             if url_parts:
                 title = url_parts[-1].replace('-', ' ').strip()
                 if title:
+                    selector_cache.record('title', page_url, 'meta[property="og:url"]')
                     return title
     
+    selector_cache.record('title', page_url, None)
     return None
 
+def search_result_date(result):
+    """
+    搜索结果中的发布日期（<time>标签，或 "12 May 2023"、"2 days ago" 形式的文字）
+    返回ISO格式的时间，找不到时返回None
+    """
+    time_elem = result.find('time')
+    if time_elem and time_elem.get('datetime'):
+        return time_elem['datetime']
+    
+    text = result.get_text(' ')
+    match = re.search(r'\b(\d{1,2}) ([A-Z][a-z]{2,8}) (\d{4})\b', text)
+    if match:
+        try:
+            date = datetime.strptime(f"{match.group(1)} {match.group(2)[:3]} {match.group(3)}", "%d %b %Y")
+            return date.replace(tzinfo=timezone.utc).isoformat()
+        except ValueError:
+            pass
+    
+    match = re.search(r'\b(\d+) (minute|hour|day)s? ago\b', text)
+    if match:
+        age = timedelta(**{match.group(2) + 's': int(match.group(1))})
+        return (datetime.now(timezone.utc) - age).isoformat()
+    return None
+
+def search_page(keyword, page):
+    """
+    获取一页搜索结果
+    返回该页的文章列表，页面中没有结果容器时返回None
+    """
+    params = {
+        'q': keyword,
+        'page': page
+    }
+    
+    response = fetch_page(BBC_NEWS_URL, params=params)
+    
+    with metrics.timer('parse'):
+        soup = BeautifulSoup(response.content, 'lxml', from_encoding=declared_encoding(response.headers))
+    metrics.add_bytes('parse', len(response.content))
+    search_results = soup.select('div.ssrcss-1v7bxtk-StyledContainer')
+    
+    if not search_results:
+        search_results = soup.select('div.ssrcss-1qt4x4l-PromoContent')
+    
+    if not search_results:
+        # 尝试寻找其他可能的文章容器
+        search_results = soup.select('div.PromoContent')
+    
+    if not search_results:
+        return None
+    
+    articles = []
+    for result in search_results:
+        link_elem = result.find('a')
+        if not link_elem:
+            continue
+            
+        article_url = link_elem.get('href')
+        if not article_url:
+            continue
+        
+        # 确保URL是绝对路径
+        if article_url.startswith('/'):
+            article_url = urljoin(BBC_URL, article_url)
+        
+        # 提取标题
+        title_elem = result.select_one('h3') or result.select_one('h2') or result.select_one('span.promo-heading__title')
+        title = title_elem.text.strip() if title_elem else "No Title"
+        
+        # 提取摘要，用于抓取前的相关度评分
+        snippet_elem = result.select_one('p')
+        snippet = snippet_elem.text.strip() if snippet_elem else ""
+        
+        article = {
+            'url': article_url,
+            'title': title,
+            'snippet': snippet
+        }
+        
+        # 发布日期用于抓取调度，日期越近越先抓取
+        published = search_result_date(result)
+        if published:
+            article['published'] = published
+        
+        articles.append(article)
+    
+    return route_articles(articles)
+
+def route_articles(articles):
+    """规范化文章URL，去掉重复的、不需要抓取的和相关度低于阈值的URL"""
+    routed = []
+    seen_urls = set()
+    for article in articles:
+        canonical_url, _, accepted = url_router.route(article['url'])
+        if accepted and canonical_url not in seen_urls:
+            seen_urls.add(canonical_url)
+            article = dict(article, url=canonical_url)
+            if relevance_scorer.accept(article):
+                routed.append(article)
+    return routed
+
+def route_pending(articles):
+    """
+    过滤爬取队列中的待处理文章：不需要抓取的URL标记为跳过，
+    以前记录的非规范URL标记为跳过并改用规范URL
+    """
+    routed = []
+    seen_urls = set()
+    for article in articles:
+        canonical_url, url_type, accepted = url_router.route(article['url'])
+        if not accepted:
+            frontier.mark_skipped(article['url'], url_type)
+            continue
+        if canonical_url != article['url']:
+            frontier.mark_skipped(article['url'], f"与 {canonical_url} 相同")
+            frontier.add_discovered([dict(article, url=canonical_url)])
+            if frontier.is_extracted(canonical_url):
+                continue
+        if canonical_url not in seen_urls:
+            seen_urls.add(canonical_url)
+            routed.append(dict(article, url=canonical_url))
+    return routed
+
 def search_articles(keyword, start_page=1, max_pages=MAX_PAGES_PER_KEYWORD):
     """搜索BBC关于中国航天的文章"""
     articles = []
     
     for page in range(start_page, start_page + max_pages):
         try:
-            params = {
-                'q': keyword,
-                'page': page
-            }
-            
-            # 添加verify=False参数禁用SSL验证
-            response = session.get(BBC_NEWS_URL, params=params, verify=False, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'lxml')
-            search_results = soup.select('div.ssrcss-1v7bxtk-StyledContainer')
-            
-            if not search_results:
-                search_results = soup.select('div.ssrcss-1qt4x4l-PromoContent')
+            results = search_page(keyword, page)
             
-            if not search_results:
-                # 尝试寻找其他可能的文章容器
-                search_results = soup.select('div.PromoContent')
-            
-            if not search_results:
+            if results is None:
                 print(f"未在第{page}页找到结果，可能已到达最后一页或搜索格式已更改")
                 break
-                
-            for result in search_results:
-                link_elem = result.find('a')
-                if not link_elem:
-                    continue
-                    
-                article_url = link_elem.get('href')
-                if not article_url:
-                    continue
-                
-                # 确保URL是绝对路径
-                if article_url.startswith('/'):
-                    article_url = urljoin(BBC_URL, article_url)
-                
-                # 检查是否已下载过
-                if article_url in downloaded_urls:
-                    continue
-                
-                # 提取标题
-                title_elem = result.select_one('h3') or result.select_one('h2') or result.select_one('span.promo-heading__title')
-                title = title_elem.text.strip() if title_elem else "No Title"
-                
-                articles.append({
-                    'url': article_url,
-                    'title': title
-                })
             
-            # 随机休眠，避免请求过快
-            time.sleep(random.uniform(REQUEST_DELAY[0], REQUEST_DELAY[1]))
+            # 跳过已下载过的文章
+            articles.extend(article for article in results if not frontier.is_extracted(article['url']))
             
+        except CircuitOpenError as e:
+            print(f"搜索页面{page}时出错: {e}")
+            break
         except Exception as e:
             print(f"搜索页面{page}时出错: {e}")
-            time.sleep(BATCH_PAUSE)  # 出错后等待更长时间
     
     return articles
 
-def download_image(img_url, article_dir):
-    """下载图片"""
-    if img_url in downloaded_media_urls:
-        return None
-        
+def absolute_media_url(media_url):
+    """把页面中相对路径的图片视频地址转换成绝对URL"""
+    if media_url.startswith('//'):
+        return 'https:' + media_url
+    if media_url.startswith('/'):
+        return urljoin(BBC_URL, media_url)
+    return media_url
+
+def download_image(img_url, article_dir, http_session=None, info=None):
+    """下载图片
+
+    http_session 为空时使用共享的 session；已下载过的图片直接返回记录的文件名
+    info 不为空时记录图片来源（store: 已下载过, dedup: 下载后发现内容重复, network: 新下载）
+    和本次从网络读取的字节数
+    """
     try:
         # 确保URL是绝对路径
-        if img_url.startswith('//'):
-            img_url = 'https:' + img_url
-        elif img_url.startswith('/'):
-            img_url = urljoin(BBC_URL, img_url)
-            
-        # 添加verify=False参数禁用SSL验证
-        response = session.get(img_url, stream=True, verify=False, timeout=30)
-        response.raise_for_status()
+        img_url = absolute_media_url(img_url)
         
-        # 获取文件扩展名
-        content_type = response.headers.get('Content-Type', '')
-        if 'jpeg' in content_type or 'jpg' in content_type:
-            ext = '.jpg'
-        elif 'png' in content_type:
-            ext = '.png'
-        elif 'gif' in content_type:
-            ext = '.gif'
-        elif 'webp' in content_type:
-            ext = '.webp'
-        else:
-            ext = '.jpg'  # 默认扩展名
-        
-        # 生成图片文件名
-        img_filename = f"{hashlib.md5(img_url.encode()).hexdigest()}{ext}"
-        img_path = os.path.join(IMAGES_DIR, img_filename)
-        
-        # 保存图片
-        with open(img_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    
-        downloaded_media_urls.add(img_url)
+        existing_filename = media_store.lookup(img_url, IMAGES_DIR)
+        if existing_filename:
+            if info is not None:
+                info.update(source='store', bytes=0)
+            return existing_filename
+            
+        with metrics.timer('image_download'):
+            # 添加verify=False参数禁用SSL验证
+            response = (http_session or session).get(img_url, stream=True, verify=False, timeout=30)
+            response.raise_for_status()
+            
+            # 只读取文件头判断尺寸，太小的图片不下载剩余内容
+            if not image_gate.check_length(response.headers):
+                response.close()
+                return None
+            # 只读取文件头大小的数据，通过筛选后再按常规块大小读取剩余内容
+            head = image_gate.read_header(response.raw)
+            if not image_gate.check_header(head, response.headers):
+                response.close()
+                return None
+            
+            # 获取文件扩展名
+            content_type = response.headers.get('Content-Type', '')
+            if 'jpeg' in content_type or 'jpg' in content_type:
+                ext = '.jpg'
+            elif 'png' in content_type:
+                ext = '.png'
+            elif 'gif' in content_type:
+                ext = '.gif'
+            elif 'webp' in content_type:
+                ext = '.webp'
+            else:
+                ext = '.jpg'  # 默认扩展名
+            
+            # 保存图片，文件以内容哈希命名
+            img_filename, new = media_store.save_stream(
+                img_url, itertools.chain([head], response.iter_content(chunk_size=8192)), IMAGES_DIR, ext
+            )
+        # 按内容命名的文件大小就是这次下载的字节数（内容重复时已有文件与下载的内容相同）
+        fetched = os.path.getsize(os.path.join(IMAGES_DIR, img_filename))
+        metrics.add_bytes('image_download', fetched)
+        if info is not None:
+            info.update(source='network' if new else 'dedup', bytes=fetched)
         return img_filename
         
     except Exception as e:
         print(f"下载图片失败: {img_url}, 错误: {e}")
         return None
 
-def download_video(video_url, article_dir):
-    """下载视频"""
-    if video_url in downloaded_media_urls:
-        return None
-        
+def download_video(video_url, article_dir, http_session=None, info=None):
+    """下载视频
+
+    http_session 为空时使用共享的 session；已下载过的视频直接返回记录的文件名
+    info 与 download_image 相同；断点续传时只计入本次下载的部分
+    """
     try:
         # 确保URL是绝对路径
-        if video_url.startswith('//'):
-            video_url = 'https:' + video_url
-        elif video_url.startswith('/'):
-            video_url = urljoin(BBC_URL, video_url)
-            
-        # 添加verify=False参数禁用SSL验证
-        response = session.get(video_url, stream=True, verify=False, timeout=30)
-        response.raise_for_status()
+        video_url = absolute_media_url(video_url)
         
-        # 获取文件扩展名
-        content_type = response.headers.get('Content-Type', '')
-        if 'mp4' in content_type:
-            ext = '.mp4'
-        elif 'webm' in content_type:
-            ext = '.webm'
-        else:
-            ext = '.mp4'  # 默认扩展名
-        
-        # 生成视频文件名
-        video_filename = f"{hashlib.md5(video_url.encode()).hexdigest()}{ext}"
-        video_path = os.path.join(VIDEOS_DIR, video_filename)
-        
-        # 保存视频
-        with open(video_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    
-        downloaded_media_urls.add(video_url)
+        existing_filename = media_store.lookup(video_url, VIDEOS_DIR)
+        if existing_filename:
+            if info is not None:
+                info.update(source='store', bytes=0)
+            return existing_filename
+            
+        with metrics.timer('video_download'):
+            # 分段下载（支持断点续传），下载中断时保留 .part 文件，下次从断点继续
+            file_path, content_type, fetched = download_ranged(http_session or session, video_url, VIDEOS_DIR)
+            
+            # 获取文件扩展名
+            if 'mp4' in content_type:
+                ext = '.mp4'
+            elif 'webm' in content_type:
+                ext = '.webm'
+            else:
+                ext = '.mp4'  # 默认扩展名
+            
+            # 保存视频，文件以内容哈希命名
+            video_filename, new = media_store.save_file(video_url, file_path, VIDEOS_DIR, ext)
+        metrics.add_bytes('video_download', fetched)
+        if info is not None:
+            info.update(source='network' if new else 'dedup', bytes=fetched)
         return video_filename
         
     except Exception as e:
         print(f"下载视频失败: {video_url}, 错误: {e}")
         return None
 
-def extract_article_content(url, title):
-    """提取文章内容、图片和视频"""
-    try:
-        # 添加verify=False参数禁用SSL验证
-        response = session.get(url, verify=False, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'lxml')
-        
-        # 获取文章标题
-        article_title = get_article_title(soup)
-        if not article_title:
-            article_title = title if title != "No Title" else None
+def write_article_file(article_path, article_title, url, paragraphs, images, videos, published=None):
+    """
+    保存文章内容，文件末尾附图片和视频列表；同时写入结构化的文章存储和标题索引
+    先写入临时文件再替换，其他线程或进程不会读到写了一半的文件
+    """
+    tmp_path = f"{article_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with metrics.timer('write'), open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(f"标题: {article_title}\n")
+        f.write(f"网址: {url}\n\n")
+        f.write("正文内容:\n")
+        f.write("\n\n".join(paragraphs))
         
-        # 查找文章主体
-        article_body = None
-        body_selectors = [
-            'article',
-            'div.ssrcss-1ocoo3l-Wrap',
-            'div.story-body__inner',
-            'div.article__body',
-            'div.article-body',
-            'div.article-content',
-            'div.article-text',
-            'div.article-body-content',
-            'div.article__body-content',
-            'div.article__content'
-        ]
-        
-        for selector in body_selectors:
-            article_body = soup.select_one(selector)
-            if article_body:
-                break
-        
-        if not article_body:
-            # 如果找不到标准文章主体，尝试查找包含段落文本的容器
-            text_containers = soup.select('div[class*="content"] p, div[class*="body"] p, div[class*="text"] p')
-            if text_containers:
-                # 创建一个新的div来包含所有段落
-                article_body = soup.new_tag('div')
-                for p in text_containers:
-                    article_body.append(p)
+        if images:
+            f.write("\n\n图片列表:\n")
+            for i, img in enumerate(images, 1):
+                f.write(f"{i}. {img['filename']} - {img['caption']}\n")
+                
+        if videos:
+            f.write("\n\n视频列表:\n")
+            for i, vid in enumerate(videos, 1):
+                f.write(f"{i}. {vid['filename']}\n")
         
-        if not article_body:
-            print(f"无法找到文章主体: {url}")
-            return None
+        metrics.add_bytes('write', f.tell())
+    os.replace(tmp_path, article_path)
+    
+    article_store.add(url, article_title, paragraphs, images, videos,
+                      os.path.basename(article_path), published)
+    article_index.record(url, article_title, os.path.basename(article_path))
+
+class ExtractionError(Exception):
+    """页面中找不到文章主体或正文"""
+
+def declared_encoding(headers):
+    """响应头中声明的字符编码，没有声明时返回None（由解析器根据页面内容判断）"""
+    content_type = headers.get('Content-Type', '')
+    if 'charset=' not in content_type.lower():
+        return None
+    return requests.utils.get_encoding_from_headers(headers)
+
+def parse_html(markup, encoding=None, fast=None):
+    """
+    解析页面，markup 可以是字节或字符串
+    fast 为True时只解析标题、meta标签和<article>部分，页面没有<article>时再完整解析；
+    为None时按 FAST_PARSE 设置
+    """
+    if fast is None:
+        fast = FAST_PARSE
+    if fast:
+        soup = BeautifulSoup(markup, 'lxml', from_encoding=encoding,
+                             parse_only=SoupStrainer(FAST_PARSE_TAGS))
+        if soup.find('article'):
+            return soup
+    return BeautifulSoup(markup, 'lxml', from_encoding=encoding)
+
+def get_published_time(soup):
+    """页面中的发布时间（meta标签或<time>标签），找不到时返回None"""
+    for attrs in ({'property': 'article:published_time'}, {'name': 'article:published_time'},
+                  {'itemprop': 'datePublished'}):
+        meta = soup.find('meta', attrs=attrs)
+        if meta and meta.get('content'):
+            return meta['content']
+    time_elem = soup.select_one('article time[datetime]') or soup.select_one('time[datetime]')
+    if time_elem:
+        return time_elem['datetime']
+    return None
+
+def find_article_body(soup, url):
+    """查找文章主体，同一组选择器中该类型页面命中最多的优先"""
+    article_body = None
+    body_selector = None
+    for selector in selector_cache.ordered('body', url, BODY_SELECTORS):
+        article_body = soup.select_one(selector)
+        if article_body:
+            body_selector = selector
+            break
+    
+    if not article_body:
+        # 如果找不到标准文章主体，尝试查找包含段落文本的容器
+        text_containers = soup.select(TEXT_CONTAINER_SELECTOR)
+        if text_containers:
+            # 创建一个新的div来包含所有段落
+            article_body = soup.new_tag('div')
+            for p in text_containers:
+                article_body.append(p)
+            body_selector = TEXT_CONTAINER_SELECTOR
+    
+    selector_cache.record('body', url, body_selector)
+    return article_body
+
+def has_excluded_marker(tag):
+    """标签名、属性名或属性值中是否含有页脚/图片说明标记"""
+    if any(marker in tag.name.lower() for marker in EXCLUDED_MARKERS):
+        return True
+    for key, value in tag.attrs.items():
+        if isinstance(value, (list, tuple)):
+            value = ' '.join(value)
+        text = f"{key}={value}".lower()
+        if any(marker in text for marker in EXCLUDED_MARKERS):
+            return True
+    return False
+
+def has_excluded_text(tag):
+    """
+    标签的直接文本子节点（文字、注释、<script>内容等）中是否含有页脚/图片说明标记
+    与原来序列化父节点后查找的结果一致：相邻的文字序列化后连在一起，按连续的文字一起检查；
+    子标签和注释的 <!-- --> 把前后的文字隔开
+    """
+    parts = []
+    for child in tag.children:
+        if child.name:
+            parts.append('<')
+        elif isinstance(child, PreformattedString):
+            parts.extend(('<', child, '<'))
+        else:
+            parts.append(child)
+    text = ''.join(parts).lower()
+    return any(marker in text for marker in EXCLUDED_MARKERS)
+
+def excluded_containers(article_body):
+    """
+    一次遍历文章主体，找出自身或子孙节点带有页脚/图片说明标记的容器，返回这些容器的id集合
+    按文档倒序遍历，处理父节点时子节点已经有结果，每个节点只检查一次
+    """
+    excluded = set()
+    tags = [article_body] + article_body.find_all(True)
+    for tag in reversed(tags):
+        if has_excluded_marker(tag) or has_excluded_text(tag) or any(
+            id(child) in excluded for child in tag.children if child.name
+        ):
+            excluded.add(id(tag))
+    return excluded
+
+def extract_paragraphs(article_body):
+    """提取文章段落"""
+    paragraphs = []
+    excluded = excluded_containers(article_body)
+    for p in article_body.find_all('p'):
+        # 排除页脚和图片说明中的段落
+        if id(p.parent) in excluded:
+            continue
+        text = p.get_text().strip()
+        if text:
+            paragraphs.append(text)
+    
+    # 如果没有找到任何段落，尝试直接获取所有文本
+    if not paragraphs:
+        text = article_body.get_text().strip()
+        if text:
+            paragraphs = [text]
+    
+    return paragraphs
+
+def parse_article(url, title, html, encoding=None):
+    """
+    从页面中提取标题、段落以及待下载的图片和视频，不下载也不保存
+    找不到文章主体或正文时抛出 ExtractionError
+    """
+    with metrics.timer('parse'):
+        soup = parse_html(html, encoding)
+    metrics.add_bytes('parse', len(html))
+    
+    # 获取文章标题和文章主体
+    with metrics.timer('selector'):
+        article_title = get_article_title(soup, url)
+        article_body = find_article_body(soup, url)
+    if not article_title:
+        article_title = title if title != "No Title" else None
+    published = get_published_time(soup)
+    
+    if not article_body:
+        raise ExtractionError("无法找到文章主体")
+    
+    paragraphs = extract_paragraphs(article_body)
+    if not paragraphs:
+        raise ExtractionError("无法提取文章内容")
+    
+    # 收集正文中的图片
+    image_jobs = []
+    for img in article_body.select('img'):
+        # 忽略小图标和广告图片（没有写明宽度的图片在下载时按文件头中的尺寸筛选）
+        width = img.get('width', '')
+        if width.isdigit() and int(width) < IMAGE_MIN_WIDTH:
+            continue
             
-        # 提取文章段落
-        paragraphs = []
-        for p in article_body.select('p'):
-            # 排除不相关的段落
-            if 'footer' in str(p.parent).lower() or 'caption' in str(p.parent).lower():
-                continue
-            text = p.get_text().strip()
-            if text:
-                paragraphs.append(text)
-        
-        # 如果没有找到任何段落，尝试直接获取所有文本
-        if not paragraphs:
-            text = article_body.get_text().strip()
-            if text:
-                paragraphs = [text]
-        
-        if not paragraphs:
-            print(f"无法提取文章内容: {url}")
-            return None
-        
-        # 提取图片
-        images = []
-        for img in article_body.select('img'):
-            # 忽略小图标和广告图片
-            if img.get('width') and int(img.get('width')) < 100:
-                continue
-                
-            img_url = img.get('src')
-            if not img_url:
-                continue
-                
-            img_filename = download_image(img_url, IMAGES_DIR)
-            if img_filename:
-                # 获取图片说明
-                figcaption = img.find_parent('figure').find('figcaption') if img.find_parent('figure') else None
-                caption = figcaption.text.strip() if figcaption else "无说明"
-                
-                images.append({
-                    'url': img_url,
-                    'filename': img_filename,
-                    'caption': caption
-                })
+        # 优先从 srcset 中选择不超过最大宽度的图片，延迟加载的图片 src 通常是占位图
+        img_url = choose_srcset(img.get('srcset') or img.get('data-srcset')) or img.get('src')
+        if not img_url:
+            continue
+            
+        # 获取图片说明
+        figcaption = img.find_parent('figure').find('figcaption') if img.find_parent('figure') else None
+        caption = figcaption.text.strip() if figcaption else "无说明"
+        image_jobs.append({
+            'url': img_url,
+            'caption': caption
+        })
+    
+    # 收集正文中的视频
+    video_elements = article_body.select('video') + article_body.select('iframe[src*="player"]')
+    
+    # 尝试查找可能包含视频的div元素
+    video_containers = article_body.select('div[data-e2e="media-player"]')
+    for container in video_containers:
+        video_elem = container.select_one('video') or container.select_one('iframe')
+        if video_elem:
+            video_elements.append(video_elem)
+    
+    video_jobs = []
+    for video in video_elements:
+        video_url = video.get('src')
+        if video_url:
+            video_jobs.append({'url': video_url})
+    
+    return {
+        'title': article_title,
+        'paragraphs': paragraphs,
+        'images': image_jobs,
+        'videos': video_jobs,
+        'published': published
+    }
+
+def extract_article_content(url, title, html=None, media_pool=None, encoding=None):
+    """提取文章内容、图片和视频
+
+    html 为已抓取的页面内容（字节或字符串）时直接解析，不再重复请求；
+    media_pool 不为空时图片和视频交给后台下载池处理，不阻塞正文保存，
+    媒体全部处理完后才由下载池标记为已提取
+    """
+    try:
+        if html is None:
+            response = fetch_page(url)
+            html = response.content
+            encoding = declared_encoding(response.headers)
+            frontier.mark_fetched(url)
+        relevance_scorer.observe_page(len(html))
         
-        # 提取视频
-        videos = []
-        video_elements = article_body.select('video') + article_body.select('iframe[src*="player"]')
+        article = parse_article(url, title, html, encoding)
+        article_title = article['title']
+        paragraphs = article['paragraphs']
+        image_jobs = article['images']
+        video_jobs = article['videos']
         
-        # 尝试查找可能包含视频的div元素
-        video_containers = article_body.select('div[data-e2e="media-player"]')
-        for container in video_containers:
-            video_elem = container.select_one('video') or container.select_one('iframe')
-            if video_elem:
-                video_elements.append(video_elem)
+        # 与已有文章近似重复（转载、改写）时不保存，或只保存正文并标记
+        duplicate_of, similarity = near_duplicate_index.check(url, paragraphs)
+        if duplicate_of:
+            print(f"与已有文章近似重复（相似度 {similarity:.0%}）: {url} ≈ {duplicate_of}")
+            if NEAR_DUPLICATE_ACTION == 'drop':
+                frontier.mark_skipped(url, f"与 {duplicate_of} 近似重复")
+                return None
+            image_jobs, video_jobs = [], []
         
-        for video in video_elements:
-            video_url = video.get('src')
-            if not video_url:
-                continue
-                
-            video_filename = download_video(video_url, VIDEOS_DIR)
-            if video_filename:
-                videos.append({
-                    'url': video_url,
-                    'filename': video_filename
-                })
+        # 文章文件以URL编号命名，标题相同的不同文章不会互相覆盖
+        filename = article_filename(url)
+        article_path = os.path.join(ARTICLES_DIR, filename)
         
-        # 生成文章文件名
-        article_filename = generate_filename(url, article_title)
-        article_path = os.path.join(ARTICLES_DIR, article_filename)
+        result = {
+            'filename': filename,
+            'title': article_title,
+            'images': 0,
+            'videos': 0
+        }
+        if duplicate_of:
+            result['duplicate_of'] = duplicate_of
         
-        # 保存文章内容
-        with open(article_path, 'w', encoding='utf-8') as f:
-            f.write(f"标题: {article_title}\n")
-            f.write(f"网址: {url}\n\n")
-            f.write("正文内容:\n")
-            f.write("\n\n".join(paragraphs))
+        if media_pool is not None:
+            # 先保存正文，图片和视频交给后台下载池，下载完成后补全媒体列表并标记为已提取
+            write_article_file(article_path, article_title, url, paragraphs, [], [], article['published'])
+            media_pool.submit_article(article_title, url, paragraphs,
+                                      image_jobs, video_jobs, result, article['published'])
+        else:
+            images = []
+            for job in image_jobs:
+                img_filename = download_image(job['url'], IMAGES_DIR)
+                if img_filename:
+                    images.append(dict(job, filename=img_filename))
+            
+            videos = []
+            for job in video_jobs:
+                video_filename = download_video(job['url'], VIDEOS_DIR)
+                if video_filename:
+                    videos.append(dict(job, filename=video_filename))
             
-            if images:
-                f.write("\n\n图片列表:\n")
-                for i, img in enumerate(images, 1):
-                    f.write(f"{i}. {img['filename']} - {img['caption']}\n")
-                    
-            if videos:
-                f.write("\n\n视频列表:\n")
-                for i, vid in enumerate(videos, 1):
-                    f.write(f"{i}. {vid['filename']}\n")
-                    
-        downloaded_urls.add(url)
+            write_article_file(article_path, article_title, url, paragraphs, images, videos,
+                               article['published'])
+            result['images'] = len(images)
+            result['videos'] = len(videos)
+            frontier.mark_extracted(url, filename)
         
-        return {
-            'filename': article_filename,
-            'title': article_title,
-            'images': len(images),
-            'videos': len(videos)
-        }
+        return result
             
+    except ExtractionError as e:
+        print(f"{e}: {url}")
+        frontier.mark_failed(url, e)
+        return None
+    except CircuitOpenError as e:
+        # 主机熔断时不计入失败次数，留在队列中等下次处理
+        print(f"处理文章失败: {url}, 错误: {e}")
+        return None
     except Exception as e:
         print(f"处理文章失败: {url}, 错误: {e}")
+        frontier.mark_failed(url, e)
         return None
 
-def main():
-    """主函数"""
-    all_articles = []
-    no_title_counter = 1  # 用于无标题文章的编号
+def discover_keyword(keyword):
+    """
+    搜索一个关键词并记录到爬取队列，返回新发现的文章列表
+    已在队列中的文章不再返回：未完成的由 pending() 提供，失败次数达到上限或已跳过的不再抓取
+    """
+    print(f"\n搜索关键词: {keyword}")
+    articles = search_articles(keyword)
+    new_articles = frontier.add_discovered(articles, keyword)
+    print(f"找到 {len(articles)} 篇文章，其中 {len(new_articles)} 篇为新发现")
+    return new_articles
+
+def discover_articles(keywords=SEARCH_KEYWORDS):
+    """
+    搜索所有关键词，在下载任何文章前完成去重并记录到爬取队列
+    返回本次新发现的独特文章列表
+    """
+    unique_articles = []
+    unique_urls = set()
     
-    # 遍历所有搜索关键词
-    for keyword in SEARCH_KEYWORDS:
-        print(f"\n搜索关键词: {keyword}")
-        articles = search_articles(keyword)
-        all_articles.extend(articles)
-        print(f"找到 {len(articles)} 篇文章")
+    for keyword in keywords:
+        articles = discover_keyword(keyword)
         
-        # 每找到一个文章就立即下载
         for article in articles:
-            print(f"\n处理文章: {article['title']}")
-            result = extract_article_content(article['url'], article['title'])
-            if result:
-                if not result['title']:
-                    # 如果文章没有标题，使用编号作为标题
-                    result['title'] = f"Untitled Article {no_title_counter}"
-                    no_title_counter += 1
-                    # 重新生成文件名
-                    article_filename = generate_filename(article['url'], result['title'])
-                    article_path = os.path.join(ARTICLES_DIR, article_filename)
-                    # 重命名文件
-                    if os.path.exists(os.path.join(ARTICLES_DIR, result['filename'])):
-                        os.rename(
-                            os.path.join(ARTICLES_DIR, result['filename']),
-                            article_path
-                        )
-                    result['filename'] = article_filename
-                
-                print(f"成功下载: {result['title']}")
-                print(f"包含 {result['images']} 张图片和 {result['videos']} 个视频")
-            time.sleep(random.uniform(REQUEST_DELAY[0], REQUEST_DELAY[1]))
+            if article['url'] not in unique_urls:
+                unique_articles.append(article)
+                unique_urls.add(article['url'])
+    
+    print(f"\n总共找到 {len(unique_articles)} 篇独特文章")
+    return unique_articles
+
+def discover_feed_articles(feed_urls=FEED_URLS):
+    """
+    从RSS订阅和新闻站点地图中发现上次运行之后的新文章，记录到爬取队列
+    返回新发现的相关文章列表
+    """
+    print("\n读取RSS订阅和新闻站点地图")
+    articles = route_articles(feed_discovery.discover(feed_urls, fetch_page))
+    new_articles = frontier.add_discovered(articles, 'feed')
+    print(f"找到 {len(articles)} 篇相关文章，其中 {len(new_articles)} 篇为新发现")
+    return new_articles
+
+def discovery_batches():
+    """
+    依次产生待抓取的文章：上次未完成的文章、订阅中新发现的文章、每个关键词新发现的文章
+    （与 async_crawler 相同，只抓取新发现的和 pending() 中的文章，失败次数达到上限或已跳过的不再抓取）
+    由调度器在队列为空时才取下一批，达到目标数量后剩余的关键词不再搜索
+    """
+    # 队列中所有未完成的文章（包括上次中断时未处理完的）
+    pending_articles = route_pending(frontier.pending())
+    print(f"上次未完成 {len(pending_articles)} 篇文章")
+    yield pending_articles
     
-    # 去重
+    if DISCOVERY_MODE in ('feeds', 'both'):
+        yield discover_feed_articles()
+    if DISCOVERY_MODE in ('search', 'both'):
+        for keyword in SEARCH_KEYWORDS:
+            yield discover_keyword(keyword)
+
+def main():
+    """主函数"""
+    no_title_counter = 1  # 用于无标题文章的编号
+    metrics.start_server(METRICS_PORT)
+    
+    # 按相关度和发布时间排序抓取，与主题相关的文章达到目标数量后停止
+    scheduler = CrawlScheduler(relevance_scorer)
     unique_articles = []
-    unique_urls = set()
+    batches = discovery_batches()
     
-    for article in all_articles:
-        if article['url'] not in unique_urls:
-            unique_articles.append(article)
-            unique_urls.add(article['url'])
+    while not scheduler.done():
+        if not scheduler:
+            batch = next(batches, None)
+            if batch is None:
+                break
+            batch = [article for article in batch if not frontier.is_extracted(article['url'])]
+            unique_articles.extend(article for article in batch if article['url'] not in scheduler.seen_urls)
+            scheduler.add(batch)
+            continue
+        
+        article = scheduler.pop()
+        print(f"\n处理文章: {article['title']}")
+        result = extract_article_content(article['url'], article['title'])
+        scheduler.record(article['url'], result)
+        if result:
+            if not result['title']:
+                # 如果文章没有标题，使用编号作为标题
+                name_untitled_article(article['url'], result, no_title_counter)
+                no_title_counter += 1
+            
+            print(f"成功下载: {result['title']}")
+            print(f"包含 {result['images']} 张图片和 {result['videos']} 个视频")
     
-    print(f"\n总共找到 {len(unique_articles)} 篇独特文章")
+    scheduler.print_summary()
+    frontier.print_summary()
+    url_router.print_summary()
+    relevance_scorer.print_summary()
+    near_duplicate_index.print_summary()
+    feed_discovery.print_summary()
+    http_cache.print_summary()
+    rate_limiter.print_summary()
+    media_store.print_summary()
+    image_gate.print_summary()
+    selector_cache.print_summary()
+    if response_archive:
+        response_archive.print_summary()
+    metrics.print_summary()
+    metrics.save_summary(METRICS_SUMMARY_FILE)
     
     # 保存下载记录
     with open('download_report.json', 'w', encoding='utf-8') as f:
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+页面解析性能测试
+
+对本地保存的页面（HTTP缓存，或指定目录中的.html文件）分别使用原来的完整解析
+（response.text 解码后整棵树解析）和快速解析（直接解析字节，只保留标题、meta和<article>），
+比较每页的解析时间、内存峰值，并检查两种方式提取的标题、段落和图片是否一致。
+同时比较原来逐段序列化父节点的段落过滤和现在一次遍历的段落过滤（直播页面段落多时差别明显）；
+--live 使用 make_live_page() 生成的直播页面（所有帖子的段落在同一个容器中）只比较段落过滤。
+注意：响应头没有声明编码时，原来的 response.text 会按 ISO-8859-1 解码，非ASCII字符会乱码
+（如文章文件名中的"Â£"），直接解析字节时由页面中的 <meta charset> 决定编码。
+
+用法:
+    python benchmark_parsing.py [html目录]
+    python benchmark_parsing.py --live [帖子数...]   # 默认 100 300
+"""
+
+import atexit
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+from bs4 import BeautifulSoup
+from requests.structures import CaseInsensitiveDict
+
+import bbc_crawler
+from bbc_crawler import ExtractionError, declared_encoding, extract_paragraphs, find_article_body, parse_article
+from config import BBC_NEWS_URL
+from selector_cache import SelectorCache
+
+
+def load_pages(html_dir=None):
+    """读取测试页面，返回 [(url, 内容字节, 响应头)]"""
+    if html_dir:
+        pages = []
+        for filename in sorted(os.listdir(html_dir)):
+            if filename.endswith(('.html', '.htm')):
+                with open(os.path.join(html_dir, filename), 'rb') as f:
+                    pages.append((filename, f.read(), CaseInsensitiveDict({'Content-Type': 'text/html'})))
+        return pages
+
+    # 搜索结果页没有文章主体，不参与比较
+    return [
+        (url, body, headers)
+        for url, body, headers in bbc_crawler.http_cache.iter_pages()
+        if headers.get('Content-Type', '').startswith('text/html') and not url.startswith(BBC_NEWS_URL)
+    ]
+
+
+def legacy_parse(body, headers):
+    """原来的解析方式：按 requests 的规则解码成字符串后完整解析"""
+    encoding = requests.utils.get_encoding_from_headers(headers) or 'utf-8'
+    text = str(body, encoding, errors='replace')
+    return BeautifulSoup(text, 'lxml')
+
+
+def legacy_extract_paragraphs(article_body):
+    """原来的段落过滤：每个段落都把父节点整个序列化后查找 footer/caption"""
+    paragraphs = []
+    for p in article_body.select('p'):
+        if 'footer' in str(p.parent).lower() or 'caption' in str(p.parent).lower():
+            continue
+        text = p.get_text().strip()
+        if text:
+            paragraphs.append(text)
+    if not paragraphs:
+        text = article_body.get_text().strip()
+        if text:
+            paragraphs = [text]
+    return paragraphs
+
+
+def make_live_page(posts, seed=1):
+    """
+    生成直播页面：摘要中有带说明的图片，所有帖子的标题、时间和段落都在同一个容器中，
+    页面末尾有页脚链接。原来和现在的过滤结果应当相同
+    """
+    rng = random.Random(seed)
+    words = ['China', 'space', 'station', 'crew', 'launch', 'rocket', 'mission', 'Moon', 'orbit',
+             'astronauts', 'said', 'the', 'new', 'officials', 'experiment', 'module', 'today', 'after']
+
+    def sentence():
+        return ' '.join(rng.choice(words) for _ in range(rng.randint(12, 30))).capitalize() + '.'
+
+    parts = ['<html><head><meta charset="utf-8"><title>Live: China space mission - BBC News</title></head>',
+             '<body><article><h1>Live: China space mission</h1>',
+             '<div data-testid="summary"><figure><img src="https://ichef.bbci.co.uk/live/0.jpg">',
+             '<figcaption><p>Launch pad at Jiuquan</p></figcaption></figure><ul>']
+    parts.extend(f'<li><p>{sentence()}</p></li>' for _ in range(4))
+    parts.append('</ul></div><div data-testid="live-stream">')
+    for post in range(posts):
+        parts.append(f'<h3>Update {post + 1}</h3><time>{post // 60:02d}:{post % 60:02d}</time>')
+        parts.extend(f'<p>{sentence()}</p>' for _ in range(rng.randint(1, 4)))
+    parts.append('</div><div class="ssrcss-footer-Links"><p>More on this story</p></div></article></body></html>')
+    return ''.join(parts)
+
+
+def benchmark_live(sizes):
+    """比较生成的直播页面上两种段落过滤的耗时和结果"""
+    print(f"{'帖子数':>6}{'段落数':>8}{'逐段序列化父节点(秒)':>22}{'一次遍历标记容器(毫秒)':>24}  结果一致")
+    for posts in sizes:
+        article_body = BeautifulSoup(make_live_page(posts), 'lxml').find('article')
+        legacy_paragraphs, legacy_time, _ = measure(legacy_extract_paragraphs, article_body)
+        paragraphs, filter_time, _ = measure(extract_paragraphs, article_body)
+        print(f"{posts:>6}{len(paragraphs):>8}{legacy_time:>22.2f}{filter_time * 1000:>24.1f}  "
+              f"{'是' if legacy_paragraphs == paragraphs else '否'}")
+
+
+def measure(func, *args):
+    """返回 (结果, 耗时秒数, 内存峰值字节数)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def extract(url, soup_or_body, encoding=None):
+    """提取标题、段落和图片URL用于比较"""
+    try:
+        article = parse_article(url, "No Title", soup_or_body, encoding)
+    except ExtractionError:
+        return None
+    return article['title'], article['paragraphs'], [img['url'] for img in article['images']]
+
+
+def main():
+    if sys.argv[1:2] == ['--live']:
+        benchmark_live([int(size) for size in sys.argv[2:]] or [100, 300])
+        return
+
+    html_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    pages = load_pages(html_dir)
+    if not pages:
+        print("没有找到可用于测试的页面，请先运行爬虫生成HTTP缓存，或指定包含.html文件的目录")
+        return
+
+    # 测试中的选择器命中不写入统计文件
+    atexit.unregister(bbc_crawler.selector_cache.save)
+    bbc_crawler.selector_cache = SelectorCache(os.path.join(tempfile.mkdtemp(), 'selector_stats.json'))
+
+    # {解析方式: [总耗时, 内存峰值之和, 最大内存峰值]}
+    totals = {'legacy': [0.0, 0, 0], 'fast': [0.0, 0, 0]}
+    same = 0
+    # 段落过滤: [原来的总耗时, 现在的总耗时, 结果一致的页数, 参与比较的页数]
+    filter_totals = [0.0, 0.0, 0, 0]
+    for url, body, headers in pages:
+        encoding = declared_encoding(headers)
+
+        _, legacy_time, legacy_peak = measure(legacy_parse, body, headers)
+        _, fast_time, fast_peak = measure(bbc_crawler.parse_html, body, encoding, True)
+        for name, elapsed, peak in (('legacy', legacy_time, legacy_peak), ('fast', fast_time, fast_peak)):
+            totals[name][0] += elapsed
+            totals[name][1] += peak
+            totals[name][2] = max(totals[name][2], peak)
+
+        # 比较完整解析和快速解析的提取结果（使用相同的解码方式，只比较解析范围的影响）
+        bbc_crawler.FAST_PARSE = False
+        legacy_result = extract(url, body, encoding)
+        bbc_crawler.FAST_PARSE = True
+        fast_result = extract(url, body, encoding)
+        if legacy_result == fast_result:
+            same += 1
+        else:
+            print(f"提取结果不同: {url}")
+
+        article_body = find_article_body(bbc_crawler.parse_html(body, encoding), url)
+        if article_body:
+            legacy_paragraphs, legacy_time, _ = measure(legacy_extract_paragraphs, article_body)
+            paragraphs, filter_time, _ = measure(extract_paragraphs, article_body)
+            filter_totals[0] += legacy_time
+            filter_totals[1] += filter_time
+            filter_totals[3] += 1
+            if legacy_paragraphs == paragraphs:
+                filter_totals[2] += 1
+            else:
+                print(f"段落过滤结果不同: {url}")
+
+    count = len(pages)
+    print(f"\n共测试 {count} 个页面，提取结果一致 {same} 个")
+    print(f"{'解析方式':<10}{'平均耗时(毫秒/页)':>18}{'平均内存峰值(KB/页)':>18}{'最大内存峰值(KB)':>16}")
+    for name, label in (('legacy', '完整解析'), ('fast', '快速解析')):
+        total_time, total_peak, max_peak = totals[name]
+        print(f"{label:<10}{total_time / count * 1000:>18.2f}{total_peak / count / 1024:>18.1f}"
+              f"{max_peak / 1024:>16.1f}")
+    speedup = totals['legacy'][0] / totals['fast'][0] if totals['fast'][0] else 0
+    print(f"\n快速解析速度为完整解析的 {speedup:.2f} 倍")
+
+    legacy_time, filter_time, filter_same, filter_count = filter_totals
+    if filter_count:
+        print(f"\n段落过滤: 比较 {filter_count} 个页面，结果一致 {filter_same} 个")
+        print(f"  逐段序列化父节点: 平均 {legacy_time / filter_count * 1000:.2f} 毫秒/页")
+        print(f"  一次遍历标记容器: 平均 {filter_time / filter_count * 1000:.2f} 毫秒/页")
+
+
+if __name__ == "__main__":
+    main()
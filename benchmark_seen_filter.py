@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+已见URL集合性能测试
+
+比较三种判断URL是否见过的方式：Python集合、布隆过滤器、布隆过滤器+SQLite精确确认
+（爬取队列和媒体存储实际使用的方式），以及只查询SQLite。
+输出每百万URL占用的内存或磁盘空间、每秒查询次数和过滤器的实际误判率。
+
+用法:
+    python benchmark_seen_filter.py [URL数量]
+"""
+
+import os
+import random
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from seen_filter import BloomFilter
+
+# 每种查询测试的次数
+LOOKUPS = 200000
+
+
+def make_urls(count, seed):
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits
+    return [
+        f"https://www.bbc.com/news/articles/c{''.join(rng.choices(alphabet, k=10))}o"
+        for _ in range(count)
+    ]
+
+
+def lookups_per_second(check, keys):
+    start = time.perf_counter()
+    for key in keys:
+        check(key)
+    return len(keys) / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    scale = 1000000 / count
+    urls = make_urls(count, 1)
+    # 不在集合中的URL
+    misses = make_urls(LOOKUPS, 2)
+    hits = random.Random(3).sample(urls, min(LOOKUPS, count))
+    work_dir = tempfile.mkdtemp()
+    rows = []
+
+    # Python集合
+    tracemalloc.start()
+    url_set = set(make_urls(count, 1))
+    set_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rows.append(('Python集合（内存）', set_memory, lookups_per_second(url_set.__contains__, hits),
+                 lookups_per_second(url_set.__contains__, misses)))
+    del url_set
+
+    # 布隆过滤器
+    bloom = BloomFilter(os.path.join(work_dir, 'urls.bloom'), capacity=count)
+    for url in urls:
+        bloom.add(url)
+    rows.append(('布隆过滤器（mmap文件）', bloom.size_bytes(), lookups_per_second(bloom.__contains__, hits),
+                 lookups_per_second(bloom.__contains__, misses)))
+    false_positives = sum(1 for url in misses if url in bloom)
+
+    # SQLite精确记录
+    db_path = os.path.join(work_dir, 'urls.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE urls (url TEXT PRIMARY KEY)")
+    conn.executemany("INSERT INTO urls VALUES (?)", ((url,) for url in urls))
+    conn.commit()
+
+    def sqlite_contains(url):
+        return conn.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone() is not None
+
+    def filtered_contains(url):
+        return url in bloom and sqlite_contains(url)
+
+    db_size = os.path.getsize(db_path)
+    rows.append(('SQLite（磁盘）', db_size, lookups_per_second(sqlite_contains, hits),
+                 lookups_per_second(sqlite_contains, misses)))
+    rows.append(('布隆过滤器+SQLite确认', bloom.size_bytes() + db_size,
+                 lookups_per_second(filtered_contains, hits), lookups_per_second(filtered_contains, misses)))
+    conn.close()
+    bloom.close()
+
+    print(f"\n共 {count} 个URL，每种查询 {len(hits)} 次（命中）/ {len(misses)} 次（未命中）")
+    print(f"{'方式':<22}{'每百万URL占用(MB)':>18}{'命中查询(次/秒)':>18}{'未命中查询(次/秒)':>18}")
+    for name, size, hit_rate, miss_rate in rows:
+        print(f"{name:<22}{size * scale / 1024 / 1024:>18.1f}{hit_rate:>18,.0f}{miss_rate:>18,.0f}")
+    print(f"\n布隆过滤器实际误判率: {false_positives / len(misses):.4%}（误判的URL由SQLite确认）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文章分片性能测试
+
+把 articles/ 中的文章复制若干份（网址不同）作为测试语料，分别保存为单独的 .txt 文件
+和压缩分片，比较：
+  全量遍历：遍历目录、逐个打开并解析文件 / 按顺序解压分片中的所有块
+  按编号读取：打开并解析对应的文件 / 查询索引后解压一个块
+以及占用的磁盘空间和文件数量。
+
+用法:
+    python benchmark_shards.py [复制份数]
+"""
+
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from article_store import parse_article_file
+from config import ARTICLES_DIR
+from corpus_shards import CorpusShards, build_shards
+
+# 按编号读取测试的次数
+LOOKUPS = 2000
+
+
+def make_corpus(loose_dir, copies):
+    """复制文章文件，每份的网址加上不同的查询参数，返回 {编号: 文件路径}"""
+    sources = []
+    for filename in sorted(os.listdir(ARTICLES_DIR)):
+        if filename.endswith('.txt'):
+            with open(os.path.join(ARTICLES_DIR, filename), 'r', encoding='utf-8') as f:
+                sources.append((filename[:-4], f.read()))
+    os.makedirs(loose_dir)
+    for copy in range(copies):
+        for name, content in sources:
+            content = re.sub(r'^网址: (.*)$', lambda m: f"网址: {m.group(1)}?copy={copy}", content,
+                             count=1, flags=re.MULTILINE)
+            with open(os.path.join(loose_dir, f"{name} ({copy}).txt"), 'w', encoding='utf-8') as f:
+                f.write(content)
+    paths = {}
+    for entry in os.scandir(loose_dir):
+        record = parse_article_file(entry.path)
+        if record['id']:
+            paths.setdefault(record['id'], entry.path)
+    return paths
+
+
+def disk_usage(directory):
+    """目录中文件实际占用的磁盘空间（按块计算）和文件数量"""
+    total, count = 0, 0
+    for entry in os.scandir(directory):
+        total += entry.stat().st_blocks * 512
+        count += 1
+    return total, count
+
+
+def scan_loose(loose_dir):
+    count = 0
+    for entry in os.scandir(loose_dir):
+        if entry.name.endswith('.txt'):
+            parse_article_file(entry.path)
+            count += 1
+    return count
+
+
+def scan_shards(shards):
+    return sum(1 for _ in shards.scan())
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    work_dir = tempfile.mkdtemp()
+    loose_dir = os.path.join(work_dir, 'articles')
+    shard_dir = os.path.join(work_dir, 'shards')
+    try:
+        paths = make_corpus(loose_dir, copies)
+        writer, build_seconds = timed(build_shards, (parse_article_file(path) for path in paths.values()), shard_dir)
+        writer.print_summary()
+        shards = CorpusShards(shard_dir)
+
+        loose_count, loose_scan = timed(scan_loose, loose_dir)
+        shard_count, shard_scan = timed(scan_shards, shards)
+
+        sample = random.Random(1).choices(list(paths), k=LOOKUPS)
+        _, loose_lookup = timed(lambda: [parse_article_file(paths[article_id]) for article_id in sample])
+        # 新打开分片，不使用遍历时留下的块缓存
+        shards.close()
+        shards = CorpusShards(shard_dir)
+        _, shard_lookup = timed(lambda: [shards.get(article_id) for article_id in sample])
+        shards.close()
+
+        loose_size, loose_files = disk_usage(loose_dir)
+        shard_size, shard_files = disk_usage(shard_dir)
+
+        print(f"\n共 {loose_count} 篇文章（{copies} 份），转换为分片用时 {build_seconds:.2f} 秒，"
+              f"按编号读取 {LOOKUPS} 次")
+        print(f"{'方式':<12}{'文件数':>8}{'磁盘(MB)':>10}{'全量遍历(篇/秒)':>18}{'按编号读取(次/秒)':>20}")
+        print(f"{'单独文件':<12}{loose_files:>8}{loose_size / 1024 / 1024:>10.1f}"
+              f"{loose_count / loose_scan:>18,.0f}{LOOKUPS / loose_lookup:>20,.0f}")
+        print(f"{'压缩分片':<12}{shard_files:>8}{shard_size / 1024 / 1024:>10.1f}"
+              f"{shard_count / shard_scan:>18,.0f}{LOOKUPS / shard_lookup:>20,.0f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
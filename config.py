@@ -24,10 +24,131 @@ SEARCH_KEYWORDS = [
 
 # 爬虫设置
 MAX_PAGES_PER_KEYWORD = 15  # 每个关键词最多爬取的页数
-TARGET_ARTICLE_COUNT = 200  # 目标文章数量
-REQUEST_DELAY = (1, 3)  # 请求间隔时间范围（秒）
-BATCH_PAUSE = 5  # 每批次处理后的暂停时间（秒）
-BATCH_SIZE = 10  # 每批次处理的文章数
+TARGET_ARTICLE_COUNT = 200  # 目标文章数量，本次运行成功提取的相关文章达到该数量后停止（crawl_scheduler.py）
+FRESHNESS_WEIGHT = 2.0  # 抓取顺序中发布时间的加分（刚发布的文章加该分数，与相关度分数相加）
+FRESHNESS_HALF_LIFE_DAYS = 365  # 发布时间加分的半衰期（天）
+
+# 文章发现方式：'search'（搜索结果页）、'feeds'（RSS和新闻站点地图）、'both'（两者都用）
+DISCOVERY_MODE = 'both'
+
+# RSS订阅和新闻站点地图（feed_discovery.py），只保留标题或摘要包含搜索关键词的条目
+FEED_URLS = [
+    'https://feeds.bbci.co.uk/news/science_and_environment/rss.xml',
+    'https://feeds.bbci.co.uk/news/world/asia/china/rss.xml',
+    'https://feeds.bbci.co.uk/news/technology/rss.xml',
+    'https://www.bbc.co.uk/sitemaps/https-index-uk-news.xml',
+]
+FEED_STATE_FILE = 'feed_state.json'  # 记录每个订阅已处理到的时间，下次只处理更新的条目
+
+# 相关度预评分设置（relevance.py），抓取前按搜索结果的标题、摘要和URL路径打分，低于阈值的文章不抓取
+RELEVANCE_THRESHOLD = 3.0  # 低于该分数的文章跳过
+RELEVANCE_PHRASE_WEIGHT = 2.0  # 完整出现某个搜索关键词（如 China space station）时额外加的分数
+RELEVANCE_TERM_WEIGHTS = {  # 单个词语的权重，搜索关键词中未列出的词按1计算，0表示不计分
+    'china': 1.0, 'chinese': 1.0, 'beijing': 1.0,
+    'space': 2.0, 'aerospace': 2.0, 'rocket': 2.0, 'rockets': 2.0, 'satellite': 2.0, 'satellites': 2.0,
+    'spacecraft': 2.0, 'lunar': 2.0, 'moon': 1.5, 'mars': 1.5, 'astronaut': 2.0, 'astronauts': 2.0,
+    'launch': 1.0, 'launches': 1.0,
+    'taikonaut': 3.0, 'taikonauts': 3.0, 'tiangong': 3.0, "chang'e": 3.0, 'tianwen': 3.0, 'shenzhou': 3.0,
+    'zhurong': 3.0, 'yutu': 3.0, 'jade rabbit': 3.0, 'long march': 3.0, 'cnsa': 3.0,
+    # 搜索关键词中过于常见的词
+    'program': 0, 'mission': 0.5, 'missions': 0.5, 'agency': 0, 'station': 0.5, 'exploration': 0.5,
+    'long': 0, 'march': 0,
+}
+RELEVANCE_FIELD_WEIGHTS = {'title': 1.0, 'snippet': 0.5, 'url': 1.0}  # 各字段得分的权重
+# 没有标题和摘要时（搜索结果页常见）按URL栏目估计的相关度（路径前缀 -> 分数，最长前缀优先），
+# 再加上URL路径中出现的关键词的得分；不在表中的栏目只有路径中的关键词达到阈值时才评分，
+# 否则（如 /news/articles/<编号>、/news/world-asia-china-<编号>）不评分，不跳过
+RELEVANCE_URL_SECTIONS = {
+    '/news/science-environment': 4.0, '/news/science_and_environment': 4.0, '/news/technology': 4.0,
+    '/1/hi/sci/tech/': 4.0,
+    '/sport/': 0.0, '/news/uk-northern-ireland': 0.0, '/news/uk-scotland': 0.0, '/news/uk-wales': 0.0,
+}
+
+# 近似重复文章检测（near_duplicates.py），提取正文后、下载图片前进行
+NEAR_DUPLICATE_ACTION = 'drop'  # 'drop'：不保存重复的文章；'flag'：保存正文（不下载图片视频）并在下载报告中标记
+NEAR_DUPLICATE_THRESHOLD = 0.8  # 正文片段的相似度（Jaccard）达到该值的文章视为近似重复
+NEAR_DUPLICATE_BANDS = 16  # MinHash签名（64个值）分成的段数，段数越多越容易找到相似度较低的候选
+NEAR_DUPLICATE_SHINGLE_SIZE = 3  # 计算MinHash时每个片段包含的连续词数
+
+# 请求限速设置（rate_limiter.py）
+RATE_LIMIT_PER_HOST = 1.0  # 每个主机的目标请求速率（次/秒）
+RATE_LIMIT_BURST = 3  # 令牌桶容量，允许的短时突发请求数
+HOST_RATE_LIMITS = {  # 单独设置速率的主机
+    'ichef.bbci.co.uk': 5.0,
+}
+RATE_LIMIT_MAX_RETRIES = 4  # 遇到429/503时的最大尝试次数
+RATE_LIMIT_MAX_BACKOFF = 120  # 单次退避的最长时间（秒）
+CIRCUIT_BREAKER_THRESHOLD = 5  # 连续失败多少次后熔断
+CIRCUIT_BREAKER_COOLDOWN = 300  # 熔断后的冷却时间（秒）
+
+# 并发抓取设置（async_crawler.py）
+MAX_CONCURRENT_FETCHES = 16  # 同时进行的最大请求数
+CONCURRENCY_PER_HOST = 4  # 每个主机同时进行的最大请求数
+SEARCH_PAGE_WINDOW = 3  # 每个关键词同时请求的搜索页数
+SEARCH_MAX_STALE_PAGES = 1  # 连续多少页没有新文章后停止搜索该关键词
+
+# 图片视频后台下载设置（media_pool.py）
+MEDIA_WORKERS = 8  # 下载线程数
+MEDIA_QUEUE_SIZE = 200  # 待下载队列的最大长度，队列满时解析线程等待
+MEDIA_MAX_CONNECTIONS = 8  # 下载会话中每个主机的最大连接数
+
+# 图片筛选设置（image_gate.py）
+IMAGE_MIN_WIDTH = 100  # 宽度小于该值的图片（图标、广告）不下载
+IMAGE_MIN_HEIGHT = 100  # 高度小于该值的图片不下载
+IMAGE_MIN_BYTES = 1024  # Content-Length 小于该字节数的图片（占位图）不下载
+IMAGE_HEADER_BYTES = 4096  # 读取多少字节的文件头来识别图片宽高
+IMAGE_MAX_WIDTH = 1024  # 从 srcset 中选择不超过该宽度的最大图片
+
+# 视频分段下载设置（ranged_download.py）
+VIDEO_CHUNK_SIZE = 1024 * 1024  # 每次读取的字节数
+VIDEO_SEGMENTS = 4  # 大文件分成几段并行下载
+VIDEO_PARALLEL_MIN_SIZE = 16 * 1024 * 1024  # 文件大于该字节数时才分段并行下载
+VIDEO_SEGMENT_RETRIES = 3  # 连接中断时每段从断点继续的最大次数
+
+# URL规范化和分类设置（url_router.py）
+CANONICAL_HOST = 'www.bbc.co.uk'  # bbc.com 和 bbc.co.uk 的各种写法统一为该主机
+# 不抓取的URL类型：live（直播）、video（视频页）、audio（音频节目）、index（栏目首页）、external（非BBC网站）
+# 其他类型：article（文章）、other（其他BBC页面，如 bitesize、blogs）
+SKIPPED_URL_TYPES = ['live', 'video', 'audio', 'index', 'external']
+
+# 爬取队列设置（crawl_frontier.py）
+FRONTIER_DB = 'crawl_frontier.db'  # 记录URL状态的SQLite文件
+FRONTIER_MAX_ATTEMPTS = 3  # 文章失败超过该次数后不再重试
+
+# 已见URL布隆过滤器设置（seen_filter.py）
+SEEN_FILTER_CAPACITY = 1000000  # 预计的URL数量，实际数量超过一半时下次启动自动扩容重建
+SEEN_FILTER_ERROR_RATE = 0.001  # 误判率（误判时再查询数据库确认，不影响结果）
+
+# HTTP缓存设置（http_cache.py）
+HTTP_CACHE_DIR = 'http_cache'  # 缓存页面的目录
+HTTP_CACHE_MAX_AGE = 3600  # 缓存在该时间内（秒）直接使用，超过后发送条件请求验证；0表示每次都验证
+
+# 原始响应存档设置（response_archive.py）
+ARCHIVE_RESPONSES = False  # 是否把抓取到的页面响应存档，之后可以离线重新提取
+ARCHIVE_DIR = 'archive'  # 存档文件和索引所在目录
+ARCHIVE_MAX_SIZE = 100 * 1024 * 1024  # 单个存档文件的最大字节数，超过后新建文件
+
+# 运行统计设置（metrics.py）
+METRICS_PORT = 9108  # 运行中在 http://127.0.0.1:端口/metrics 查看各阶段统计，0表示不启动
+METRICS_SUMMARY_FILE = 'metrics_summary.json'  # 运行结束时保存的统计汇总
+
+# 快速解析：只解析标题、meta标签和<article>部分，页面没有<article>时再完整解析
+FAST_PARSE = True
+
+# 选择器命中统计文件（selector_cache.py）
+SELECTOR_STATS_FILE = 'selector_stats.json'
+
+# 结构化的文章存储（article_store.py），与 articles/*.txt 同时写入，分析脚本从这里读取
+ARTICLE_STORE_FILE = 'articles.jsonl'
+ARTICLE_STORE_PARQUET = 'articles.parquet'  # python article_store.py --parquet 导出的文件
+# 分析脚本读取文章时的缓存（corpus_loader.py）：文章存储没有变化时不再读取，旧文章文件没有变化时不再解析
+CORPUS_CACHE_DB = 'corpus_cache.db'
+
+# 压缩的文章分片（corpus_shards.py），文章数量很多时代替 articles/ 中的单独文件
+SHARDS_DIR = 'shards'
+SHARD_BLOCK_SIZE = 16 * 1024  # 每个压缩块的大约字节数（压缩前），按编号读取时只解压一个块
+SHARD_MAX_SIZE = 256 * 1024 * 1024  # 单个分片文件的最大字节数，超过后新建文件
+SHARD_ZSTD_LEVEL = 9  # zstd压缩级别（未安装 zstandard 时使用zlib）
 
 # 文件夹设置
 ARTICLES_DIR = 'articles'
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分析脚本共用的文章读取（带缓存）
+
+文章内容以结构化的文章存储（article_store.py 的 ARTICLE_STORE_FILE）为准：按网址合并后的记录
+写入SQLite缓存，缓存按存储文件的 (大小, 修改时间) 判断是否有效，存储没有变化时直接从缓存读取，
+不再读取和合并JSONL。
+articles/ 中不在存储里的旧文章文件（爬虫改用文章存储之前保存的）才解析文本，解析结果按
+(路径, 修改时间, 文件大小) 缓存，文件没有变化时不再打开和解析；python article_store.py 可以把它们导入存储。
+iter_articles() 按文件名顺序逐篇返回 articles/ 中文章的 Article 记录，不会把所有文章同时放在内存中。
+
+词频分析、情感分析和数据库导入都从这里读取文章：
+    from corpus_loader import iter_articles
+    for article in iter_articles():
+        print(article.title, len(article.text))
+
+单独运行时更新缓存并显示统计：
+    python corpus_loader.py
+"""
+
+import json
+import os
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from article_store import ArticleStore, parse_article_file
+from config import ARTICLE_STORE_FILE, ARTICLES_DIR, CORPUS_CACHE_DB
+
+# Article 中来自文章存储（或旧文章文件解析结果）的字段
+RECORD_FIELDS = ['id', 'url', 'title', 'paragraphs', 'images', 'videos', 'published',
+                 'content_hash', 'filename']
+
+
+@dataclass
+class Article:
+    """一篇文章"""
+    id: Optional[str]
+    url: Optional[str]
+    title: Optional[str]
+    paragraphs: List[str]
+    filename: str
+    path: str
+    images: List[Dict] = field(default_factory=list)
+    videos: List[Dict] = field(default_factory=list)
+    published: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """正文（段落之间空一行）"""
+        return "\n\n".join(self.paragraphs)
+
+    @property
+    def name(self) -> str:
+        """文件名去掉扩展名"""
+        return os.path.splitext(self.filename)[0]
+
+    @property
+    def display_title(self) -> str:
+        """用于显示和匹配的标题：没有标题时使用文件名（去掉扩展名）"""
+        return self.title or self.name
+
+
+class CorpusLoader:
+    def __init__(self, articles_dir=ARTICLES_DIR, cache_path=CORPUS_CACHE_DB, store_path=ARTICLE_STORE_FILE):
+        self.articles_dir = articles_dir
+        self.store_path = store_path
+        self.conn = sqlite3.connect(cache_path)
+        # 本次是否因为文章存储有变化而重新读取了存储
+        self.store_reloaded = False
+        self.stats = {'stored': 0, 'cached': 0, 'parsed': 0, 'failed': 0, 'removed': 0}
+        self.setup_database()
+
+    def setup_database(self):
+        """创建缓存表：文章存储的合并记录、存储文件的状态，以及旧文章文件的解析结果"""
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS store_cache (
+            filename TEXT PRIMARY KEY,
+            record TEXT NOT NULL
+        )
+        """)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS store_state (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL
+        )
+        """)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS parse_cache (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            record TEXT NOT NULL
+        )
+        """)
+        self.conn.commit()
+
+    def sync_store(self):
+        """
+        文章存储的大小或修改时间有变化时，重新读取合并后的记录写入缓存
+        返回存储中有记录的文件名集合
+        """
+        try:
+            stat = os.stat(self.store_path)
+            state = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            state = None
+        row = self.conn.execute("SELECT mtime_ns, size FROM store_state WHERE path = ?",
+                                (self.store_path,)).fetchone()
+        if (tuple(row) if row else None) != state:
+            self.conn.execute("DELETE FROM store_cache")
+            self.conn.execute("DELETE FROM store_state")
+            if state:
+                # 没有文件名或正文的记录（如只有更新行）对应不到文章文件
+                records = (record for record in ArticleStore(self.store_path).records(RECORD_FIELDS)
+                           if record['filename'] and record['paragraphs'] is not None)
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO store_cache (filename, record) VALUES (?, ?)",
+                    ((record['filename'], json.dumps(record, ensure_ascii=False)) for record in records)
+                )
+                self.conn.execute("INSERT INTO store_state (path, mtime_ns, size) VALUES (?, ?, ?)",
+                                  (self.store_path, *state))
+                self.store_reloaded = True
+            self.conn.commit()
+        return {filename for (filename,) in self.conn.execute("SELECT filename FROM store_cache")}
+
+    def stored(self, filename, path):
+        """文章存储中的记录，返回 Article"""
+        row = self.conn.execute("SELECT record FROM store_cache WHERE filename = ?", (filename,)).fetchone()
+        return Article(path=path, **json.loads(row[0]))
+
+    def parse(self, path):
+        """解析一个不在文章存储中的旧文章文件，返回 Article"""
+        record = parse_article_file(path)
+        return Article(path=path, **{column: record[column] for column in RECORD_FIELDS})
+
+    def iter_articles(self):
+        """
+        逐篇返回 articles/ 中的文章（按文件名排序）
+        文章存储中有记录的直接使用存储的内容，其余文件没有变化时使用解析缓存
+        """
+        if not os.path.isdir(self.articles_dir):
+            print(f"文件夹不存在: {self.articles_dir}")
+            return
+        stored = self.sync_store()
+        cached = {
+            path: (mtime_ns, size, record)
+            for path, mtime_ns, size, record in self.conn.execute(
+                "SELECT path, mtime_ns, size, record FROM parse_cache"
+            )
+        }
+        entries = sorted(
+            (entry for entry in os.scandir(self.articles_dir) if entry.name.endswith('.txt')),
+            key=lambda entry: entry.name
+        )
+        present = set()
+        try:
+            for entry in entries:
+                if entry.name in stored:
+                    self.stats['stored'] += 1
+                    yield self.stored(entry.name, entry.path)
+                    continue
+                stat = entry.stat()
+                present.add(entry.path)
+                row = cached.get(entry.path)
+                if row and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+                    self.stats['cached'] += 1
+                    yield Article(**json.loads(row[2]))
+                    continue
+                try:
+                    article = self.parse(entry.path)
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"读取文件失败 {entry.name}: {e}")
+                    self.stats['failed'] += 1
+                    continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO parse_cache (path, mtime_ns, size, record) VALUES (?, ?, ?, ?)",
+                    (entry.path, stat.st_mtime_ns, stat.st_size, json.dumps(asdict(article), ensure_ascii=False))
+                )
+                self.stats['parsed'] += 1
+                yield article
+            # 已删除、改名或已导入文章存储的文件从解析缓存中删除（只在完整遍历后进行）
+            removed = [(path,) for path in cached if path not in present]
+            self.conn.executemany("DELETE FROM parse_cache WHERE path = ?", removed)
+            self.stats['removed'] += len(removed)
+        finally:
+            self.conn.commit()
+
+    def print_summary(self):
+        if not os.path.exists(self.store_path):
+            source = "存储文件不存在"
+        else:
+            source = "存储有变化，已重新读取" if self.store_reloaded else "使用缓存"
+        print(f"文章读取: 来自文章存储 {self.stats['stored']} 篇（{source}），"
+              f"旧文章文件使用缓存 {self.stats['cached']} 篇，解析 {self.stats['parsed']} 篇，"
+              f"失败 {self.stats['failed']} 篇，从解析缓存中删除 {self.stats['removed']} 篇")
+
+    def close(self):
+        self.conn.close()
+
+
+def iter_articles(articles_dir=ARTICLES_DIR, cache_path=CORPUS_CACHE_DB):
+    """逐篇返回文章，遍历结束后显示缓存统计"""
+    loader = CorpusLoader(articles_dir, cache_path)
+    try:
+        yield from loader.iter_articles()
+        loader.print_summary()
+    finally:
+        loader.close()
+
+
+def main():
+    loader = CorpusLoader()
+    count = sum(1 for _ in loader.iter_articles())
+    print(f"{loader.articles_dir}/ 中共 {count} 篇文章")
+    loader.print_summary()
+    loader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+压缩的文章分片（按文章编号随机读取）
+
+文章很多时每篇一个 .txt 文件会使目录遍历变慢、占用大量inode。这里把文章记录
+（与文章存储相同的字段，JSON，每篇一行）按顺序写入分片文件：每积累 SHARD_BLOCK_SIZE
+字节压缩成一个独立的块（zstd，未安装 zstandard 时用 zlib），分片文件达到
+SHARD_MAX_SIZE 后新建下一个文件。
+SQLite索引记录每个块的文件、偏移量和长度，以及每篇文章所在的块和块内序号，
+按编号读取一篇文章时只需解压它所在的一个块。
+
+用法:
+    python corpus_shards.py           # 把 articles/ 中的文章转换为 shards/ 中的分片（重新生成）
+    python corpus_shards.py 编号...    # 按编号读取文章并显示标题和网址
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import zlib
+from dataclasses import asdict
+
+from config import SHARD_BLOCK_SIZE, SHARD_MAX_SIZE, SHARD_ZSTD_LEVEL, SHARDS_DIR
+from url_router import url_id
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+INDEX_FILE = 'index.db'
+
+
+def compressor(codec):
+    """返回压缩函数"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=SHARD_ZSTD_LEVEL).compress
+    return lambda data: zlib.compress(data, 6)
+
+
+def decompressor(codec):
+    """返回解压函数"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("分片使用zstd压缩，需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress
+    return zlib.decompress
+
+
+def open_index(path):
+    """打开（或创建）分片索引"""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS shards (
+        shard INTEGER PRIMARY KEY,
+        filename TEXT NOT NULL,
+        codec TEXT NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS blocks (
+        block INTEGER PRIMARY KEY,
+        shard INTEGER NOT NULL,
+        offset INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        count INTEGER NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS articles (
+        id TEXT PRIMARY KEY,
+        url TEXT,
+        title TEXT,
+        block INTEGER NOT NULL,
+        item INTEGER NOT NULL
+    )
+    """)
+    return conn
+
+
+class ShardWriter:
+    def __init__(self, shard_dir, codec=None, block_size=SHARD_BLOCK_SIZE, max_size=SHARD_MAX_SIZE):
+        self.shard_dir = shard_dir
+        self.codec = codec or ('zstd' if zstandard else 'zlib')
+        self.compress = compressor(self.codec)
+        self.block_size = block_size
+        self.max_size = max_size
+        os.makedirs(shard_dir, exist_ok=True)
+        self.conn = open_index(os.path.join(shard_dir, INDEX_FILE))
+        self.file = None
+        self.shard = -1
+        self.block = 0
+        # 当前块中尚未写入的记录 [(编号, 网址, 标题, JSON行)]
+        self.pending = []
+        self.pending_size = 0
+        self.stats = {'articles': 0, 'duplicates': 0, 'blocks': 0, 'shards': 0, 'raw_bytes': 0, 'bytes': 0}
+
+    def _open_next(self):
+        """新建下一个分片文件"""
+        if self.file:
+            self.file.close()
+        self.shard += 1
+        filename = f"corpus-{self.shard:05d}.shard"
+        self.file = open(os.path.join(self.shard_dir, filename), 'wb')
+        self.conn.execute("INSERT INTO shards (shard, filename, codec) VALUES (?, ?, ?)",
+                          (self.shard, filename, self.codec))
+        self.stats['shards'] += 1
+
+    def _flush_block(self):
+        """压缩当前块并写入分片文件"""
+        if not self.pending:
+            return
+        if self.file is None or self.file.tell() >= self.max_size:
+            self._open_next()
+        raw = b''.join(line for _, _, _, line in self.pending)
+        data = self.compress(raw)
+        offset = self.file.tell()
+        self.file.write(data)
+        self.conn.execute("INSERT INTO blocks (block, shard, offset, length, count) VALUES (?, ?, ?, ?, ?)",
+                          (self.block, self.shard, offset, len(data), len(self.pending)))
+        self.conn.executemany(
+            "INSERT INTO articles (id, url, title, block, item) VALUES (?, ?, ?, ?, ?)",
+            ((article_id, url, title, self.block, item)
+             for item, (article_id, url, title, _) in enumerate(self.pending))
+        )
+        self.stats['blocks'] += 1
+        self.stats['raw_bytes'] += len(raw)
+        self.stats['bytes'] += len(data)
+        self.block += 1
+        self.pending = []
+        self.pending_size = 0
+
+    def add(self, record):
+        """写入一篇文章记录（需要包含 id），编号重复时跳过"""
+        if self.conn.execute("SELECT 1 FROM articles WHERE id = ?", (record['id'],)).fetchone() or \
+                any(record['id'] == pending[0] for pending in self.pending):
+            self.stats['duplicates'] += 1
+            return False
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        self.pending.append((record['id'], record.get('url'), record.get('title'), line))
+        self.pending_size += len(line)
+        self.stats['articles'] += 1
+        if self.pending_size >= self.block_size:
+            self._flush_block()
+        return True
+
+    def close(self):
+        self._flush_block()
+        if self.file:
+            self.file.close()
+            self.file = None
+        self.conn.commit()
+        self.conn.close()
+
+    def print_summary(self):
+        ratio = self.stats['raw_bytes'] / self.stats['bytes'] if self.stats['bytes'] else 0
+        print(f"文章分片: 写入 {self.stats['articles']} 篇（跳过重复编号 {self.stats['duplicates']} 篇），"
+              f"{self.stats['blocks']} 个块，{self.stats['shards']} 个分片文件，"
+              f"{self.stats['raw_bytes'] / 1024 / 1024:.1f} MB 压缩为 {self.stats['bytes'] / 1024 / 1024:.1f} MB"
+              f"（{self.codec}，{ratio:.1f} 倍）")
+
+
+class CorpusShards:
+    def __init__(self, shard_dir=SHARDS_DIR):
+        self.shard_dir = shard_dir
+        index_path = os.path.join(shard_dir, INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"分片索引不存在: {index_path}（先运行 python corpus_shards.py）")
+        self.conn = open_index(index_path)
+        self.shards = {
+            shard: (filename, decompressor(codec))
+            for shard, filename, codec in self.conn.execute("SELECT shard, filename, codec FROM shards")
+        }
+        self.files = {}
+        # 最近解压的块，连续读取同一块中的文章时不重复解压
+        self.cached_block = None
+        self.cached_lines = None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def _file(self, shard):
+        if shard not in self.files:
+            self.files[shard] = open(os.path.join(self.shard_dir, self.shards[shard][0]), 'rb')
+        return self.files[shard]
+
+    def _read_block(self, block, shard, offset, length):
+        """读取并解压一个块，返回其中的JSON行"""
+        if block != self.cached_block:
+            f = self._file(shard)
+            f.seek(offset)
+            self.cached_lines = self.shards[shard][1](f.read(length)).splitlines()
+            self.cached_block = block
+        return self.cached_lines
+
+    def get(self, article_id):
+        """按编号读取一篇文章，不存在时返回None"""
+        row = self.conn.execute("""
+        SELECT blocks.block, shard, offset, length, item FROM articles
+        JOIN blocks ON blocks.block = articles.block WHERE id = ?
+        """, (article_id,)).fetchone()
+        if row is None:
+            return None
+        block, shard, offset, length, item = row
+        return json.loads(self._read_block(block, shard, offset, length)[item])
+
+    def find_url(self, url):
+        """按网址读取一篇文章"""
+        return self.get(url_id(url))
+
+    def ids(self):
+        """所有文章的 (编号, 网址, 标题)，只读取索引"""
+        return self.conn.execute("SELECT id, url, title FROM articles ORDER BY block, item").fetchall()
+
+    def scan(self):
+        """按写入顺序逐篇返回所有文章"""
+        for block, shard, offset, length in self.conn.execute(
+                "SELECT block, shard, offset, length FROM blocks ORDER BY block").fetchall():
+            for line in self._read_block(block, shard, offset, length):
+                yield json.loads(line)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+        self.conn.close()
+
+
+def build_shards(records, shard_dir=SHARDS_DIR, codec=None):
+    """
+    把文章记录写入新的分片目录（先写入临时目录，完成后替换原目录）
+    没有编号的记录按网址或文件名生成编号
+    """
+    tmp_dir = shard_dir.rstrip('/\\') + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    writer = ShardWriter(tmp_dir, codec)
+    try:
+        for record in records:
+            if not record.get('id'):
+                record['id'] = url_id(record.get('url') or record['filename'])
+            writer.add(record)
+    finally:
+        writer.close()
+    if os.path.exists(shard_dir):
+        shutil.rmtree(shard_dir)
+    os.replace(tmp_dir, shard_dir)
+    return writer
+
+
+def main():
+    if len(sys.argv) > 1:
+        shards = CorpusShards()
+        for article_id in sys.argv[1:]:
+            article = shards.get(article_id)
+            if article:
+                print(f"{article_id}: {article['title']}\n    {article['url']}（{len(article['paragraphs'])} 段）")
+            else:
+                print(f"{article_id}: 不存在")
+        shards.close()
+        return
+
+    from corpus_loader import iter_articles
+    # 分片中的记录与文章存储的字段相同，不保存原文件路径
+    records = ({key: value for key, value in asdict(article).items() if key != 'path'}
+               for article in iter_articles())
+    writer = build_shards(records)
+    writer.print_summary()
+    print(f"分片已保存到 {SHARDS_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
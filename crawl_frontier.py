@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+持久化的爬取队列（SQLite）
+
+记录每个文章URL的状态：discovered（已发现）、fetched（已抓取）、
+extracted（已提取保存）、failed（失败）、skipped（不可能是文章的URL，不再抓取）。已下载的图片视频由 media_store 记录。
+爬虫中断或崩溃后重新运行时，已完成的文章和媒体不会重复下载。
+已提取的URL另外记录在布隆过滤器中，判断URL是否已提取时大多数新URL不需要查询数据库。
+"""
+
+import sqlite3
+import threading
+import time
+
+from config import FRONTIER_DB, FRONTIER_MAX_ATTEMPTS, SEEN_FILTER_CAPACITY
+from seen_filter import BloomFilter
+
+DISCOVERED = 'discovered'
+FETCHED = 'fetched'
+EXTRACTED = 'extracted'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class CrawlFrontier:
+    def __init__(self, path=FRONTIER_DB):
+        self.path = path
+        # 页面抓取线程和媒体下载线程共用同一个连接，用锁保证串行访问
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.setup_database()
+        self.extracted_filter = self.open_filter()
+
+    def setup_database(self):
+        """创建数据表"""
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                title TEXT,
+                keyword TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                filename TEXT,
+                error TEXT,
+                updated_at REAL
+            )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_state ON urls (state)")
+            self.conn.commit()
+
+    def open_filter(self):
+        """打开已提取URL的布隆过滤器，需要时从数据库重建"""
+        with self.lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM urls WHERE state = ?", (EXTRACTED,)).fetchone()[0]
+        extracted_filter = BloomFilter(self.path + '.extracted.bloom', max(SEEN_FILTER_CAPACITY, count * 2))
+        if extracted_filter.needs_rebuild and count:
+            with self.lock:
+                rows = self.conn.execute("SELECT url FROM urls WHERE state = ?", (EXTRACTED,))
+                for (url,) in rows:
+                    extracted_filter.add(url)
+            extracted_filter.flush()
+        return extracted_filter
+
+    def add_discovered(self, articles, keyword=None):
+        """
+        记录搜索得到的文章，已存在的URL保持原状态
+        返回新发现的文章列表
+        """
+        new_articles = []
+        with self.lock:
+            for article in articles:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO urls (url, title, keyword, state, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (article['url'], article.get('title'), keyword, DISCOVERED, time.time())
+                )
+                if cursor.rowcount:
+                    new_articles.append(article)
+            self.conn.commit()
+        return new_articles
+
+    def mark(self, url, state, filename=None, error=None):
+        """更新文章状态，不存在的URL会被新建"""
+        # 失败次数只在失败时累加
+        attempts = 1 if state == FAILED else 0
+        with self.lock:
+            self.conn.execute("""
+            INSERT INTO urls (url, state, attempts, filename, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                state = excluded.state,
+                attempts = urls.attempts + excluded.attempts,
+                filename = COALESCE(excluded.filename, urls.filename),
+                error = excluded.error,
+                updated_at = excluded.updated_at
+            """, (url, state, attempts, filename, error, time.time()))
+            self.conn.commit()
+        if state == EXTRACTED:
+            self.extracted_filter.add(url)
+
+    def mark_fetched(self, url):
+        self.mark(url, FETCHED)
+
+    def mark_extracted(self, url, filename):
+        self.mark(url, EXTRACTED, filename=filename)
+
+    def mark_failed(self, url, error):
+        self.mark(url, FAILED, error=str(error))
+
+    def mark_skipped(self, url, reason):
+        self.mark(url, SKIPPED, error=reason)
+
+    def is_extracted(self, url):
+        """文章是否已经成功提取保存"""
+        # 过滤器中没有的URL一定没有提取过
+        if url not in self.extracted_filter:
+            return False
+        with self.lock:
+            row = self.conn.execute("SELECT state FROM urls WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] == EXTRACTED
+
+    def pending(self, max_attempts=FRONTIER_MAX_ATTEMPTS):
+        """
+        待处理的文章：已发现但未完成的，以及失败次数未达上限的
+        fetched 状态表示上次抓取后未能完成提取（如程序中断），需要重新处理
+        """
+        with self.lock:
+            rows = self.conn.execute("""
+            SELECT url, title FROM urls
+            WHERE state NOT IN (?, ?) AND attempts < ?
+            ORDER BY rowid
+            """, (EXTRACTED, SKIPPED, max_attempts)).fetchall()
+        return [{'url': url, 'title': title or "No Title"} for url, title in rows]
+
+    def titles(self):
+        """所有已知文章的 {url: 搜索结果中的标题}"""
+        with self.lock:
+            rows = self.conn.execute("SELECT url, title FROM urls").fetchall()
+        return {url: title or "No Title" for url, title in rows}
+
+    def counts(self):
+        """各状态的文章数量"""
+        with self.lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall()
+        return dict(rows)
+
+    def print_summary(self):
+        counts = self.counts()
+        print(f"爬取队列: 已发现 {sum(counts.values())} 篇，"
+              f"已提取 {counts.get(EXTRACTED, 0)} 篇，"
+              f"失败 {counts.get(FAILED, 0)} 篇，"
+              f"跳过 {counts.get(SKIPPED, 0)} 个，"
+              f"待处理 {counts.get(DISCOVERED, 0) + counts.get(FETCHED, 0)} 篇，"
+              f"过滤器省去 {self.extracted_filter.stats['negatives']} 次数据库查询")
+
+    def close(self):
+        self.extracted_filter.close()
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按相关度和发布时间排序的抓取调度
+
+待抓取的文章放在优先队列（heapq）中，相关度高、发布时间近的文章先抓取；
+成功提取且与主题相关的文章达到目标数量（TARGET_ARTICLE_COUNT）后立即停止，
+剩余的文章和尚未搜索的关键词留在爬取队列中，下次运行再处理。
+"""
+
+import heapq
+import itertools
+from datetime import datetime, timezone
+
+from config import FRESHNESS_HALF_LIFE_DAYS, FRESHNESS_WEIGHT, TARGET_ARTICLE_COUNT
+
+
+def parse_published(value):
+    """解析文章字典中的发布时间（ISO格式），没有或无法解析时返回None"""
+    if not value:
+        return None
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date
+
+
+class CrawlScheduler:
+    def __init__(self, scorer, target=TARGET_ARTICLE_COUNT,
+                 freshness_weight=FRESHNESS_WEIGHT, half_life_days=FRESHNESS_HALF_LIFE_DAYS):
+        self.scorer = scorer
+        self.target = target
+        self.freshness_weight = freshness_weight
+        self.half_life_days = half_life_days
+        self.heap = []
+        # 相同优先级时按加入顺序处理
+        self.counter = itertools.count()
+        self.seen_urls = set()
+        self.stats = {'queued': 0, 'dispatched': 0, 'on_topic': 0, 'off_topic': 0, 'failed': 0}
+
+    def priority(self, article):
+        """
+        相关度加上发布时间的加分（每经过半衰期减半），数值越大越先抓取
+        没有标题摘要的文章按阈值计算相关度
+        """
+        score = self.scorer.score(article)
+        if score is None:
+            score = self.scorer.threshold
+        published = parse_published(article.get('published'))
+        if published:
+            age_days = max((datetime.now(timezone.utc) - published).total_seconds() / 86400, 0)
+            score += self.freshness_weight * 0.5 ** (age_days / self.half_life_days)
+        return score
+
+    def sort_key(self, article):
+        """优先队列中的排序键（heapq 取最小值）"""
+        return -self.priority(article), next(self.counter)
+
+    def add(self, articles):
+        """加入待抓取的文章，已加入过的URL忽略，返回新加入的数量"""
+        added = 0
+        for article in articles:
+            if article['url'] in self.seen_urls:
+                continue
+            self.seen_urls.add(article['url'])
+            heapq.heappush(self.heap, (*self.sort_key(article), article))
+            added += 1
+        self.stats['queued'] += added
+        return added
+
+    def pop(self):
+        """取出优先级最高的文章"""
+        self.stats['dispatched'] += 1
+        return heapq.heappop(self.heap)[-1]
+
+    def __len__(self):
+        return len(self.heap)
+
+    def record(self, url, result):
+        """
+        记录一篇文章的处理结果，返回是否计入目标数量
+        按提取到的标题重新评分，无法判断（没有标题）时视为相关
+        """
+        if not result:
+            self.stats['failed'] += 1
+            return False
+        score = self.scorer.score({'url': url, 'title': result['title']})
+        if score is not None and score < self.scorer.threshold:
+            self.stats['off_topic'] += 1
+            return False
+        self.stats['on_topic'] += 1
+        return True
+
+    def remaining(self):
+        """距离目标还差的文章数量"""
+        return max(self.target - self.stats['on_topic'], 0)
+
+    def done(self):
+        """是否已达到目标数量"""
+        return self.stats['on_topic'] >= self.target
+
+    def print_summary(self):
+        print(f"抓取调度: 目标 {self.target} 篇，加入队列 {self.stats['queued']} 篇，"
+              f"已抓取 {self.stats['dispatched']} 篇（相关 {self.stats['on_topic']} 篇，"
+              f"不相关 {self.stats['off_topic']} 篇，失败 {self.stats['failed']} 篇），"
+              f"未抓取 {len(self.heap)} 篇" + ("，已达到目标" if self.done() else ""))
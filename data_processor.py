@@ -4,12 +4,14 @@
 数据处理脚本：将BBC报道和情感分析结果保存到MySQL数据库
 """
 
-import os
 import re
 import json
 import mysql.connector
 from datetime import datetime, date
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
+
+from corpus_loader import Article, iter_articles
+from crawl_scheduler import parse_published
 
 # 数据库配置
 DB_CONFIG = {
@@ -85,40 +87,11 @@ class DataProcessor:
         print(f"[OK] 解析情感分析结果: {len(sentiment_data)} 条记录")
         return sentiment_data
 
-    def read_article_files(self) -> List[Dict]:
+    def read_article_files(self) -> Iterator[Article]:
         """
-        读取articles文件夹中的文章文件
+        逐篇读取articles文件夹中的文章（内容来自文章存储，没有变化时使用缓存）
         """
-        articles = []
-        articles_dir = 'articles'
-
-        if not os.path.exists(articles_dir):
-            print(f"[ERROR] 文件夹不存在: {articles_dir}")
-            return articles
-
-        for filename in os.listdir(articles_dir):
-            if filename.endswith('.txt'):
-                filepath = os.path.join(articles_dir, filename)
-
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-
-                    # 使用文件名作为标题（去掉扩展名）
-                    title = filename.replace('.txt', '')
-
-                    articles.append({
-                        'title': title,
-                        'content': content,
-                        'file_path': filepath,
-                        'type': 'text'
-                    })
-
-                except Exception as e:
-                    print(f"[ERROR] 读取文件失败 {filename}: {e}")
-
-        print(f"[OK] 读取文章文件: {len(articles)} 个文件")
-        return articles
+        return iter_articles()
 
     def extract_publish_date(self, title: str, content: str) -> Optional[date]:
         """
@@ -144,9 +117,9 @@ class DataProcessor:
         # 如果无法提取日期，使用默认日期
         return date(2024, 1, 1)
 
-    def save_corpus_data(self, articles: List[Dict]) -> List[int]:
+    def save_corpus_data(self, articles: Iterator[Article]) -> List[Tuple[str, Optional[int]]]:
         """
-        保存文章数据到corpus表
+        逐篇保存文章数据到corpus表，返回每篇文章的 (标题, corpus ID)，不保留正文
         """
         corpus_ids = []
 
@@ -156,29 +129,33 @@ class DataProcessor:
         """
 
         for article in articles:
+            # 与情感分析结果中的标题对应，没有标题时使用文件名（去掉扩展名）
+            title = article.display_title
+            content = article.text
+            published = parse_published(article.published)
             values = (
-                article['title'],
-                article['content'],
+                title,
+                content,
                 'uk',  # BBC属于英国媒体
                 'BBC',
-                article['type'],
-                article['file_path'],
-                self.extract_publish_date(article['title'], article['content'])
+                'text',
+                article.path,
+                published.date() if published else self.extract_publish_date(title, content)
             )
 
             try:
                 self.cursor.execute(sql, values)
-                corpus_id = self.cursor.lastrowid
-                corpus_ids.append(corpus_id)
+                corpus_ids.append((title, self.cursor.lastrowid))
             except mysql.connector.Error as e:
                 print(f"[ERROR] 保存corpus数据失败: {e}")
-                corpus_ids.append(None)
+                corpus_ids.append((title, None))
 
         self.conn.commit()
-        print(f"[OK] 保存corpus数据: {len([x for x in corpus_ids if x is not None])} 条记录")
+        print(f"[OK] 读取文章文件: {len(corpus_ids)} 个文件")
+        print(f"[OK] 保存corpus数据: {len([x for _, x in corpus_ids if x is not None])} 条记录")
         return corpus_ids
 
-    def save_sentiment_data(self, articles: List[Dict], corpus_ids: List[int], sentiment_data: Dict):
+    def save_sentiment_data(self, corpus_ids: List[Tuple[str, Optional[int]]], sentiment_data: Dict):
         """
         保存情感分析结果到sentiment_analysis表
         """
@@ -191,12 +168,10 @@ class DataProcessor:
 
         saved_count = 0
 
-        for i, article in enumerate(articles):
-            if corpus_ids[i] is None:
+        for title, corpus_id in corpus_ids:
+            if corpus_id is None:
                 continue
 
-            title = article['title']
-
             # 查找对应的情感分析结果
             sentiment_info = sentiment_data.get(title)
             if not sentiment_info:
@@ -208,7 +183,7 @@ class DataProcessor:
 
             if sentiment_info:
                 values = (
-                    corpus_ids[i],
+                    corpus_id,
                     sentiment_info['sentiment'],
                     sentiment_info['score'],
                     sentiment_info['confidence'],
@@ -280,25 +255,22 @@ class DataProcessor:
         print("=" * 50)
 
         try:
-            # 1. 读取文章文件
-            articles = self.read_article_files()
-            if not articles:
-                print("[ERROR] 没有找到文章文件")
-                return
-
-            # 2. 解析情感分析结果
+            # 1. 解析情感分析结果
             sentiment_data = self.parse_sentiment_results()
             if not sentiment_data:
                 print("[ERROR] 没有找到情感分析结果")
                 return
 
-            # 3. 保存corpus数据
-            corpus_ids = self.save_corpus_data(articles)
+            # 2. 逐篇读取文章文件并保存corpus数据
+            corpus_ids = self.save_corpus_data(self.read_article_files())
+            if not corpus_ids:
+                print("[ERROR] 没有找到文章文件")
+                return
 
-            # 4. 保存sentiment数据
-            self.save_sentiment_data(articles, corpus_ids, sentiment_data)
+            # 3. 保存sentiment数据
+            self.save_sentiment_data(corpus_ids, sentiment_data)
 
-            # 5. 生成统计数据
+            # 4. 生成统计数据
             self.generate_statistics()
 
             print("=" * 50)
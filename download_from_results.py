@@ -5,9 +5,24 @@ import os
 import json
 import sys
 from tqdm import tqdm
-import time
-from bbc_crawler import extract_article_content, session
-from config import BATCH_SIZE, BATCH_PAUSE, TARGET_ARTICLE_COUNT
+from bbc_crawler import (
+    extract_article_content,
+    frontier,
+    http_cache,
+    image_gate,
+    media_store,
+    near_duplicate_index,
+    rate_limiter,
+    relevance_scorer,
+    response_archive,
+    route_articles,
+    selector_cache,
+    url_router,
+)
+from crawl_scheduler import CrawlScheduler
+from media_pool import MediaDownloadPool
+from metrics import metrics
+from config import METRICS_PORT, METRICS_SUMMARY_FILE
 
 def load_search_results(filename='advanced_search_results.json'):
     """加载搜索结果"""
@@ -25,6 +40,7 @@ def main():
     """主函数"""
     print("从搜索结果下载BBC中国航天文章")
     print("-" * 35)
+    metrics.start_server(METRICS_PORT)
     
     # 确定结果文件名
     if len(sys.argv) > 1:
@@ -45,26 +61,51 @@ def main():
     
     print(f"已加载 {len(articles)} 篇文章的搜索结果")
     
-    # 限制文章数量
-    if len(articles) > TARGET_ARTICLE_COUNT:
-        print(f"限制下载数量为 {TARGET_ARTICLE_COUNT} 篇文章")
-        articles_to_process = articles[:TARGET_ARTICLE_COUNT]
-    else:
-        articles_to_process = articles
+    # 规范化URL，跳过直播、音频、视频等不可能提取出文章的页面
+    articles = route_articles(articles)
+    print(f"其中 {len(articles)} 篇需要抓取")
+    
+    # 记录到爬取队列，跳过之前已经下载完成的文章
+    frontier.add_discovered(articles)
+    articles = [article for article in articles if not frontier.is_extracted(article['url'])]
+    print(f"其中 {len(articles)} 篇尚未下载")
     
-    # 下载文章
+    # 按相关度排序，与主题相关的文章达到目标数量后停止
+    scheduler = CrawlScheduler(relevance_scorer)
+    scheduler.add(articles)
+    
+    # 下载文章，图片和视频由后台下载池处理
     successful_articles = []
+    media_pool = MediaDownloadPool()
+    
+    # 请求速度由共享会话上的限速器控制
+    with tqdm(total=len(scheduler), desc="下载文章") as progress:
+        while scheduler and not scheduler.done():
+            article = scheduler.pop()
+            result = extract_article_content(article['url'], article['title'], media_pool=media_pool)
+            if result:
+                successful_articles.append(result)
+            scheduler.record(article['url'], result)
+            progress.update(1)
     
-    for i, article in enumerate(tqdm(articles_to_process, desc="下载文章")):
-        result = extract_article_content(article['url'], article['title'])
-        if result:
-            successful_articles.append(result)
-            
-        # 每处理一批次文章休息
-        if (i + 1) % BATCH_SIZE == 0:
-            time.sleep(BATCH_PAUSE)
+    print("等待图片和视频下载完成...")
+    media_pool.close()
+    media_pool.print_summary()
+    scheduler.print_summary()
     
     print(f"\n成功下载 {len(successful_articles)} 篇文章")
+    http_cache.print_summary()
+    url_router.print_summary()
+    relevance_scorer.print_summary()
+    near_duplicate_index.print_summary()
+    rate_limiter.print_summary()
+    media_store.print_summary()
+    image_gate.print_summary()
+    selector_cache.print_summary()
+    if response_archive:
+        response_archive.print_summary()
+    metrics.print_summary()
+    metrics.save_summary(METRICS_SUMMARY_FILE)
     
     # 保存下载报告
     with open('download_report.json', 'w', encoding='utf-8') as f:
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基于RSS和新闻站点地图的增量发现
+
+代替（或补充）搜索结果页面：读取RSS/Atom订阅和XML新闻站点地图（包括站点地图索引），
+用 iterparse 逐条解析，处理完的节点立即释放，不构建整棵树。
+每个订阅地址记录已处理条目的最新时间（pubDate/lastmod），下次运行只处理更新的条目。
+标题或摘要包含搜索关键词（关键词中的每个词都出现）的条目作为文章交给下载流程。
+"""
+
+import email.utils
+import io
+import json
+import os
+from datetime import datetime, timezone
+
+from lxml import etree
+
+from config import FEED_STATE_FILE, SEARCH_KEYWORDS
+
+# 条目标签及其所在的父节点（按标签的本地名，不区分命名空间）
+ENTRY_TAGS = {'item': 'channel', 'entry': 'feed', 'url': 'urlset', 'sitemap': 'sitemapindex'}
+TEXT_FIELDS = ('title', 'description', 'summary', 'keywords')
+DATE_FIELDS = ('pubDate', 'published', 'updated', 'lastmod', 'publication_date')
+
+# 站点地图索引最多向下读取的层数
+MAX_SITEMAP_DEPTH = 2
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def parse_date(value):
+    """解析RSS（RFC 822）或站点地图（W3C/ISO 8601）的日期，返回UTC时间，无法解析时返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.astimezone(timezone.utc)
+
+
+def iter_entries(content):
+    """
+    逐条解析订阅或站点地图，返回 (类型, 字段字典)
+    类型为 'sitemap'（站点地图索引中的子站点地图）或 'entry'（文章条目）
+    """
+    for _, element in etree.iterparse(io.BytesIO(content), events=('end',), recover=True):
+        name = local_name(element.tag)
+        parent = element.getparent()
+        if name not in ENTRY_TAGS or parent is None or local_name(parent.tag) != ENTRY_TAGS[name]:
+            continue
+
+        fields = {}
+        for child in element.iter():
+            child_name = local_name(child.tag)
+            if child_name == 'link' and child.get('href'):
+                # Atom 的链接在 href 属性中
+                fields.setdefault('link', child.get('href'))
+            elif child is not element and child.text and child.text.strip():
+                fields.setdefault(child_name, child.text.strip())
+
+        # 释放已处理的节点
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+        yield ('sitemap' if name == 'sitemap' else 'entry'), fields
+
+
+def matches_keywords(text, keywords):
+    """关键词中的每个词都出现在文本中"""
+    text = text.lower()
+    return any(all(word in text for word in keyword.lower().split()) for keyword in keywords)
+
+
+class FeedDiscovery:
+    def __init__(self, state_file=FEED_STATE_FILE, keywords=SEARCH_KEYWORDS):
+        self.state_file = state_file
+        self.keywords = keywords
+        # {订阅地址: 已处理条目的最新时间（ISO格式）}
+        self.high_water = {}
+        self.stats = {'feeds': 0, 'entries': 0, 'old': 0, 'unmatched': 0, 'found': 0}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.high_water = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取订阅记录失败: {e}")
+
+    def save(self):
+        """保存各订阅的最新时间（先写临时文件再替换）"""
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.high_water, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def discover(self, feed_urls, fetch):
+        """
+        读取所有订阅，返回比上次更新且与关键词相关的文章 [{'url', 'title', 'published'}]
+        fetch 为请求函数（返回响应对象），如 bbc_crawler.fetch_page
+        """
+        articles = []
+        for feed_url in feed_urls:
+            mark = parse_date(self.high_water.get(feed_url))
+            try:
+                newest = self.read_feed(feed_url, fetch, mark, articles)
+            except Exception as e:
+                print(f"读取订阅失败: {feed_url}, 错误: {e}")
+                continue
+            if newest and (mark is None or newest > mark):
+                self.high_water[feed_url] = newest.isoformat()
+        self.save()
+        return articles
+
+    def read_feed(self, feed_url, fetch, mark, articles, depth=0):
+        """读取一个订阅或站点地图，新条目加入 articles，返回其中最新的时间"""
+        response = fetch(feed_url)
+        self.stats['feeds'] += 1
+        newest = None
+        for kind, fields in iter_entries(response.content):
+            date = next((parse_date(fields[name]) for name in DATE_FIELDS if name in fields), None)
+            if date and mark and date <= mark:
+                self.stats['old'] += 1
+                continue
+            if date and (newest is None or date > newest):
+                newest = date
+
+            if kind == 'sitemap':
+                # 站点地图索引：只读取上次之后更新过的子站点地图
+                if fields.get('loc') and depth < MAX_SITEMAP_DEPTH:
+                    try:
+                        child_newest = self.read_feed(fields['loc'], fetch, mark, articles, depth + 1)
+                    except Exception as e:
+                        print(f"读取站点地图失败: {fields['loc']}, 错误: {e}")
+                        continue
+                    if child_newest and (newest is None or child_newest > newest):
+                        newest = child_newest
+                continue
+
+            self.stats['entries'] += 1
+            url = fields.get('link') or fields.get('loc')
+            text = ' '.join(fields[name] for name in TEXT_FIELDS if name in fields)
+            if not url or not matches_keywords(text, self.keywords):
+                self.stats['unmatched'] += 1
+                continue
+            self.stats['found'] += 1
+            article = {'url': url, 'title': fields.get('title', "No Title")}
+            # RSS的 <description>、Atom的 <summary> 作为摘要参与相关度评分
+            snippet = fields.get('description') or fields.get('summary')
+            if snippet:
+                article['snippet'] = snippet
+            if date:
+                article['published'] = date.isoformat()
+            articles.append(article)
+        return newest
+
+    def print_summary(self):
+        print(f"订阅发现: 读取 {self.stats['feeds']} 个订阅，新条目 {self.stats['entries']} 条，"
+              f"跳过已处理 {self.stats['old']} 条，与关键词无关 {self.stats['unmatched']} 条，"
+              f"找到文章 {self.stats['found']} 篇")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HTTP条件请求缓存
+
+挂载在 requests 会话上的适配器：GET 请求的页面连同 ETag/Last-Modified 保存到本地，
+之后再次请求时带上 If-None-Match/If-Modified-Since，服务器返回304时直接使用本地内容。
+只缓存非流式请求的HTML/XML页面，图片视频等流式下载不经过缓存。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_AGE
+
+# 缓存的内容类型
+CACHEABLE_TYPES = ('text/html', 'application/xhtml+xml', 'text/xml', 'application/xml',
+                   'application/rss+xml', 'application/atom+xml')
+
+# 不随缓存内容保存的响应头（正文已解压，长度也可能变化）
+SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection',
+                   'set-cookie')
+
+
+class HttpCache:
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, max_age=HTTP_CACHE_MAX_AGE):
+        self.cache_dir = cache_dir
+        # 缓存在 max_age 秒内视为新鲜，直接使用而不发送请求
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + '.json', base + '.body'
+
+    def load(self, url):
+        """读取缓存记录，不存在返回None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        meta['body'] = body
+        return meta
+
+    def save(self, url, response):
+        """保存响应内容和验证头"""
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in SKIPPED_HEADERS}
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding,
+            'headers': headers,
+            'stored_at': time.time(),
+        }
+        # 先写临时文件再替换，避免并发读到不完整的内容
+        self._write(body_path, response.content, 'wb')
+        self._write(meta_path, json.dumps(meta, ensure_ascii=False), 'w')
+        self.count('stored')
+
+    def touch(self, url, entry, headers):
+        """304响应后更新缓存时间和验证头"""
+        meta_path, _ = self._paths(url)
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        meta['etag'] = headers.get('ETag') or meta.get('etag')
+        meta['last_modified'] = headers.get('Last-Modified') or meta.get('last_modified')
+        meta['stored_at'] = time.time()
+        self._write(meta_path, json.dumps(meta, ensure_ascii=False), 'w')
+
+    def _write(self, path, data, mode):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        if 'b' in mode:
+            with open(tmp_path, mode) as f:
+                f.write(data)
+        else:
+            with open(tmp_path, mode, encoding='utf-8') as f:
+                f.write(data)
+        os.replace(tmp_path, path)
+
+    def iter_entries(self):
+        """遍历缓存记录（不读取页面内容），返回 (url, 响应头)"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in sorted(files):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                yield meta['url'], CaseInsensitiveDict(meta['headers'])
+
+    def iter_pages(self):
+        """遍历缓存中的所有页面，返回 (url, 内容字节, 响应头) """
+        for url, _ in self.iter_entries():
+            entry = self.load(url)
+            if entry:
+                yield entry['url'], entry['body'], CaseInsensitiveDict(entry['headers'])
+
+    def is_fresh(self, entry):
+        return self.max_age > 0 and time.time() - entry['stored_at'] < self.max_age
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def print_summary(self):
+        print(f"HTTP缓存: 命中 {self.stats['hits']} 次，304重新验证 {self.stats['revalidated']} 次，"
+              f"未命中 {self.stats['misses']} 次，新保存 {self.stats['stored']} 个页面")
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """带条件请求缓存的适配器，其他参数与 HTTPAdapter 相同"""
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != 'GET' or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        url = request.url
+        entry = self.cache.load(url)
+        if entry:
+            if self.cache.is_fresh(entry):
+                self.cache.count('hits')
+                return self.build_cached_response(request, entry)
+
+            # 带上验证头，由服务器判断内容是否有变化
+            if entry.get('etag'):
+                request.headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, stream=stream, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.count('revalidated')
+            self.cache.touch(url, entry, response.headers)
+            response.close()
+            return self.build_cached_response(request, entry)
+
+        self.cache.count('misses')
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code == 200 and content_type.startswith(CACHEABLE_TYPES):
+            self.cache.save(url, response)
+        return response
+
+    def build_cached_response(self, request, entry):
+        """用缓存内容构造响应对象"""
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry.get('encoding')
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response._content = entry['body']
+        response._content_consumed = True
+        response.from_cache = True
+        return response
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+下载前的图片筛选
+
+根据 Content-Length 和图片文件头（PNG/JPEG/WebP/GIF）中的宽高判断图片是否太小，
+图标、占位图和小图片在读完文件头后就关闭连接，不下载完整内容。
+另外从 <img> 的 srcset 中选择不超过最大宽度的最大候选图片，避免下载过大的原图。
+"""
+
+import struct
+import threading
+
+from config import IMAGE_HEADER_BYTES, IMAGE_MAX_WIDTH, IMAGE_MIN_BYTES, IMAGE_MIN_HEIGHT, IMAGE_MIN_WIDTH
+
+# JPEG中表示图像帧开始（包含宽高）的标记，不包括 C4(DHT)、C8(JPG)、CC(DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_dimensions(data):
+    index = 2
+    while index + 9 <= len(data):
+        if data[index] != 0xFF:
+            return None
+        marker = data[index + 1]
+        if marker == 0xFF:
+            # 填充字节
+            index += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[index + 5:index + 9])
+            return width, height
+        if 0xD0 <= marker <= 0xD9 or marker == 0x01:
+            # 没有长度字段的标记
+            index += 2
+            continue
+        length = struct.unpack('>H', data[index + 2:index + 4])[0]
+        index += 2 + length
+    return None
+
+
+def _webp_dimensions(data):
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30 and data[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25 and data[20] == 0x2F:
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(data) >= 30:
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+def image_dimensions(data):
+    """从图片开头的字节中读取 (宽, 高)，无法识别或数据不够时返回None"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data.startswith(b'\xff\xd8'):
+        return _jpeg_dimensions(data)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _webp_dimensions(data)
+    return None
+
+
+def parse_srcset(srcset):
+    """解析 srcset，返回 [(url, 宽度)]，只保留带宽度描述（如 800w）的候选"""
+    candidates = []
+    for candidate in srcset.split(','):
+        parts = candidate.strip().split()
+        if len(parts) == 2 and parts[1].endswith('w') and parts[1][:-1].isdigit():
+            candidates.append((parts[0], int(parts[1][:-1])))
+    return candidates
+
+
+def choose_srcset(srcset, max_width=IMAGE_MAX_WIDTH):
+    """选择不超过最大宽度的最大候选；都超过时选最小的；没有可用候选时返回None"""
+    candidates = parse_srcset(srcset or '')
+    if not candidates:
+        return None
+    fitting = [candidate for candidate in candidates if candidate[1] <= max_width]
+    if fitting:
+        return max(fitting, key=lambda candidate: candidate[1])[0]
+    return min(candidates, key=lambda candidate: candidate[1])[0]
+
+
+class ImageGate:
+    def __init__(self, min_width=IMAGE_MIN_WIDTH, min_height=IMAGE_MIN_HEIGHT,
+                 min_bytes=IMAGE_MIN_BYTES, header_bytes=IMAGE_HEADER_BYTES):
+        self.min_width = min_width
+        self.min_height = min_height
+        self.min_bytes = min_bytes
+        # 读取多少字节用于识别宽高
+        self.header_bytes = header_bytes
+        self.lock = threading.Lock()
+        self.stats = {'checked': 0, 'skipped': 0, 'unknown': 0, 'bytes_avoided': 0}
+
+    def _count(self, name, value=1):
+        with self.lock:
+            self.stats[name] += value
+
+    def check_length(self, headers):
+        """按 Content-Length 判断，太小的图片返回False"""
+        length = headers.get('Content-Length')
+        if length and length.isdigit() and int(length) < self.min_bytes:
+            self._count('checked')
+            self._count('skipped')
+            return False
+        return True
+
+    def read_header(self, raw):
+        """从响应的原始数据流（response.raw）中读取 header_bytes 字节的文件头，数据不足时读取全部"""
+        head = b''
+        while len(head) < self.header_bytes:
+            data = raw.read(self.header_bytes - len(head), decode_content=True)
+            if not data:
+                break
+            head += data
+        return head
+
+    def check_header(self, data, headers):
+        """按文件头中的宽高判断，太小的图片返回False；无法识别宽高时放行"""
+        self._count('checked')
+        dimensions = image_dimensions(data)
+        if dimensions is None:
+            self._count('unknown')
+            return True
+        width, height = dimensions
+        if width < self.min_width or height < self.min_height:
+            self._count('skipped')
+            length = headers.get('Content-Length')
+            if length and length.isdigit():
+                self._count('bytes_avoided', max(int(length) - len(data), 0))
+            return False
+        return True
+
+    def print_summary(self):
+        print(f"图片筛选: 检查 {self.stats['checked']} 张，跳过过小图片 {self.stats['skipped']} 张，"
+              f"无法识别尺寸 {self.stats['unknown']} 张，"
+              f"少下载 {self.stats['bytes_avoided'] / 1024:.1f} KB")
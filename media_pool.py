@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+图片视频后台下载池
+
+extract_article_content 解析完正文后立即保存文章，图片和视频URL放入有界队列，
+由独立的下载线程（使用自己的连接池）处理。某篇文章的媒体全部下载完成后，
+重新写入该文章文件，补全图片列表和视频列表，然后才在抓取记录中标记为已提取；
+媒体未完成时程序中断，文章仍是待处理状态，下次运行会重新提交。
+"""
+
+import os
+import queue
+import threading
+import time
+
+import requests
+
+from bbc_crawler import (
+    download_image,
+    download_video,
+    frontier,
+    rate_limiter,
+    session,
+    write_article_file,
+)
+from metrics import InstrumentedAdapter
+from rate_limiter import RateLimitedAdapter, make_retry
+from config import (
+    ARTICLES_DIR,
+    IMAGES_DIR,
+    MEDIA_MAX_CONNECTIONS,
+    MEDIA_QUEUE_SIZE,
+    MEDIA_WORKERS,
+    VIDEOS_DIR,
+)
+
+
+class MediaAdapter(RateLimitedAdapter, InstrumentedAdapter):
+    """下载前按主机限速，实际发出的请求记录耗时"""
+
+
+class ArticleMedia:
+    """一篇文章待下载的媒体及其完成情况"""
+
+    def __init__(self, article_title, url, paragraphs, image_jobs, video_jobs, result, published=None):
+        self.article_title = article_title
+        self.url = url
+        self.paragraphs = paragraphs
+        self.published = published
+        self.images = [None] * len(image_jobs)
+        self.videos = [None] * len(video_jobs)
+        self.result = result
+        self.remaining = len(image_jobs) + len(video_jobs)
+
+
+class MediaDownloadPool:
+    def __init__(self, workers=MEDIA_WORKERS, queue_size=MEDIA_QUEUE_SIZE,
+                 max_connections=MEDIA_MAX_CONNECTIONS):
+        # 下载使用独立的会话和连接池，不占用页面抓取的连接；限速器与页面抓取共用
+        self.session = requests.Session()
+        self.session.headers.update(session.headers)
+        adapter = MediaAdapter(
+            limiter=rate_limiter,
+            pool_connections=max_connections,
+            pool_maxsize=max_connections,
+            max_retries=make_retry(3),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        # 写文章文件和修改统计数据时加锁
+        self.lock = threading.Lock()
+        self.stats = {
+            'queued': 0,
+            'downloaded': 0,
+            # 已下载过的URL（不发请求）和下载后发现内容重复的文件，不算作新下载
+            'store_hits': 0,
+            'dedup_hits': 0,
+            'failed': 0,
+            # 本次从网络读取的字节数
+            'bytes': 0,
+            'max_queue_depth': 0,
+        }
+        self.start_time = time.perf_counter()
+
+        self.workers = []
+        for _ in range(workers):
+            worker = threading.Thread(target=self._worker, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit_article(self, article_title, url, paragraphs, image_jobs, video_jobs, result, published=None):
+        """提交一篇文章的图片和视频，队列已满时等待"""
+        article = ArticleMedia(article_title, url, paragraphs, image_jobs, video_jobs, result, published)
+        if article.remaining == 0:
+            frontier.mark_extracted(url, result['filename'])
+            return
+
+        for index, job in enumerate(image_jobs):
+            self._put(('image', index, job, article))
+        for index, job in enumerate(video_jobs):
+            self._put(('video', index, job, article))
+
+    def _put(self, item):
+        self.queue.put(item)
+        with self.lock:
+            self.stats['queued'] += 1
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.queue.qsize())
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+            try:
+                self._download(*item)
+            except Exception as e:
+                print(f"媒体下载线程出错: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _download(self, kind, index, job, article):
+        info = {}
+        if kind == 'image':
+            filename = download_image(job['url'], IMAGES_DIR, http_session=self.session, info=info)
+        else:
+            filename = download_video(job['url'], VIDEOS_DIR, http_session=self.session, info=info)
+
+        with self.lock:
+            self.stats['bytes'] += info.get('bytes', 0)
+            if filename:
+                if info.get('source') == 'store':
+                    self.stats['store_hits'] += 1
+                elif info.get('source') == 'dedup':
+                    self.stats['dedup_hits'] += 1
+                else:
+                    self.stats['downloaded'] += 1
+                media = dict(job, filename=filename)
+                if kind == 'image':
+                    article.images[index] = media
+                else:
+                    article.videos[index] = media
+            else:
+                self.stats['failed'] += 1
+
+            article.remaining -= 1
+            if article.remaining == 0:
+                self._finish_article(article)
+
+    def _finish_article(self, article):
+        """媒体全部处理完后重写文章文件并标记为已提取（调用时已持有锁）"""
+        images = [img for img in article.images if img]
+        videos = [vid for vid in article.videos if vid]
+        if images or videos:
+            # 没有标题的文章可能已经使用编号作为标题，以result中的标题为准
+            article_path = os.path.join(ARTICLES_DIR, article.result['filename'])
+            write_article_file(article_path, article.result['title'], article.url,
+                               article.paragraphs, images, videos, article.published)
+            article.result['images'] = len(images)
+            article.result['videos'] = len(videos)
+        frontier.mark_extracted(article.url, article.result['filename'])
+
+    def queue_depth(self):
+        """当前等待下载的媒体数量"""
+        return self.queue.qsize()
+
+    def bytes_per_second(self):
+        """从下载池启动开始计算的平均下载速度（只计从网络读取的字节）"""
+        elapsed = time.perf_counter() - self.start_time
+        return self.stats['bytes'] / elapsed if elapsed > 0 else 0.0
+
+    def close(self):
+        """等待所有媒体下载完成并停止下载线程"""
+        self.queue.join()
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+
+    def print_summary(self):
+        print(f"媒体下载: 新下载 {self.stats['downloaded']} 个，已下载过 {self.stats['store_hits']} 个，"
+              f"内容重复 {self.stats['dedup_hits']} 个，失败或跳过 {self.stats['failed']} 个，"
+              f"从网络读取 {self.stats['bytes'] / 1024 / 1024:.1f} MB，"
+              f"平均 {self.bytes_per_second() / 1024:.1f} KB/秒，"
+              f"队列最大深度 {self.stats['max_queue_depth']}")
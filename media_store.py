@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按内容寻址的图片视频存储
+
+下载时边写文件边计算SHA-256，文件以内容哈希命名，相同内容只保留一份。
+同时记录 URL→哈希 的索引，已经下载过的URL不再请求。
+索引与爬取队列保存在同一个SQLite文件中，前面加一个布隆过滤器，新URL不需要查询数据库。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from config import FRONTIER_DB, SEEN_FILTER_CAPACITY
+from seen_filter import BloomFilter
+
+
+class MediaStore:
+    def __init__(self, path=FRONTIER_DB, read_only_filter=False):
+        """read_only_filter: 只查询不下载的进程以只读方式打开布隆过滤器，不重建"""
+        self.path = path
+        self.read_only_filter = read_only_filter
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.setup_database()
+        self.url_filter = self.open_filter()
+
+    def setup_database(self):
+        """创建数据表"""
+        with self.lock:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS media_blobs (
+                hash TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                refs INTEGER NOT NULL DEFAULT 1,
+                created_at REAL
+            )
+            """)
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS media_urls (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                updated_at REAL
+            )
+            """)
+            self.conn.commit()
+
+    def open_filter(self):
+        """打开已下载媒体URL的布隆过滤器，需要时从数据库重建"""
+        with self.lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM media_urls").fetchone()[0]
+        url_filter = BloomFilter(self.path + '.media.bloom', max(SEEN_FILTER_CAPACITY, count * 2),
+                                 read_only=self.read_only_filter)
+        if url_filter.needs_rebuild and count:
+            with self.lock:
+                for (url,) in self.conn.execute("SELECT url FROM media_urls"):
+                    url_filter.add(url)
+            url_filter.flush()
+        return url_filter
+
+    def lookup(self, url, media_dir):
+        """URL已下载且文件仍存在时返回文件名，否则返回None"""
+        # 过滤器中没有的URL一定没有下载过
+        if url not in self.url_filter:
+            return None
+        with self.lock:
+            row = self.conn.execute("""
+            SELECT b.filename FROM media_urls u JOIN media_blobs b ON u.hash = b.hash
+            WHERE u.url = ?
+            """, (url,)).fetchone()
+        if row and os.path.exists(os.path.join(media_dir, row[0])):
+            return row[0]
+        return None
+
+    def save_stream(self, url, chunks, media_dir, ext):
+        """
+        边写临时文件边计算哈希，内容已存在时丢弃临时文件
+        返回 (按内容命名的文件名, 是否为新内容)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(media_dir, f".{hashlib.md5(url.encode()).hexdigest()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        digest.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            return self.commit_file(url, tmp_path, media_dir, ext, digest.hexdigest(), size)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def save_file(self, url, file_path, media_dir, ext):
+        """把已下载完成的文件加入存储（文件会被移动或删除），返回 (文件名, 是否为新内容)"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        size = os.path.getsize(file_path)
+        try:
+            return self.commit_file(url, file_path, media_dir, ext, digest.hexdigest(), size)
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def commit_file(self, url, tmp_path, media_dir, ext, content_hash, size):
+        """按哈希保存文件并记录URL索引，返回 (文件名, 是否为新内容)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT filename FROM media_blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if row and os.path.exists(os.path.join(media_dir, row[0])):
+                # 内容已存在，只增加引用计数
+                filename = row[0]
+                new = False
+                self.conn.execute("UPDATE media_blobs SET refs = refs + 1 WHERE hash = ?", (content_hash,))
+            else:
+                filename = f"{content_hash}{ext}"
+                new = True
+                os.replace(tmp_path, os.path.join(media_dir, filename))
+                self.conn.execute("""
+                INSERT OR REPLACE INTO media_blobs (hash, filename, size, refs, created_at)
+                VALUES (?, ?, ?, 1, ?)
+                """, (content_hash, filename, size, time.time()))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO media_urls (url, hash, updated_at) VALUES (?, ?, ?)",
+                (url, content_hash, time.time())
+            )
+            self.conn.commit()
+        self.url_filter.add(url)
+        return filename, new
+
+    def dedup_stats(self):
+        """返回 (文件数, 重复下载次数, 节省的字节数)"""
+        with self.lock:
+            files, duplicates, saved = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(refs - 1), 0), COALESCE(SUM((refs - 1) * size), 0) "
+                "FROM media_blobs"
+            ).fetchone()
+        return files, duplicates, saved
+
+    def print_summary(self):
+        files, duplicates, saved = self.dedup_stats()
+        print(f"媒体存储: 共 {files} 个文件，重复内容 {duplicates} 次，"
+              f"去重节省 {saved / 1024 / 1024:.2f} MB，"
+              f"过滤器省去 {self.url_filter.stats['negatives']} 次数据库查询")
+
+    def close(self):
+        self.url_filter.close()
+        with self.lock:
+            self.conn.close()
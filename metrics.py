@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+爬虫各阶段的耗时、字节数和错误统计
+
+记录建立连接（DNS+TCP+TLS）、等待服务器响应、页面抓取、HTML解析、选择器查找、
+图片视频下载和文件写入的耗时直方图，以及各阶段的字节数和按类型分的错误数。
+运行中可以通过本地HTTP端口以Prometheus文本格式查看，运行结束时保存为JSON汇总。
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 直方图的桶上限（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_PREFIX = 'bbc_crawler'
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # 最后一个桶为 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """按桶内线性插值估计分位数"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, count in enumerate(self.counts):
+            upper = self.buckets[index] if index < len(self.buckets) else self.max
+            if count and seen + count >= target:
+                return min(lower + (upper - lower) * (target - seen) / count, self.max)
+            seen += count
+            lower = upper
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.bytes = {}
+        # {阶段: {错误类型: 次数}}
+        self.errors = {}
+        self.started_at = time.time()
+        self.server = None
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.histograms.setdefault(stage, Histogram()).observe(seconds)
+
+    def add_bytes(self, stage, size):
+        with self.lock:
+            self.bytes[stage] = self.bytes.get(stage, 0) + size
+
+    def count_error(self, stage, error_type):
+        with self.lock:
+            errors = self.errors.setdefault(stage, {})
+            errors[error_type] = errors.get(error_type, 0) + 1
+
+    @contextmanager
+    def timer(self, stage):
+        """记录代码块的耗时，出现异常时按异常类型计数后继续抛出"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.count_error(stage, type(e).__name__)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def render_prometheus(self):
+        """Prometheus文本格式"""
+        lines = [
+            f'# HELP {METRIC_PREFIX}_stage_seconds 各阶段耗时',
+            f'# TYPE {METRIC_PREFIX}_stage_seconds histogram',
+        ]
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            lines.append(f'# HELP {METRIC_PREFIX}_bytes_total 各阶段处理的字节数')
+            lines.append(f'# TYPE {METRIC_PREFIX}_bytes_total counter')
+            for stage, size in sorted(self.bytes.items()):
+                lines.append(f'{METRIC_PREFIX}_bytes_total{{stage="{stage}"}} {size}')
+
+            lines.append(f'# HELP {METRIC_PREFIX}_errors_total 各阶段按类型统计的错误数')
+            lines.append(f'# TYPE {METRIC_PREFIX}_errors_total counter')
+            for stage, errors in sorted(self.errors.items()):
+                for error_type, count in sorted(errors.items()):
+                    lines.append(f'{METRIC_PREFIX}_errors_total{{stage="{stage}",type="{error_type}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """各阶段的汇总数据（毫秒）"""
+        stages = {}
+        with self.lock:
+            names = set(self.histograms) | set(self.bytes) | set(self.errors)
+            for stage in sorted(names):
+                histogram = self.histograms.get(stage, Histogram())
+                stages[stage] = {
+                    'count': histogram.count,
+                    'total_seconds': round(histogram.sum, 3),
+                    'mean_ms': round(histogram.sum / histogram.count * 1000, 2) if histogram.count else 0,
+                    'p50_ms': round(histogram.quantile(0.5) * 1000, 2),
+                    'p95_ms': round(histogram.quantile(0.95) * 1000, 2),
+                    'p99_ms': round(histogram.quantile(0.99) * 1000, 2),
+                    'max_ms': round(histogram.max * 1000, 2),
+                    'bytes': self.bytes.get(stage, 0),
+                    'errors': dict(self.errors.get(stage, {})),
+                }
+        return {
+            'started_at': self.started_at,
+            'elapsed_seconds': round(time.time() - self.started_at, 2),
+            'stages': stages,
+        }
+
+    def save_summary(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    def print_summary(self):
+        print("各阶段耗时:")
+        for stage, data in self.summary()['stages'].items():
+            errors = sum(data['errors'].values())
+            print(f"  {stage}: {data['count']} 次，合计 {data['total_seconds']:.1f} 秒，"
+                  f"平均 {data['mean_ms']:.1f} 毫秒，p95 {data['p95_ms']:.1f} 毫秒"
+                  + (f"，{data['bytes'] / 1024 / 1024:.1f} MB" if data['bytes'] else "")
+                  + (f"，错误 {errors} 次" if errors else ""))
+
+    def start_server(self, port, host='127.0.0.1'):
+        """在后台线程中启动 /metrics 端口，port 为0时不启动"""
+        if not port or self.server:
+            return
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            print(f"启动统计端口失败: {e}")
+            return
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"运行统计: http://{host}:{port}/metrics")
+
+
+# 全局统计，各模块共用
+metrics = Metrics()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """记录建立连接（DNS解析和TCP连接）的耗时"""
+
+    def connect(self):
+        with metrics.timer('connect'):
+            super().connect()
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """记录建立连接（DNS解析、TCP连接和TLS握手）的耗时"""
+
+    def connect(self):
+        with metrics.timer('connect'):
+            super().connect()
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """记录建立连接的耗时，以及从发送请求到收到响应头的耗时（包含其中新建连接的时间）"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        with metrics.timer('http_wait'):
+            response = super().send(request, **kwargs)
+        if response.status_code >= 400:
+            metrics.count_error('http_wait', f"HTTP {response.status_code}")
+        return response
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+近似重复文章检测（MinHash + LSH）
+
+文章正文按连续几个词切分成片段，计算MinHash签名：片段的64位哈希按低位分到64个桶，
+每个桶取最小值（单次哈希的MinHash，每篇文章只需计算一次哈希）。两篇文章签名中相同的桶
+所占比例约等于片段集合的Jaccard相似度。
+签名再分成若干段（LSH），每段的哈希值与URL一起保存在SQLite中并建立索引，
+查询时只需一次索引查找就能得到可能相似的文章，十万篇文章时也在一毫秒以内；
+再用签名估计的相似度确认，达到阈值的文章视为近似重复（转载、改写、同一比赛的多篇报道）。
+数据保存在爬取队列的SQLite文件中。
+
+单独运行时为 articles/ 中已有的文章建立索引，并列出近似重复的文章：
+    python near_duplicates.py
+"""
+
+import hashlib
+import re
+import sqlite3
+import struct
+import threading
+import time
+
+from config import (
+    FRONTIER_DB,
+    NEAR_DUPLICATE_BANDS,
+    NEAR_DUPLICATE_SHINGLE_SIZE,
+    NEAR_DUPLICATE_THRESHOLD,
+)
+
+# 签名中的桶数（必须是2的幂）
+SIGNATURE_SIZE = 64
+BIN_BITS = SIGNATURE_SIZE.bit_length() - 1
+# 空桶借用右侧桶的值时，每隔一个桶加上的偏移，保证借来的值与原来的值不同
+EMPTY_BIN_OFFSET = 1 << (64 - BIN_BITS)
+SIGNATURE = struct.Struct(f'<{SIGNATURE_SIZE}Q')
+
+
+def shingles(paragraphs, size=NEAR_DUPLICATE_SHINGLE_SIZE):
+    """正文中连续 size 个词组成的片段（小写，去掉标点）"""
+    words = re.findall(r"\w+", ' '.join(paragraphs).lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(paragraphs):
+    """正文的MinHash签名（SIGNATURE_SIZE 个整数），没有内容时返回None"""
+    features = shingles(paragraphs)
+    if not features:
+        return None
+    bins = [None] * SIGNATURE_SIZE
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+        index = value & (SIGNATURE_SIZE - 1)
+        value >>= BIN_BITS
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    # 短文章会有空桶，用右侧（循环）第一个非空桶的值加上距离偏移填充
+    if None in bins:
+        filled = list(bins)
+        for index in range(SIGNATURE_SIZE):
+            distance = 1
+            while filled[index] is None:
+                neighbour = bins[(index + distance) % SIGNATURE_SIZE]
+                if neighbour is not None:
+                    filled[index] = neighbour + distance * EMPTY_BIN_OFFSET
+                distance += 1
+        bins = filled
+    return bins
+
+
+def similarity(signature, other):
+    """两个签名估计的Jaccard相似度"""
+    return sum(1 for a, b in zip(signature, other) if a == b) / SIGNATURE_SIZE
+
+
+def band_keys(signature, bands=NEAR_DUPLICATE_BANDS):
+    """签名分成 bands 段，每段的哈希值（SQLite有符号64位整数），开头包含段号"""
+    rows = SIGNATURE_SIZE // bands
+    keys = []
+    for band in range(bands):
+        data = struct.pack(f'<B{rows}Q', band, *signature[band * rows:(band + 1) * rows])
+        keys.append(int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+
+class NearDuplicateIndex:
+    def __init__(self, path=FRONTIER_DB, threshold=NEAR_DUPLICATE_THRESHOLD, bands=NEAR_DUPLICATE_BANDS):
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.stats = {'checked': 0, 'duplicates': 0, 'candidates': 0, 'lookup_seconds': 0.0}
+        self.setup_database()
+
+    def setup_database(self):
+        """创建数据表"""
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS article_signatures (
+                url TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                duplicate_of TEXT,
+                updated_at REAL
+            )
+            """)
+            # 只记录非重复文章的各段哈希
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS article_bands (
+                band INTEGER NOT NULL,
+                url TEXT NOT NULL
+            )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_article_bands ON article_bands (band)")
+            self.conn.commit()
+
+    def find(self, signature, keys, exclude_url=None):
+        """相似度达到阈值的已有文章中最相似的一篇，返回 (URL, 相似度)，没有时返回 (None, 0)"""
+        placeholders = ','.join('?' * len(keys))
+        candidates = self.conn.execute(
+            f"SELECT DISTINCT url FROM article_bands WHERE band IN ({placeholders})", keys
+        ).fetchall()
+        best_url, best_score = None, 0.0
+        for (url,) in candidates:
+            if url == exclude_url:
+                continue
+            self.stats['candidates'] += 1
+            row = self.conn.execute("SELECT signature FROM article_signatures WHERE url = ?", (url,)).fetchone()
+            score = similarity(signature, SIGNATURE.unpack(row[0]))
+            if score >= self.threshold and score > best_score:
+                best_url, best_score = url, score
+        return best_url, best_score
+
+    def check(self, url, paragraphs):
+        """
+        检查文章是否与已有文章近似重复，返回 (重复的已有文章URL, 相似度)；
+        不重复时加入索引并返回 (None, 0)。同一URL重新提取时不与自己比较
+        """
+        signature = minhash(paragraphs)
+        if signature is None:
+            return None, 0.0
+        keys = band_keys(signature, self.bands)
+        with self.lock:
+            start = time.perf_counter()
+            duplicate_of, score = self.find(signature, keys, exclude_url=url)
+            self.stats['lookup_seconds'] += time.perf_counter() - start
+            self.stats['checked'] += 1
+
+            self.conn.execute("DELETE FROM article_bands WHERE url = ?", (url,))
+            if duplicate_of:
+                self.stats['duplicates'] += 1
+            else:
+                self.conn.executemany("INSERT INTO article_bands (band, url) VALUES (?, ?)",
+                                      ((key, url) for key in keys))
+            self.conn.execute("""
+            INSERT INTO article_signatures (url, signature, duplicate_of, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                signature = excluded.signature,
+                duplicate_of = excluded.duplicate_of,
+                updated_at = excluded.updated_at
+            """, (url, SIGNATURE.pack(*signature), duplicate_of, time.time()))
+            self.conn.commit()
+        return duplicate_of, score
+
+    def duplicates(self):
+        """所有被判为重复的文章 {url: 重复的已有文章URL}"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url, duplicate_of FROM article_signatures WHERE duplicate_of IS NOT NULL"
+            ).fetchall()
+        return dict(rows)
+
+    def print_summary(self):
+        checked = self.stats['checked']
+        mean_us = self.stats['lookup_seconds'] / checked * 1e6 if checked else 0.0
+        print(f"近似重复检测: 检查 {checked} 篇，发现重复 {self.stats['duplicates']} 篇，"
+              f"比较候选文章 {self.stats['candidates']} 次，查询平均 {mean_us:.1f} 微秒")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def main():
+    """为已有文章建立索引，列出近似重复的文章（通过 corpus_loader 读取，文章没有变化时使用缓存）"""
+    from corpus_loader import iter_articles
+    index = NearDuplicateIndex()
+    for article in iter_articles():
+        url = article.url or article.path
+        duplicate_of, score = index.check(url, article.paragraphs)
+        if duplicate_of:
+            print(f"近似重复（相似度 {score:.0%}）: {article.filename}\n    {url}\n  ≈ {duplicate_of}")
+    index.print_summary()
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+离线重新提取文章
+
+不发送任何请求：从响应存档（archive/）和HTTP缓存中读取已抓取的文章页面，
+用与 extract_article_content 相同的解析逻辑在多个进程中并行提取，重新写入 articles/，
+并生成 offline_report.json。修改标题或正文选择器后可以用它代替重新爬取。
+图片和视频不重新下载，文章中只列出媒体存储中已有的文件。
+
+用法:
+    python offline_extract.py [进程数]
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tqdm import tqdm
+
+import bbc_crawler
+from bbc_crawler import (
+    ExtractionError,
+    absolute_media_url,
+    declared_encoding,
+    frontier,
+    http_cache,
+    name_untitled_article,
+    parse_article,
+    write_article_file,
+)
+from article_index import ArticleIndex, article_filename
+from config import ARCHIVE_DIR, ARTICLES_DIR, BBC_NEWS_URL, FRONTIER_DB, IMAGES_DIR, VIDEOS_DIR
+from media_store import MediaStore
+from response_archive import iter_index, read_record
+
+# 每个任务包含的页面数，减少进程间通信次数
+BATCH_SIZE = 50
+
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+
+def is_article_page(url, content_type):
+    """只处理文章页面，跳过搜索结果页和非HTML内容"""
+    return content_type.startswith(HTML_TYPES) and not url.startswith(BBC_NEWS_URL)
+
+
+def collect_pages():
+    """
+    收集可以离线提取的页面，返回 {url: 来源}
+    同一URL优先使用存档中最新的记录，存档中没有的再使用HTTP缓存
+    """
+    pages = {}
+    for url, headers in http_cache.iter_entries():
+        if is_article_page(url, headers.get('Content-Type', '')):
+            pages[url] = ('cache', url)
+    for entry in iter_index(ARCHIVE_DIR):
+        if entry['status'] == 200 and is_article_page(entry['url'], entry['content_type']):
+            pages[entry['url']] = ('archive', entry)
+    return pages
+
+
+def init_worker():
+    """
+    子进程初始化：使用自己的数据库连接，选择器统计不写回文件
+    子进程只查询媒体存储，布隆过滤器以只读方式打开（主进程仍持有该文件），不会同时重建
+    """
+    atexit.unregister(bbc_crawler.selector_cache.save)
+    bbc_crawler.media_store = MediaStore(FRONTIER_DB, read_only_filter=True)
+    bbc_crawler.article_index = ArticleIndex(FRONTIER_DB)
+
+
+def load_page(source):
+    """读取页面内容，返回 (内容字节, 响应头)"""
+    kind, value = source
+    if kind == 'archive':
+        _, _, headers, body = read_record(ARCHIVE_DIR, value)
+        return body, headers
+    entry = http_cache.load(value)
+    if entry is None:
+        raise ExtractionError("缓存记录已不存在")
+    return entry['body'], entry['headers']
+
+
+def stored_media(jobs, media_dir):
+    """只保留媒体存储中已有文件的图片或视频"""
+    media = []
+    for job in jobs:
+        filename = bbc_crawler.media_store.lookup(absolute_media_url(job['url']), media_dir)
+        if filename:
+            media.append(dict(job, filename=filename))
+    return media
+
+
+def extract_page(url, title, source):
+    """提取一个页面并写入文章文件，返回与 extract_article_content 相同格式的结果"""
+    body, headers = load_page(source)
+    article = parse_article(url, title, body, declared_encoding(headers))
+    images = stored_media(article['images'], IMAGES_DIR)
+    videos = stored_media(article['videos'], VIDEOS_DIR)
+
+    filename = article_filename(url)
+    write_article_file(os.path.join(ARTICLES_DIR, filename), article['title'], url,
+                       article['paragraphs'], images, videos, article['published'])
+    return {
+        'filename': filename,
+        'title': article['title'],
+        'images': len(images),
+        'videos': len(videos)
+    }
+
+
+def extract_batch(tasks):
+    """子进程中处理一批页面，返回 [(url, 结果, 错误信息)]"""
+    results = []
+    for url, title, source in tasks:
+        try:
+            results.append((url, extract_page(url, title, source), None))
+        except Exception as e:
+            results.append((url, None, str(e) or type(e).__name__))
+    return results
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    start_time = time.perf_counter()
+
+    pages = collect_pages()
+    if not pages:
+        print("没有找到可以离线提取的页面，请先开启 ARCHIVE_RESPONSES 爬取，或保留HTTP缓存")
+        return
+    titles = frontier.titles()
+    tasks = [(url, titles.get(url, "No Title"), source) for url, source in pages.items()]
+    batches = [tasks[i:i + BATCH_SIZE] for i in range(0, len(tasks), BATCH_SIZE)]
+    print(f"共 {len(tasks)} 个页面，使用 {workers} 个进程提取")
+
+    successful_articles = []
+    failed_articles = []
+    no_title_counter = 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        with tqdm(total=len(tasks), desc="离线提取") as progress:
+            for batch_results in executor.map(extract_batch, batches):
+                for url, result, error in batch_results:
+                    if result is None:
+                        failed_articles.append({'url': url, 'error': error})
+                        continue
+                    if not result['title']:
+                        name_untitled_article(url, result, no_title_counter)
+                        no_title_counter += 1
+                    frontier.mark_extracted(url, result['filename'])
+                    successful_articles.append(result)
+                progress.update(len(batch_results))
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\n离线提取完成: 成功 {len(successful_articles)} 篇，失败 {len(failed_articles)} 篇，"
+          f"用时 {elapsed:.1f} 秒（{len(tasks) / elapsed:.1f} 页/秒）")
+    frontier.print_summary()
+
+    # 保存提取报告
+    with open('offline_report.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_articles': len(successful_articles),
+            'failed_articles': failed_articles,
+            'elapsed_seconds': round(elapsed, 2),
+            'articles': successful_articles
+        }, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+支持断点续传和分段并行的大文件下载
+
+先用 Range: bytes=0-0 探测文件总长度和服务器是否支持分段请求。支持时把文件分成若干段，
+每段写入自己的 .part 文件，大文件的多个分段并行下载；连接中断后从 .part 文件的长度继续，
+下次运行也能接着下载（用 If-Range 确认服务器上的文件没有变化）。
+全部完成后检查总长度与 Content-Length 一致，再合并成完整文件。
+服务器不支持分段请求时整个文件一次下载。
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from config import (
+    VIDEO_CHUNK_SIZE,
+    VIDEO_PARALLEL_MIN_SIZE,
+    VIDEO_SEGMENT_RETRIES,
+    VIDEO_SEGMENTS,
+)
+
+CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+# 同一URL同时只允许一个线程下载，避免写同一组 .part 文件
+_url_locks = {}
+_url_locks_lock = threading.Lock()
+
+
+class IncompleteDownloadError(requests.exceptions.RequestException):
+    """下载的长度与服务器声明的不一致"""
+
+
+def _url_lock(url):
+    with _url_locks_lock:
+        return _url_locks.setdefault(url, threading.Lock())
+
+
+def part_base(url, work_dir):
+    """该URL的断点文件路径前缀"""
+    return os.path.join(work_dir, f".{hashlib.md5(url.encode()).hexdigest()}")
+
+
+def split_segments(total, segments=VIDEO_SEGMENTS, min_size=VIDEO_PARALLEL_MIN_SIZE):
+    """把 [0, total) 分成若干段，返回 [[起始, 结束]]（闭区间）"""
+    if total <= 0:
+        return []
+    count = segments if total >= min_size else 1
+    size = -(-total // count)
+    return [[start, min(start + size, total) - 1] for start in range(0, total, size)]
+
+
+def probe(http_session, url):
+    """
+    探测文件信息，返回 (信息, 响应)
+    服务器支持分段请求时响应已关闭；不支持时返回的是完整内容的响应，由调用方读取
+    """
+    response = http_session.get(url, headers={'Range': 'bytes=0-0'}, stream=True,
+                                verify=False, timeout=30)
+    response.raise_for_status()
+    info = {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_type': response.headers.get('Content-Type', ''),
+        'total': None,
+    }
+    if response.status_code == 206:
+        match = CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+        if match and match.group(3) != '*':
+            info['total'] = int(match.group(3))
+            response.close()
+            return info, None
+    return info, response
+
+
+def load_state(state_path):
+    """读取上次的下载状态（分段和文件验证信息），没有时返回空字典"""
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def same_file(state, info):
+    """断点记录的文件与服务器上的是否相同"""
+    return bool(state) and all(state.get(key) == info[key] for key in ('total', 'etag', 'last_modified'))
+
+
+def remove_parts(base, segments):
+    for index in range(len(segments)):
+        path = f"{base}.part{index}"
+        if os.path.exists(path):
+            os.remove(path)
+    if os.path.exists(base + '.json'):
+        os.remove(base + '.json')
+
+
+def download_segment(http_session, url, path, start, end, validator):
+    """下载一段到 path，已有内容时从断点继续，连接中断时重试；返回本次从网络读取的字节数"""
+    length = end - start + 1
+    fetched = 0
+    for attempt in range(VIDEO_SEGMENT_RETRIES + 1):
+        done = os.path.getsize(path) if os.path.exists(path) else 0
+        if done >= length:
+            return fetched
+        headers = {'Range': f"bytes={start + done}-{end}"}
+        if validator:
+            headers['If-Range'] = validator
+        try:
+            with http_session.get(url, headers=headers, stream=True, verify=False, timeout=30) as response:
+                response.raise_for_status()
+                match = CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+                if response.status_code != 206 or not match or int(match.group(1)) != start + done:
+                    # 服务器返回了整个文件，说明文件已变化或不再支持分段
+                    raise IncompleteDownloadError(f"服务器没有返回请求的分段: {response.status_code}")
+                with open(path, 'ab') as f:
+                    for chunk in response.iter_content(chunk_size=VIDEO_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk[:length - done])
+                            done += len(chunk)
+                            fetched += len(chunk)
+                            if done >= length:
+                                break
+        except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as e:
+            if attempt == VIDEO_SEGMENT_RETRIES:
+                raise
+            print(f"分段下载中断，从断点继续: {url} ({start + done}-{end}), 错误: {e}")
+    return fetched
+
+
+def download_whole(response, path):
+    """服务器不支持分段请求时整个下载，下载完检查长度；返回下载的字节数"""
+    expected = response.headers.get('Content-Length')
+    size = 0
+    with response, open(path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=VIDEO_CHUNK_SIZE):
+            if chunk:
+                f.write(chunk)
+                size += len(chunk)
+    # 内容经过压缩时 Content-Length 是压缩后的长度，无法比较
+    if expected and not response.headers.get('Content-Encoding') and size != int(expected):
+        os.remove(path)
+        raise IncompleteDownloadError(f"下载长度 {size} 与 Content-Length {expected} 不一致")
+    return size
+
+
+def download_ranged(http_session, url, work_dir):
+    """
+    下载到 work_dir 中的临时文件，返回 (文件路径, Content-Type, 本次从网络读取的字节数)
+    文件由调用方移动或删除；下载失败时保留 .part 文件，下次调用继续（已有的部分不再计入字节数）
+    """
+    with _url_lock(url):
+        base = part_base(url, work_dir)
+        output_path = base + '.download'
+        info, response = probe(http_session, url)
+        if response is not None:
+            fetched = download_whole(response, output_path)
+            return output_path, info['content_type'], fetched
+
+        state_path = base + '.json'
+        state = load_state(state_path)
+        if not same_file(state, info):
+            # 没有断点或服务器上的文件已变化，重新分段
+            remove_parts(base, state.get('segments', []))
+            state = dict(info, segments=split_segments(info['total']))
+            with open(state_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+
+        segments = state['segments']
+        validator = info['etag'] or info['last_modified']
+        part_paths = [f"{base}.part{index}" for index in range(len(segments))]
+        with ThreadPoolExecutor(max_workers=max(len(segments), 1)) as executor:
+            futures = [
+                executor.submit(download_segment, http_session, url, path, start, end, validator)
+                for path, (start, end) in zip(part_paths, segments)
+            ]
+            fetched = sum(future.result() for future in futures)
+
+        # 检查每段长度和总长度
+        size = sum(os.path.getsize(path) for path in part_paths)
+        if size != info['total'] or any(
+            os.path.getsize(path) != end - start + 1 for path, (start, end) in zip(part_paths, segments)
+        ):
+            remove_parts(base, segments)
+            raise IncompleteDownloadError(f"下载长度 {size} 与 Content-Length {info['total']} 不一致")
+
+        with open(output_path, 'wb') as output:
+            for path in part_paths:
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(VIDEO_CHUNK_SIZE), b''):
+                        output.write(chunk)
+        remove_parts(base, segments)
+        return output_path, info['content_type'], fetched
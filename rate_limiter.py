@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按主机的令牌桶限速器
+
+代替原来每次请求后固定的随机休眠：每个主机按设定的速率发放令牌，服务器正常时不浪费时间；
+遇到429/503时降低速率并按 Retry-After 暂停，连续失败达到阈值后打开熔断器，
+冷却期内对该主机的请求直接失败，冷却结束后放行一个试探请求。
+"""
+
+import email.utils
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    CIRCUIT_BREAKER_COOLDOWN,
+    CIRCUIT_BREAKER_THRESHOLD,
+    HOST_RATE_LIMITS,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MAX_BACKOFF,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_PER_HOST,
+)
+
+# 需要退避的状态码
+BACKOFF_STATUS = (429, 503)
+
+
+def make_retry(total):
+    """
+    urllib3 的重试策略：只重试服务器错误，429/503 交给限速器退避
+    urllib3 默认在响应带有 Retry-After 时也会自己重试429/503，限速器看不到这些响应，
+    因此关闭 respect_retry_after_header
+    """
+    return Retry(
+        total=total,  # 最大重试次数
+        backoff_factor=1,  # 重试间隔
+        status_forcelist=[500, 502, 504],  # 需要重试的HTTP状态码
+        respect_retry_after_header=False,
+    )
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """主机熔断期间发出的请求"""
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（秒数或HTTP日期），返回等待秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_time.timestamp() - time.time())
+
+
+class HostState:
+    """单个主机的令牌桶、退避和熔断状态"""
+
+    def __init__(self, rate, burst):
+        self.target_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.failures = 0
+        self.circuit_open_until = 0.0
+        self.half_open = False
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+
+class RateLimiter:
+    def __init__(self, rate=RATE_LIMIT_PER_HOST, burst=RATE_LIMIT_BURST, host_rates=HOST_RATE_LIMITS,
+                 failure_threshold=CIRCUIT_BREAKER_THRESHOLD, cooldown=CIRCUIT_BREAKER_COOLDOWN,
+                 max_backoff=RATE_LIMIT_MAX_BACKOFF):
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_backoff = max_backoff
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'waited': 0.0, 'backoffs': 0, 'circuit_opened': 0}
+
+    def _host(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = HostState(self.host_rates.get(host, self.rate), self.burst)
+        return self.hosts[host]
+
+    def acquire(self, host):
+        """等待直到该主机有可用令牌；熔断期间抛出 CircuitOpenError"""
+        while True:
+            with self.lock:
+                state = self._host(host)
+                now = time.monotonic()
+
+                if state.circuit_open_until:
+                    if now < state.circuit_open_until:
+                        raise CircuitOpenError(
+                            f"{host} 连续失败 {state.failures} 次，熔断中，"
+                            f"{state.circuit_open_until - now:.0f} 秒后重试")
+                    # 冷却结束，放行一个试探请求
+                    state.circuit_open_until = 0.0
+                    state.half_open = True
+
+                state.refill(now)
+                wait = state.blocked_until - now
+                if wait <= 0 and state.tokens >= 1:
+                    state.tokens -= 1
+                    self.stats['requests'] += 1
+                    return
+                if wait <= 0:
+                    wait = (1 - state.tokens) / state.rate
+                self.stats['waited'] += wait
+            time.sleep(wait)
+
+    def record(self, host, status=None, retry_after=None):
+        """
+        记录请求结果并调整速率
+        status 为 None 表示连接错误或超时
+        """
+        with self.lock:
+            state = self._host(host)
+            now = time.monotonic()
+
+            if status is not None and status not in BACKOFF_STATUS and status < 500:
+                # 成功后逐步恢复到目标速率
+                state.failures = 0
+                state.half_open = False
+                state.rate = min(state.target_rate, state.rate + state.target_rate * 0.1)
+                return
+
+            state.failures += 1
+            if status in BACKOFF_STATUS:
+                # 降低速率，并按 Retry-After 或指数退避暂停该主机
+                self.stats['backoffs'] += 1
+                state.rate = max(state.target_rate / 16, state.rate / 2)
+                delay = retry_after if retry_after is not None else 2 ** state.failures
+                state.blocked_until = max(state.blocked_until, now + min(delay, self.max_backoff))
+
+            if state.half_open or state.failures >= self.failure_threshold:
+                state.half_open = False
+                state.circuit_open_until = now + self.cooldown
+                self.stats['circuit_opened'] += 1
+                print(f"{host} 连续失败 {state.failures} 次，暂停请求 {self.cooldown} 秒")
+
+    def print_summary(self):
+        print(f"请求限速: 共 {self.stats['requests']} 次请求，累计等待 {self.stats['waited']:.1f} 秒，"
+              f"退避 {self.stats['backoffs']} 次，熔断 {self.stats['circuit_opened']} 次")
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """发送请求前按主机限速，遇到429/503时退避后重试"""
+
+    def __init__(self, limiter=None, max_attempts=RATE_LIMIT_MAX_RETRIES, **kwargs):
+        self.limiter = limiter
+        self.max_attempts = max_attempts
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+
+        host = urlparse(request.url).netloc
+        for attempt in range(1, self.max_attempts + 1):
+            self.limiter.acquire(host)
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.limiter.record(host, None)
+                raise
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            self.limiter.record(host, response.status_code, retry_after)
+            if response.status_code not in BACKOFF_STATUS or attempt == self.max_attempts:
+                return response
+            response.close()
+        return response
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+搜索结果的相关度预评分
+
+在抓取文章页面之前，根据搜索结果（或订阅条目）中的标题、摘要和URL路径给文章打分，
+低于阈值的文章（与中国航天无关的体育、地方新闻等）不再抓取页面和下载图片。
+所有关键词和词语编译成一个正则表达式，每个字段只扫描一次。
+没有标题和摘要的结果（搜索结果页中常见）按URL所在栏目和路径中的关键词评分；
+栏目未知、路径中也没有关键词的结果无法判断，不会被跳过。
+"""
+
+import re
+import threading
+from urllib.parse import urlsplit
+
+from config import (
+    RELEVANCE_FIELD_WEIGHTS,
+    RELEVANCE_PHRASE_WEIGHT,
+    RELEVANCE_TERM_WEIGHTS,
+    RELEVANCE_THRESHOLD,
+    RELEVANCE_URL_SECTIONS,
+    SEARCH_KEYWORDS,
+)
+from metrics import metrics
+
+# 搜索结果页面中没有标题时使用的占位标题
+NO_TITLE = "No Title"
+
+
+def url_words(url):
+    """URL路径中的词语，如 /news/world-asia-china-12345678 -> 'news world asia china'"""
+    path = urlsplit(url).path
+    return ' '.join(re.findall(r'[a-z]+', re.sub(r'\d+', ' ', path.lower())))
+
+
+class RelevanceScorer:
+    def __init__(self, keywords=SEARCH_KEYWORDS, term_weights=RELEVANCE_TERM_WEIGHTS,
+                 phrase_weight=RELEVANCE_PHRASE_WEIGHT, field_weights=RELEVANCE_FIELD_WEIGHTS,
+                 threshold=RELEVANCE_THRESHOLD, url_sections=RELEVANCE_URL_SECTIONS):
+        # 关键词中的每个词都参与评分，未单独设置权重的词按1计算
+        self.weights = {}
+        for keyword in keywords:
+            for word in keyword.lower().split():
+                self.weights.setdefault(word, 1.0)
+        self.weights.update((term.lower(), weight) for term, weight in term_weights.items())
+        # 完整的关键词短语作为一个词匹配，得分为其中各词的权重加上短语的额外分数
+        for keyword in keywords:
+            phrase = keyword.lower()
+            if ' ' in phrase:
+                self.weights[phrase] = phrase_weight + sum(self.weights.get(word, 0) for word in phrase.split())
+        self.weights = {term: weight for term, weight in self.weights.items() if weight}
+
+        # 长的短语在前，优先匹配完整短语；短语中的空格可以匹配连字符（URL路径中的写法）
+        terms = sorted(self.weights, key=len, reverse=True)
+        self.pattern = re.compile(
+            r"\b(" + '|'.join(re.escape(term).replace(r'\ ', r'[\s\-]+') for term in terms) + r")\b",
+            re.IGNORECASE
+        )
+        self.field_weights = field_weights
+        self.threshold = threshold
+        # 长的前缀在前，优先匹配更具体的栏目
+        self.url_sections = sorted(url_sections.items(), key=lambda item: len(item[0]), reverse=True)
+        self.lock = threading.Lock()
+        self.skipped_urls = set()
+        self.stats = {'scored': 0, 'url_scored': 0, 'unscored': 0, 'skipped': 0, 'pages': 0, 'page_bytes': 0}
+
+    def match_terms(self, text):
+        """文本中出现的不同关键词和词语"""
+        text = text.replace('\u2019', "'")
+        return {re.sub(r'[\s\-]+', ' ', match.lower()) for match in self.pattern.findall(text)}
+
+    def score_url(self, url):
+        """
+        只有URL时的相关度：栏目的估计分数加上路径中关键词的得分
+        栏目不在 RELEVANCE_URL_SECTIONS 中时，路径中的关键词只用来确认相关（如 world-asia-china
+        中的 china 不足以判断），得分低于阈值时返回None
+        """
+        path = urlsplit(url).path
+        section = next((score for prefix, score in self.url_sections if path.startswith(prefix)), None)
+        field_weight = self.field_weights.get('url', 0)
+        terms_score = sum(self.weights[term] * field_weight for term in self.match_terms(url_words(url)))
+        if section is None:
+            return terms_score if terms_score >= self.threshold else None
+        return section + terms_score
+
+    def score(self, article):
+        """
+        按标题、摘要和URL路径计算相关度：出现的每个词只计算一次，乘以所在字段中最高的字段权重
+        没有标题和摘要时只按URL评分（见 score_url），无法判断时返回None
+        """
+        title = article.get('title') or ''
+        if title == NO_TITLE:
+            title = ''
+        snippet = article.get('snippet') or ''
+        if not title and not snippet:
+            return self.score_url(article['url'])
+        fields = {'title': title, 'snippet': snippet, 'url': url_words(article['url'])}
+        term_weights = {}
+        for name, text in fields.items():
+            field_weight = self.field_weights.get(name, 0)
+            for term in self.match_terms(text) if text else ():
+                term_weights[term] = max(term_weights.get(term, 0), field_weight)
+        return sum(self.weights[term] * field_weight for term, field_weight in term_weights.items())
+
+    def accept(self, article):
+        """相关度不低于阈值（或无法判断）时返回True"""
+        score = self.score(article)
+        with self.lock:
+            if score is None:
+                self.stats['unscored'] += 1
+                return True
+            self.stats['scored'] += 1
+            if article.get('title') in (None, '', NO_TITLE) and not article.get('snippet'):
+                self.stats['url_scored'] += 1
+            if score >= self.threshold:
+                return True
+            if article['url'] not in self.skipped_urls:
+                self.skipped_urls.add(article['url'])
+                self.stats['skipped'] += 1
+        return False
+
+    def observe_page(self, size):
+        """记录实际抓取的文章页面大小，用于估计跳过的文章节省的流量"""
+        with self.lock:
+            self.stats['pages'] += 1
+            self.stats['page_bytes'] += size
+
+    def bytes_saved(self):
+        """按本次运行中每篇文章的平均页面和媒体字节数估计跳过的文章节省的流量"""
+        pages = self.stats['pages']
+        if not pages:
+            return 0
+        media_bytes = metrics.bytes.get('image_download', 0) + metrics.bytes.get('video_download', 0)
+        return self.stats['skipped'] * (self.stats['page_bytes'] + media_bytes) / pages
+
+    def print_summary(self):
+        print(f"相关度预评分: 评分 {self.stats['scored']} 次（其中只按URL {self.stats['url_scored']} 次），"
+              f"无法判断未评分 {self.stats['unscored']} 次，"
+              f"跳过低相关度文章 {self.stats['skipped']} 篇，"
+              f"估计节省 {self.bytes_saved() / 1024 / 1024:.1f} MB")
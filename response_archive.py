@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+原始HTTP响应存档（WARC格式）
+
+把抓取到的每个页面响应（状态行、响应头和正文）按WARC/1.0格式追加写入存档文件，
+每条记录单独gzip压缩，可以直接按偏移量读取；文件达到设定大小后新建下一个文件。
+每条记录的URL、文件名、偏移量和长度写入 index.jsonl，之后修改提取规则时可以
+直接从存档中离线重新提取，不需要重新爬取。
+图片视频等流式下载的响应和本地缓存返回的响应不存档。
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from requests.structures import CaseInsensitiveDict
+
+from config import ARCHIVE_DIR, ARCHIVE_MAX_SIZE
+
+INDEX_FILE = 'index.jsonl'
+
+# 正文已经解压，这些响应头不再与存档的内容对应
+SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+def warc_date(timestamp=None):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+def warc_record(record_type, headers, block):
+    """生成一条压缩后的WARC记录"""
+    lines = [
+        'WARC/1.0',
+        f'WARC-Type: {record_type}',
+        f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>',
+        f'WARC-Date: {warc_date()}',
+    ]
+    lines.extend(f'{name}: {value}' for name, value in headers.items())
+    lines.append(f'Content-Length: {len(block)}')
+    head = ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8')
+    return gzip.compress(head + block + b'\r\n\r\n')
+
+
+def payload_digest(body):
+    return 'sha1:' + base64.b32encode(hashlib.sha1(body).digest()).decode()
+
+
+class ResponseArchive:
+    def __init__(self, archive_dir=ARCHIVE_DIR, max_size=ARCHIVE_MAX_SIZE):
+        self.archive_dir = archive_dir
+        # 存档文件超过该字节数后新建下一个文件
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.file = None
+        self.filename = None
+        self.stats = {'records': 0, 'bytes': 0, 'files': 0}
+        os.makedirs(archive_dir, exist_ok=True)
+        self.index = open(os.path.join(archive_dir, INDEX_FILE), 'a', encoding='utf-8')
+
+    def _open_next(self):
+        """新建存档文件并写入 warcinfo 记录（调用时已持有锁）"""
+        if self.file:
+            self.file.close()
+        self.filename = f"bbc-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.warc.gz"
+        self.file = open(os.path.join(self.archive_dir, self.filename), 'ab')
+        info = 'software: dachuang-BBC-data-deal\r\nformat: WARC File Format 1.0\r\n'.encode('utf-8')
+        self.file.write(warc_record('warcinfo', {
+            'WARC-Filename': self.filename,
+            'Content-Type': 'application/warc-fields',
+        }, info))
+        self.stats['files'] += 1
+
+    def add(self, response):
+        """存档一个已读取正文的响应"""
+        body = response.content
+        status_line = f"HTTP/1.1 {response.status_code} {response.reason or ''}".rstrip()
+        header_lines = [status_line]
+        header_lines.extend(
+            f'{name}: {value}' for name, value in response.headers.items()
+            if name.lower() not in SKIPPED_HEADERS
+        )
+        header_lines.append(f'Content-Length: {len(body)}')
+        block = ('\r\n'.join(header_lines) + '\r\n\r\n').encode('utf-8', errors='replace') + body
+        record = warc_record('response', {
+            'WARC-Target-URI': response.url,
+            'WARC-Payload-Digest': payload_digest(body),
+            'Content-Type': 'application/http; msgtype=response',
+        }, block)
+
+        with self.lock:
+            if self.file is None or self.file.tell() >= self.max_size:
+                self._open_next()
+            offset = self.file.tell()
+            self.file.write(record)
+            self.file.flush()
+            self.index.write(json.dumps({
+                'url': response.url,
+                'file': self.filename,
+                'offset': offset,
+                'length': len(record),
+                'status': response.status_code,
+                'content_type': response.headers.get('Content-Type', ''),
+                'archived_at': time.time(),
+            }, ensure_ascii=False) + '\n')
+            self.index.flush()
+            self.stats['records'] += 1
+            self.stats['bytes'] += len(record)
+
+    def hook(self, response, *args, **kwargs):
+        """requests 的 response 钩子，跳过流式下载和本地缓存返回的响应"""
+        if kwargs.get('stream') or getattr(response, 'from_cache', False):
+            return response
+        try:
+            self.add(response)
+        except OSError as e:
+            print(f"存档响应失败: {response.url}, 错误: {e}")
+        return response
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+            self.index.close()
+
+    def print_summary(self):
+        print(f"响应存档: 写入 {self.stats['records']} 条记录，"
+              f"共 {self.stats['bytes'] / 1024 / 1024:.1f} MB，{self.stats['files']} 个存档文件")
+
+
+def iter_index(archive_dir=ARCHIVE_DIR):
+    """遍历存档索引中的记录"""
+    index_path = os.path.join(archive_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # 程序中断时最后一行可能不完整
+                continue
+
+
+def read_record(archive_dir, entry):
+    """按索引读取一条响应记录，返回 (url, 状态码, 响应头, 正文字节)"""
+    with open(os.path.join(archive_dir, entry['file']), 'rb') as f:
+        f.seek(entry['offset'])
+        data = gzip.decompress(f.read(entry['length']))
+
+    warc_head, _, block = data.partition(b'\r\n\r\n')
+    warc_headers = dict(
+        line.split(': ', 1) for line in warc_head.decode('utf-8').split('\r\n')[1:] if ': ' in line
+    )
+    block = block[:int(warc_headers['Content-Length'])]
+
+    http_head, _, body = block.partition(b'\r\n\r\n')
+    lines = http_head.decode('utf-8', errors='replace').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = CaseInsensitiveDict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+    return warc_headers['WARC-Target-URI'], status, headers, body
+
+
+def iter_responses(archive_dir=ARCHIVE_DIR):
+    """按索引顺序读取存档中的所有响应，同一URL只返回最新的一条"""
+    latest = {}
+    for entry in iter_index(archive_dir):
+        latest[entry['url']] = entry
+    for entry in latest.values():
+        try:
+            yield read_record(archive_dir, entry)
+        except (OSError, ValueError, EOFError) as e:
+            print(f"读取存档记录失败: {entry['url']}, 错误: {e}")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+已见URL的布隆过滤器
+
+放在SQLite中的精确记录（爬取队列的已提取文章、媒体存储的URL索引）前面：
+过滤器判断"不存在"时一定不存在，不再查询数据库；判断"可能存在"时再由数据库确认。
+位数组保存在文件中并通过 mmap 访问，跨运行保留，一百万个URL只占约1.8MB。
+文件头记录是否正常关闭，程序异常退出或容量不足时由调用方从数据库重建。
+多个进程同时打开同一个文件时用文件锁串行化检查和重建：每个写入的进程打开期间持有
+<文件>.writers 上的共享锁，有其他进程正在写入时，文件头"未正常关闭"只说明它们还在使用，
+直接打开同一个文件（不重建、不替换），最后一个关闭的进程写入正常关闭标记。
+只需要查询的进程（如离线提取的子进程）以只读方式打开，不写文件头，也不重建。
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，不加文件锁
+    fcntl = None
+
+from config import SEEN_FILTER_CAPACITY, SEEN_FILTER_ERROR_RATE
+
+MAGIC = b'BLM1'
+# 魔数、位数、哈希函数个数、容量、已添加数量、是否正常关闭
+HEADER = struct.Struct('<4sQIQQB')
+HEADER_SIZE = 64
+
+
+def other_writers(path):
+    """是否有其他进程（或同一进程中的其他对象）持有写入者的共享锁"""
+    if fcntl is None:
+        return False
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    return False
+
+
+class FileLock:
+    """进程间的排他文件锁（fcntl.flock），没有 fcntl 时不加锁"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.file:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+def filter_size(capacity, error_rate):
+    """按容量和误判率计算 (位数, 哈希函数个数)"""
+    bits = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+    hashes = max(int(round(bits / capacity * math.log(2))), 1)
+    return bits, hashes
+
+
+class BloomFilter:
+    def __init__(self, path, capacity=SEEN_FILTER_CAPACITY, error_rate=SEEN_FILTER_ERROR_RATE, read_only=False):
+        # 关闭时（如 atexit 中）工作目录可能已经改变，锁文件和写入者文件都按打开时的绝对路径
+        self.path = os.path.abspath(path)
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        self.stats = {'checks': 0, 'negatives': 0}
+        self.mm = None
+        self.writer_file = None
+        if read_only:
+            # 只读打开时不检查是否正常关闭（写入的进程仍在使用），文件无效时所有查询都返回"可能存在"
+            self.needs_rebuild = False
+            self._open_existing(capacity, require_clean=False)
+            return
+        with FileLock(self.path + '.lock'):
+            # 有其他进程正在写入时文件头必然"未正常关闭"，不是异常退出，直接使用同一个文件
+            # （替换文件会使它们之后添加的URL写进已删除的旧文件）
+            shared = other_writers(self.path + '.writers') and self._open_existing(capacity, require_clean=False)
+            # 文件不存在、上次没有正常关闭或容量不足时为True，需要调用方重新添加所有URL
+            self.needs_rebuild = not shared and not self._open_existing(capacity)
+            if self.needs_rebuild:
+                self._create(capacity, error_rate)
+            self._write_header(clean=False)
+            self._register_writer()
+
+    def _open_existing(self, capacity, require_clean=True):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return False
+        magic, bits, hashes, file_capacity, count, clean = HEADER.unpack(header)
+        if magic != MAGIC or (require_clean and (not clean or file_capacity < capacity)):
+            return False
+        if os.path.getsize(self.path) != HEADER_SIZE + (bits + 7) // 8:
+            return False
+        self.bits, self.hashes, self.capacity, self.count = bits, hashes, file_capacity, count
+        self._map()
+        return True
+
+    def _create(self, capacity, error_rate):
+        """新建空的过滤器文件（调用时已持有文件锁），临时文件名按进程和线程区分"""
+        self.bits, self.hashes = filter_size(capacity, error_rate)
+        self.capacity = capacity
+        self.count = 0
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b'\0' * HEADER_SIZE)
+            f.truncate(HEADER_SIZE + (self.bits + 7) // 8)
+        os.replace(tmp_path, self.path)
+        self._map()
+
+    def _register_writer(self):
+        """打开期间持有写入者的共享锁，进程退出（包括异常退出）时自动释放"""
+        if fcntl is None:
+            return
+        self.writer_file = open(self.path + '.writers', 'a')
+        fcntl.flock(self.writer_file.fileno(), fcntl.LOCK_SH)
+
+    def _release_writer(self):
+        if self.writer_file:
+            fcntl.flock(self.writer_file.fileno(), fcntl.LOCK_UN)
+            self.writer_file.close()
+            self.writer_file = None
+
+    def _map(self):
+        if self.read_only:
+            self.file = open(self.path, 'rb')
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.file = open(self.path, 'r+b')
+            self.mm = mmap.mmap(self.file.fileno(), 0)
+
+    def _write_header(self, clean):
+        self.mm[:HEADER.size] = HEADER.pack(MAGIC, self.bits, self.hashes, self.capacity,
+                                            self.count, 1 if clean else 0)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        h2 |= 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        if self.read_only:
+            raise ValueError(f"布隆过滤器以只读方式打开: {self.path}")
+        mm = self.mm
+        added = False
+        with self.lock:
+            for position in self._positions(key):
+                index = HEADER_SIZE + (position >> 3)
+                bit = 1 << (position & 7)
+                value = mm[index]
+                if not value & bit:
+                    mm[index] = value | bit
+                    added = True
+            if added:
+                self.count += 1
+
+    def __contains__(self, key):
+        mm = self.mm
+        self.stats['checks'] += 1
+        if mm is None:
+            # 只读打开时文件无效，交给数据库判断
+            return True
+        bits = self.bits
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        h2 |= 1
+        # 逐个检查，遇到未设置的位立即返回（未见过的URL通常第一两个位置就能判断）
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % bits
+            if not mm[HEADER_SIZE + (position >> 3)] & (1 << (position & 7)):
+                self.stats['negatives'] += 1
+                return False
+        return True
+
+    def size_bytes(self):
+        return HEADER_SIZE + (self.bits + 7) // 8
+
+    def flush(self):
+        if self.read_only:
+            return
+        with self.lock:
+            self._write_header(clean=False)
+            self.mm.flush()
+
+    def close(self):
+        """最后一个关闭的写入者写入正常关闭标记，下次打开时不需要重建"""
+        with self.lock:
+            if self.mm is None or self.mm.closed:
+                return
+            if self.read_only:
+                self.mm.close()
+                self.file.close()
+                return
+            with FileLock(self.path + '.lock'):
+                self._release_writer()
+                self._write_header(clean=not other_writers(self.path + '.writers'))
+                self.mm.flush()
+            self.mm.close()
+            self.file.close()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+标题和正文选择器的学习缓存
+
+按URL类型（/news/、/sport/、/news/live/、/sounds/）记录每个选择器的命中次数，
+下次优先尝试命中最多的选择器，减少整棵树上的无效查找。统计结果保存到文件，跨运行保留，
+也可以用来查看网站实际使用的页面布局。
+选择器分组给出：组的顺序固定（如特定的 h1 总在通用的 h1、h2 之前），只在同一组内
+互斥的特定选择器之间按命中次数排序，通用选择器命中再多也不会排到更具体的选择器前面。
+"""
+
+import json
+import os
+import threading
+
+from config import SELECTOR_STATS_FILE
+
+# URL类型，按顺序匹配路径前缀
+PAGE_TYPES = [
+    ('/news/live/', 'live'),
+    ('/sport/', 'sport'),
+    ('/sounds/', 'sounds'),
+    ('/news/', 'news'),
+]
+
+
+def page_type(url):
+    """根据URL路径判断页面类型"""
+    if not url:
+        return 'other'
+    path = '/' + url.split('://', 1)[-1].split('/', 1)[-1]
+    for prefix, name in PAGE_TYPES:
+        if path.startswith(prefix):
+            return name
+    return 'other'
+
+
+class SelectorCache:
+    def __init__(self, path=SELECTOR_STATS_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        # {页面类型: {选择器组: {'pages': 页面数, 'hits': {选择器: 命中次数}}}}
+        self.stats = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取选择器统计失败: {e}")
+
+    def save(self):
+        """保存统计结果（先写临时文件再替换）"""
+        with self.lock:
+            data = json.dumps(self.stats, ensure_ascii=False, indent=2)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def _group(self, url, group):
+        return self.stats.setdefault(page_type(url), {}).setdefault(group, {'pages': 0, 'hits': {}})
+
+    def ordered(self, group, url, tiers):
+        """
+        返回选择器的尝试顺序：tiers 为按优先级排列的选择器组，组的顺序不变，
+        组内按该类型页面的历史命中次数排序，未命中过的保持原顺序
+        """
+        with self.lock:
+            hits = self._group(url, group)['hits']
+            selectors = []
+            for tier in tiers:
+                order = {selector: index for index, selector in enumerate(tier)}
+                selectors.extend(sorted(tier, key=lambda selector: (-hits.get(selector, 0), order[selector])))
+            return selectors
+
+    def record(self, group, url, selector):
+        """记录一次查找结果，selector 为 None 表示所有选择器都没有命中"""
+        with self.lock:
+            stats = self._group(url, group)
+            stats['pages'] += 1
+            if selector is not None:
+                stats['hits'][selector] = stats['hits'].get(selector, 0) + 1
+
+    def hit_rates(self):
+        """各类型页面中每个选择器的命中率"""
+        rates = {}
+        with self.lock:
+            for type_name, groups in self.stats.items():
+                for group, stats in groups.items():
+                    pages = stats['pages']
+                    if not pages:
+                        continue
+                    rates.setdefault(type_name, {})[group] = {
+                        selector: hits / pages
+                        for selector, hits in sorted(stats['hits'].items(), key=lambda item: -item[1])
+                    }
+        return rates
+
+    def print_summary(self):
+        print("选择器命中率:")
+        for type_name, groups in self.hit_rates().items():
+            for group, rates in groups.items():
+                pages = self.stats[type_name][group]['pages']
+                top = "，".join(f"{selector} {rate:.0%}" for selector, rate in list(rates.items())[:3])
+                print(f"  {type_name}/{group} ({pages} 页): {top or '无命中'}")
@@ -1,9 +1,9 @@
-import os
-import re
 import nltk
 import pandas as pd
 from collections import Counter
 
+from corpus_loader import iter_articles
+
 # 确保下载NLTK资源
 print("正在下载NLTK资源...")
 nltk.download('vader_lexicon')
@@ -14,9 +14,6 @@ from nltk.sentiment.vader import SentimentIntensityAnalyzer
 print("初始化情感分析器...")
 sia = SentimentIntensityAnalyzer()
 
-# 文章目录
-articles_dir = 'articles'
-
 # 结果存储
 results = {
     'positive': [],
@@ -31,28 +28,15 @@ sentiment_counts = Counter()
 print(f"开始处理文章...")
 article_count = 0
 
-for filename in os.listdir(articles_dir):
-    if not filename.endswith('.txt'):
-        continue
-    
+for article in iter_articles():
+    filename = article.filename
+    title = article.display_title
     article_count += 1
     if article_count % 10 == 0:
         print(f"已处理 {article_count} 篇文章...")
     
-    file_path = os.path.join(articles_dir, filename)
-    
-    # 读取文件内容
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-        
-        # 提取正文
-        match = re.search(r'正文内容:(.*?)(?:图片列表:|$)', content, re.DOTALL)
-        if match:
-            text = match.group(1).strip()
-        else:
-            # 如果没有找到"正文内容:"标记，则使用整个内容
-            text = content
+        text = article.text
         
         # 过滤掉太短的文章
         if len(text.split()) < 10:
@@ -77,6 +61,7 @@ for filename in os.listdir(articles_dir):
         # 保存文章信息
         results[sentiment].append({
             'filename': filename,
+            'title': title,
             'score': compound_score
         })
     except Exception as e:
@@ -106,6 +91,7 @@ for sentiment, articles in results.items():
     for article in articles:
         details.append({
             '文件名': article['filename'],
+            '标题': article['title'],
             '情感类别': sentiment,
             '情感得分': article['score']
         })
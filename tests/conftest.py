@@ -0,0 +1,22 @@
+import atexit
+import os
+import sys
+
+import pytest
+
+# 测试直接导入仓库根目录下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def bbc_crawler(tmp_path_factory):
+    """在临时目录中导入爬虫模块（导入时会创建文件夹和SQLite文件）"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('crawler'))
+    try:
+        import bbc_crawler
+    finally:
+        os.chdir(cwd)
+    # 测试中的选择器命中不写入统计文件
+    atexit.unregister(bbc_crawler.selector_cache.save)
+    return bbc_crawler
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""文章读取的测试：内容以文章存储为准，只有不在存储中的旧文章文件才解析文本"""
+
+import os
+
+import pytest
+
+from article_store import ArticleStore
+from corpus_loader import CorpusLoader
+
+URL = 'https://www.bbc.co.uk/news/science-environment-12345678'
+# 段落中的空行和“图片列表:”会被文本解析拆错，存储中的段落列表保持原样
+PARAGRAPHS = ['First line\n\nstill the first paragraph.', '图片列表:\n1. not an image']
+
+
+def write_text(path, title, url, paragraphs):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"标题: {title}\n网址: {url}\n\n正文内容:\n")
+        for paragraph in paragraphs:
+            f.write(f"{paragraph}\n\n")
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    articles_dir = tmp_path / 'articles'
+    articles_dir.mkdir()
+    write_text(articles_dir / 'c0001.txt', 'Stored title', URL, PARAGRAPHS)
+    write_text(articles_dir / 'legacy.txt', 'Legacy title', 'https://www.bbc.co.uk/news/legacy', ['Old text.'])
+    store = ArticleStore(str(tmp_path / 'articles.jsonl'))
+    store.add(URL, 'Stored title', PARAGRAPHS, [], [], 'c0001.txt', '2024-05-01T08:00:00Z')
+
+    def load():
+        loader = CorpusLoader(str(articles_dir), str(tmp_path / 'corpus_cache.db'), store.path)
+        articles = list(loader.iter_articles())
+        loader.close()
+        return loader, articles
+
+    return store, load
+
+
+def test_articles_come_from_store(corpus):
+    store, load = corpus
+    loader, articles = load()
+
+    assert [article.filename for article in articles] == ['c0001.txt', 'legacy.txt']
+    stored, legacy = articles
+    assert stored.paragraphs == PARAGRAPHS
+    assert stored.published == '2024-05-01T08:00:00Z'
+    assert stored.path.endswith(os.path.join('articles', 'c0001.txt'))
+    assert legacy.paragraphs == ['Old text.']
+    assert loader.store_reloaded
+    assert loader.stats == {'stored': 1, 'cached': 0, 'parsed': 1, 'failed': 0, 'removed': 0}
+
+
+def test_unchanged_store_uses_cache(corpus):
+    store, load = corpus
+    _, first = load()
+    loader, second = load()
+
+    assert second == first
+    assert not loader.store_reloaded
+    assert loader.stats == {'stored': 1, 'cached': 1, 'parsed': 0, 'failed': 0, 'removed': 0}
+
+    # 存储有新的行（如无标题文章命名）时重新读取
+    store.update(URL, title='Renamed')
+    loader, third = load()
+    assert loader.store_reloaded
+    assert third[0].title == 'Renamed'
+    assert third[0].paragraphs == PARAGRAPHS
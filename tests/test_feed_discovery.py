@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""feed_discovery 的测试：使用 tests/fixtures/feeds 中的RSS、站点地图索引和新闻站点地图"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from feed_discovery import FeedDiscovery, iter_entries
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'feeds')
+
+RSS_URL = 'https://feeds.bbci.co.uk/news/science_and_environment/rss.xml'
+INDEX_URL = 'https://www.bbc.co.uk/sitemaps/index.xml'
+SITEMAP_URL = 'https://www.bbc.co.uk/sitemaps/news.xml'
+KEYWORDS = ['China space', 'Chinese rocket']
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def pages():
+    """订阅地址 -> 内容，测试中可以修改以模拟订阅更新"""
+    return {
+        RSS_URL: read_fixture('rss.xml'),
+        INDEX_URL: read_fixture('sitemap_index.xml'),
+        SITEMAP_URL: read_fixture('news_sitemap.xml'),
+    }
+
+
+@pytest.fixture
+def fetch(pages):
+    def fetch_page(url):
+        return SimpleNamespace(content=pages[url])
+    return fetch_page
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / 'feed_state.json')
+
+
+def test_iter_entries_reads_rss_and_news_sitemap():
+    rss = list(iter_entries(read_fixture('rss.xml')))
+    assert [kind for kind, _ in rss] == ['entry'] * 3
+    assert rss[0][1]['link'] == 'https://www.bbc.co.uk/news/articles/c0000000001o'
+    assert rss[0][1]['pubDate'] == 'Mon, 12 Oct 2026 10:00:00 GMT'
+
+    index = list(iter_entries(read_fixture('sitemap_index.xml')))
+    assert index == [('sitemap', {'loc': SITEMAP_URL, 'lastmod': '2026-10-12T12:00:00Z'})]
+
+    sitemap = list(iter_entries(read_fixture('news_sitemap.xml')))
+    assert [fields['title'] for _, fields in sitemap] == [
+        'China space agency plans crewed Moon landing',
+        'Weather warning issued for coastal areas',
+    ]
+    assert sitemap[0][1]['publication_date'] == '2026-10-12T12:00:00Z'
+
+
+def test_first_run_finds_matching_entries(fetch, state_file):
+    discovery = FeedDiscovery(state_file, KEYWORDS)
+    articles = discovery.discover([RSS_URL, INDEX_URL], fetch)
+
+    assert [article['url'] for article in articles] == [
+        'https://www.bbc.co.uk/news/articles/c0000000001o',
+        'https://www.bbc.co.uk/news/articles/c0000000003o',
+        'https://www.bbc.co.uk/news/articles/c0000000004o',
+    ]
+    assert articles[0]['title'] == "China's space station welcomes new crew"
+    assert articles[0]['published'] == '2026-10-12T10:00:00+00:00'
+    # RSS的 <description> 作为摘要参与相关度评分
+    assert articles[0]['snippet'] == 'Three astronauts arrive at the Tiangong space station.'
+    # 足球和天气条目与关键词无关
+    assert discovery.stats['unmatched'] == 2
+    assert discovery.stats['found'] == 3
+    assert os.path.exists(state_file)
+
+
+def test_second_run_skips_processed_entries(fetch, state_file):
+    FeedDiscovery(state_file, KEYWORDS).discover([RSS_URL, INDEX_URL], fetch)
+
+    discovery = FeedDiscovery(state_file, KEYWORDS)
+    assert discovery.high_water[RSS_URL] == '2026-10-12T11:00:00+00:00'
+    assert discovery.high_water[INDEX_URL] == '2026-10-12T12:00:00+00:00'
+    assert discovery.discover([RSS_URL, INDEX_URL], fetch) == []
+    # 站点地图索引没有更新，不再读取子站点地图
+    assert discovery.stats['feeds'] == 2
+    assert discovery.stats['old'] == 4
+
+
+def test_second_run_picks_up_newer_entries(pages, fetch, state_file):
+    FeedDiscovery(state_file, KEYWORDS).discover([RSS_URL], fetch)
+
+    new_item = (b'<item><title>China space telescope launched</title>'
+                b'<link>https://www.bbc.co.uk/news/articles/c0000000006o</link>'
+                b'<pubDate>Tue, 13 Oct 2026 09:00:00 GMT</pubDate></item>\n<item>')
+    pages[RSS_URL] = pages[RSS_URL].replace(b'<item>', new_item, 1)
+
+    discovery = FeedDiscovery(state_file, KEYWORDS)
+    articles = discovery.discover([RSS_URL], fetch)
+    assert [article['url'] for article in articles] == ['https://www.bbc.co.uk/news/articles/c0000000006o']
+    assert discovery.high_water[RSS_URL] == '2026-10-13T09:00:00+00:00'
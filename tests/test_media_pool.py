@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""后台下载池的测试：媒体全部处理完之前文章不能标记为已提取；下载速度只计从网络读取的字节"""
+
+import os
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from crawl_frontier import CrawlFrontier
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+URL = 'https://www.bbc.co.uk/news/science-environment-12345678'
+
+
+# 200x200 的PNG文件头，加上填充内容，能通过图片尺寸和大小的筛选
+PNG = b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', 200, 200) + b'\0' * 4096
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(PNG)))
+        self.end_headers()
+        self.wfile.write(PNG)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def pool_env(bbc_crawler, tmp_path, monkeypatch):
+    """在临时目录中使用独立的抓取记录"""
+    import media_pool
+
+    monkeypatch.chdir(tmp_path)
+    for name in ('articles', 'images', 'videos'):
+        os.makedirs(name)
+    frontier = CrawlFrontier(str(tmp_path / 'frontier.db'))
+    monkeypatch.setattr(bbc_crawler, 'frontier', frontier)
+    monkeypatch.setattr(media_pool, 'frontier', frontier)
+
+    pool = media_pool.MediaDownloadPool(workers=1)
+    yield bbc_crawler, frontier, pool
+    pool.close()
+    frontier.close()
+
+
+@pytest.fixture
+def release(monkeypatch):
+    """图片下载等待 release 后才完成"""
+    import media_pool
+
+    release = threading.Event()
+
+    def download_image(img_url, article_dir, http_session=None, info=None):
+        release.wait(10)
+        with open(os.path.join(article_dir, 'launch.jpg'), 'wb') as f:
+            f.write(b'\xff\xd8\xff')
+        return 'launch.jpg'
+
+    monkeypatch.setattr(media_pool, 'download_image', download_image)
+    yield release
+    release.set()
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(('127.0.0.1', 0), ImageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_article_marked_extracted_after_media(pool_env, release):
+    bbc_crawler, frontier, pool = pool_env
+    with open(os.path.join(FIXTURES, 'article.html'), 'rb') as f:
+        html = f.read()
+    frontier.mark_fetched(URL)
+
+    result = bbc_crawler.extract_article_content(URL, 'No Title', html, pool)
+    assert result['filename']
+    # 图片还在下载，程序此时中断的话文章仍需重新处理
+    assert not frontier.is_extracted(URL)
+    assert URL in [article['url'] for article in frontier.pending()]
+
+    release.set()
+    pool.close()
+    assert frontier.is_extracted(URL)
+    assert result['images'] == 1
+    with open(os.path.join('articles', result['filename']), 'r', encoding='utf-8') as f:
+        assert 'launch.jpg' in f.read()
+
+
+def test_article_without_media_marked_immediately(pool_env):
+    bbc_crawler, frontier, pool = pool_env
+    pool.submit_article('Title', URL, ['Paragraph.'], [], [], {'filename': 'a.txt', 'title': 'Title'})
+    assert frontier.is_extracted(URL)
+
+
+def test_bytes_count_only_network_fetches(pool_env, server):
+    bbc_crawler, frontier, pool = pool_env
+    # b.png 与 a.png 内容相同；最后再次引用 a.png，已下载过不再请求
+    jobs = [{'url': f"{server}/{name}", 'caption': ''} for name in ('a.png', 'b.png', 'a.png')]
+    result = {'filename': 'a.txt', 'title': 'First'}
+    pool.submit_article('First', URL, ['Paragraph.'], jobs, [], result)
+    pool.close()
+
+    assert pool.stats['downloaded'] == 1
+    assert pool.stats['dedup_hits'] == 1
+    assert pool.stats['store_hits'] == 1
+    assert pool.stats['failed'] == 0
+    # 重复内容也是从网络读取的，已下载过的URL没有读取
+    assert pool.stats['bytes'] == 2 * len(PNG)
+    assert result['images'] == 3
+    assert len(os.listdir('images')) == 1
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+段落过滤的测试：一次遍历标记容器的 extract_paragraphs 与原来逐段序列化父节点的过滤
+（benchmark_parsing.legacy_extract_paragraphs）结果相同，包括标记出现在段落文字、注释和脚本中的情况
+"""
+
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+
+
+@pytest.fixture(scope='module')
+def crawler(bbc_crawler):
+    import benchmark_parsing
+    return bbc_crawler, benchmark_parsing
+
+
+def article_body(markup):
+    return BeautifulSoup(markup, 'lxml').find('article')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_article_page_matches_legacy_filter(crawler):
+    bbc_crawler, benchmark_parsing = crawler
+    body = article_body(read_fixture('article.html'))
+
+    paragraphs = bbc_crawler.extract_paragraphs(body)
+    assert paragraphs == benchmark_parsing.legacy_extract_paragraphs(body)
+    assert paragraphs == [
+        'By Science correspondent',
+        "Three astronauts have arrived at China's Tiangong space station after a six-hour flight.",
+        'The Shenzhou crew will spend six months on board, carrying out experiments and two spacewalks.',
+        "It is the country's fifth crewed mission this decade.",
+        'Officials said the launch went "perfectly".',
+        'More science news',
+    ]
+
+
+def test_live_page_matches_legacy_filter(crawler):
+    bbc_crawler, benchmark_parsing = crawler
+    body = article_body(benchmark_parsing.make_live_page(40))
+
+    paragraphs = bbc_crawler.extract_paragraphs(body)
+    assert paragraphs == benchmark_parsing.legacy_extract_paragraphs(body)
+    # 摘要图片说明和页脚中的段落被排除，摘要要点和所有帖子段落保留
+    assert 'Launch pad at Jiuquan' not in paragraphs
+    assert 'More on this story' not in paragraphs
+    stream = body.find('div', attrs={'data-testid': 'live-stream'})
+    assert len(paragraphs) == 4 + len(stream.find_all('p'))
+
+
+def test_caption_in_prose_matches_legacy_filter(crawler):
+    """段落文字提到 caption 时，与原来一样排除同一容器中的所有段落"""
+    bbc_crawler, benchmark_parsing = crawler
+    body = article_body(read_fixture('caption_prose.html'))
+
+    paragraphs = bbc_crawler.extract_paragraphs(body)
+    assert paragraphs == benchmark_parsing.legacy_extract_paragraphs(body)
+    assert paragraphs == ['Organisers said they received more than 5,000 entries.']
+
+
+@pytest.mark.parametrize('container', [
+    '<div><p>Kept.</p><!-- footer links --></div>',
+    '<div><p>Kept.</p><script>var caption = 1;</script></div>',
+    '<div><p>Kept.</p><span>&lt;footer&gt;</span></div>',
+    '<div><p>Kept.</p><b>foot</b>er</div>',
+    '<div><p>Kept.</p>foot<!-- -->er</div>',
+    '<div><p>Kept.</p><p>Picture CAPTION</p></div>',
+    '<div><p>Kept.</p><p>No markers here.</p></div>',
+])
+def test_text_markers_match_legacy_filter(crawler, container):
+    bbc_crawler, benchmark_parsing = crawler
+    body = article_body(f'<article><div><p>Outside.</p></div>{container}</article>')
+
+    assert bbc_crawler.extract_paragraphs(body) == benchmark_parsing.legacy_extract_paragraphs(body)
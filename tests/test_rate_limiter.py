@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""限速器的测试：带 Retry-After 的429响应不被urllib3重试，每个429都经过限速器"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from rate_limiter import RateLimitedAdapter, RateLimiter, make_retry
+
+
+class TooManyRequestsHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        self.send_response(429)
+        self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    TooManyRequestsHandler.hits = 0
+    httpd = HTTPServer(('127.0.0.1', 0), TooManyRequestsHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize('total', [3, 5])
+def test_limiter_sees_every_429(server, total):
+    limiter = RateLimiter(rate=100.0, burst=10, host_rates={}, failure_threshold=100)
+    session = requests.Session()
+    session.mount('http://', RateLimitedAdapter(limiter=limiter, max_attempts=4, max_retries=make_retry(total)))
+
+    response = session.get(server, timeout=5)
+
+    assert response.status_code == 429
+    assert TooManyRequestsHandler.hits == 4
+    assert limiter.stats['requests'] == 4
+    assert limiter.stats['backoffs'] == 4
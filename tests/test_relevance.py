@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+相关度预评分的测试：仓库中 download_report.json 的搜索结果都没有标题和摘要，只能按URL评分；
+跳过的结果与 articles/ 中已保存的正文对照，确认它们确实与主题无关
+"""
+
+import json
+import os
+
+import pytest
+
+from article_store import parse_article_file
+from relevance import RelevanceScorer
+from url_router import UrlRouter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def hits():
+    with open(os.path.join(ROOT, 'download_report.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['articles']
+
+
+@pytest.fixture(scope='module')
+def saved_articles():
+    """已保存文章的 {网址: 记录}"""
+    articles_dir = os.path.join(ROOT, 'articles')
+    records = (parse_article_file(os.path.join(articles_dir, name))
+               for name in os.listdir(articles_dir) if name.endswith('.txt'))
+    return {record['url']: record for record in records if record['url']}
+
+
+def test_url_only_scoring():
+    scorer = RelevanceScorer()
+    # 编号形式的URL和未知栏目无法判断
+    assert scorer.score({'url': 'https://www.bbc.co.uk/news/articles/c5yr5jw8jdwt', 'title': 'No Title'}) is None
+    assert scorer.score({'url': 'https://www.bbc.co.uk/news/world-asia-china-63798391', 'title': ''}) is None
+    assert scorer.score({'url': 'https://www.bbc.co.uk/news/science-environment-12345678'}) >= scorer.threshold
+    assert scorer.score({'url': 'https://www.bbc.co.uk/sport/cricket/66575286'}) < scorer.threshold
+    # 体育栏目中出现 rockets（球队名）也不够
+    assert scorer.score({'url': 'https://www.bbc.co.uk/sport/basketball/houston-rockets-12345678'}) < scorer.threshold
+    # 有标题时仍按标题评分
+    assert scorer.score({'url': 'https://www.bbc.co.uk/sport/cricket/66575286',
+                         'title': 'China launches Shenzhou crew to Tiangong'}) >= scorer.threshold
+
+
+def test_report_hits_skip_only_off_topic_articles(hits, saved_articles):
+    scorer = RelevanceScorer()
+    router = UrlRouter()
+    routed, skipped = [], []
+    for hit in hits:
+        url, _, accepted = router.route(hit['url'])
+        if not accepted:
+            continue
+        routed.append(hit)
+        if not scorer.accept(dict(hit, url=url)):
+            skipped.append(hit)
+
+    assert all(hit['title'] == 'No Title' and not hit.get('snippet') for hit in hits)
+    assert len(hits) == 176
+    assert len(routed) == 145
+    assert len(skipped) == 18
+    assert scorer.stats['url_scored'] == scorer.stats['scored']
+
+    # 按已保存文章的标题和开头几段重新评分，跳过的文章都低于阈值
+    for hit in skipped:
+        record = saved_articles.get(hit['url'])
+        if record is None or not record['title']:
+            continue
+        score = scorer.score({'url': 'https://www.bbc.co.uk/', 'title': record['title'],
+                              'snippet': ' '.join(record['paragraphs'][:3])})
+        assert score < scorer.threshold, (hit['url'], record['title'], score)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""布隆过滤器的测试：两个进程同时写入同一个文件，以及异常退出后重建"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from seen_filter import BloomFilter, fcntl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="需要 fcntl 文件锁")
+
+
+def run_process(code):
+    """在另一个进程中运行代码，返回其输出"""
+    result = subprocess.run([sys.executable, '-c', textwrap.dedent(code)], cwd=ROOT,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'urls.bloom')
+    bloom = BloomFilter(path, capacity=1000)
+    bloom.add('https://example.com/old')
+    bloom.close()
+    return path
+
+
+def test_second_writer_shares_the_open_file(path):
+    first = BloomFilter(path, capacity=1000)
+    assert not first.needs_rebuild
+    first.add('https://example.com/a')
+
+    # 第一个进程仍在写入时，第二个进程打开、添加并关闭
+    output = run_process(f'''
+        from seen_filter import BloomFilter
+        bloom = BloomFilter({path!r}, capacity=1000)
+        print(bloom.needs_rebuild, 'https://example.com/a' in bloom)
+        bloom.add('https://example.com/b')
+        bloom.close()
+    ''')
+    assert output == 'False True'
+
+    # 第二个进程打开之后第一个进程添加的URL不能丢失
+    first.add('https://example.com/c')
+    assert 'https://example.com/b' in first
+    first.close()
+
+    bloom = BloomFilter(path, capacity=1000)
+    assert not bloom.needs_rebuild
+    for key in ('old', 'a', 'b', 'c'):
+        assert f'https://example.com/{key}' in bloom
+    bloom.close()
+
+
+def test_file_stays_unclean_until_last_writer_closes(path):
+    first = BloomFilter(path, capacity=1000)
+    second = BloomFilter(path, capacity=1000)
+    assert not second.needs_rebuild
+    second.close()
+
+    # 第一个写入者仍然打开时，另一个进程把文件看作正在使用，而不是异常退出
+    assert run_process(f'''
+        from seen_filter import BloomFilter
+        bloom = BloomFilter({path!r}, capacity=1000)
+        print(bloom.needs_rebuild)
+        bloom.close()
+    ''') == 'False'
+    first.close()
+
+
+def test_crashed_writer_triggers_rebuild(path):
+    run_process(f'''
+        import os
+        from seen_filter import BloomFilter
+        bloom = BloomFilter({path!r}, capacity=1000)
+        bloom.add('https://example.com/lost')
+        os._exit(0)
+    ''')
+    bloom = BloomFilter(path, capacity=1000)
+    assert bloom.needs_rebuild
+    bloom.close()
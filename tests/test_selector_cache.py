@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""选择器学习缓存的测试：命中次数只调整同一组内的顺序，通用选择器不会排到特定选择器前面"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from selector_cache import SelectorCache
+
+URL = 'https://www.bbc.co.uk/news/articles/c0000000001o'
+
+# 没有 <h1> 和 <article> 的页面（如专题索引页），只能由通用选择器命中
+INDEX_PAGE = '''<html><body><div class="ssrcss-1ocoo3l-Wrap">
+<h2>Related topics</h2><div class="text-block"><p>Index entry</p></div>
+</div></body></html>'''
+
+ARTICLE_PAGE = '''<html><body><div class="ssrcss-1ocoo3l-Wrap">
+<article><h1>China launches new crew to Tiangong</h1>
+<div data-component="text-block"><p>First paragraph.</p></div>
+<div data-component="text-block"><p>Second paragraph.</p></div>
+</article>
+<section><h2>Related topics</h2></section>
+</div></body></html>'''
+
+
+@pytest.fixture
+def cache(bbc_crawler, tmp_path, monkeypatch):
+    cache = SelectorCache(str(tmp_path / 'selector_stats.json'))
+    monkeypatch.setattr(bbc_crawler, 'selector_cache', cache)
+    return cache
+
+
+def test_ordered_keeps_tier_order():
+    cache = SelectorCache('/nonexistent/selector_stats.json')
+    tiers = [['h1.a', 'h1.b', 'h1.c'], ['h1'], ['h2']]
+    for _ in range(5):
+        cache.record('title', URL, 'h2')
+    cache.record('title', URL, 'h1.c')
+    cache.record('title', URL, 'h1.c')
+    cache.record('title', URL, 'h1.b')
+
+    assert cache.ordered('title', URL, tiers) == ['h1.c', 'h1.b', 'h1.a', 'h1', 'h2']
+
+
+def test_generic_fallbacks_do_not_overtake_article(bbc_crawler, cache):
+    for _ in range(3):
+        soup = BeautifulSoup(INDEX_PAGE, 'lxml')
+        assert bbc_crawler.get_article_title(soup, URL) == 'Related topics'
+        assert bbc_crawler.find_article_body(soup, URL).name == 'div'
+    assert cache.stats['news']['title']['hits'] == {'h2': 3}
+    assert cache.stats['news']['body']['hits'] == {'div.ssrcss-1ocoo3l-Wrap': 3}
+
+    soup = BeautifulSoup(ARTICLE_PAGE, 'lxml')
+    assert bbc_crawler.get_article_title(soup, URL) == 'China launches new crew to Tiangong'
+    body = bbc_crawler.find_article_body(soup, URL)
+    assert body.name == 'article'
+    assert bbc_crawler.extract_paragraphs(body) == ['First paragraph.', 'Second paragraph.']
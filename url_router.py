@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+URL规范化和分类
+
+抓取前把搜索结果中的URL规范化（统一协议和主机、去掉跟踪参数和片段、合并AMP等别名），
+同一篇文章的不同写法只抓取一次；再按路径判断URL类型（文章、直播、音频、视频、栏目首页等），
+不可能提取出文章的类型直接跳过，不发送请求。跳过的数量按类型统计。
+"""
+
+import hashlib
+import re
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import CANONICAL_HOST, SKIPPED_URL_TYPES
+
+# 视为同一网站的主机，统一为 CANONICAL_HOST
+HOST_ALIASES = {'bbc.co.uk', 'www.bbc.co.uk', 'bbc.com', 'www.bbc.com', 'm.bbc.co.uk', 'm.bbc.com'}
+
+# 其他BBC主机（如旧新闻存档 news.bbc.co.uk）保留原主机，只统一为https
+BBC_HOST_PATTERN = re.compile(r'(^|\.)bbc\.(co\.uk|com)$')
+
+# 跟踪参数，不影响页面内容
+TRACKING_PARAMS = re.compile(r'^(utm_.*|at_.*|xtor|ocid|fbclid|gclid|cmp|ns_.*)$')
+
+# URL类型，按顺序匹配路径
+URL_TYPES = [
+    ('live', re.compile(r'^/(news|sport)/(.+/)?live(/|$)')),
+    ('video', re.compile(r'^/((news|sport)/(.+/)?(av|videos)|iplayer)(/|$)')),
+    ('audio', re.compile(r'^/(sounds|programmes|radio)(/|$)')),
+    # 文章路径以编号结尾，如 /news/articles/c2l1..., /news/world-asia-12345678, /sport/cricket/12345678
+    ('article', re.compile(r'^/((news|sport|newsround)/(.+/)?articles/[a-z0-9]+'
+                           r'|(news|sport|newsround)/(.+/)?[^/]*\d{5,}'
+                           r'|.*\.stm)$')),
+    # 没有编号的新闻、体育路径是栏目首页，只有文章列表
+    ('index', re.compile(r'^/(news|sport|newsround)(/[^/]*)*$')),
+]
+
+
+def canonicalize_url(url):
+    """规范化URL：https、统一主机、去掉默认端口、片段、跟踪参数和AMP后缀，查询参数排序"""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host in HOST_ALIASES:
+        host = CANONICAL_HOST
+    elif parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    scheme = 'https' if BBC_HOST_PATTERN.search(parts.hostname or '') else (parts.scheme or 'https').lower()
+
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    # AMP页面与普通页面内容相同
+    path = re.sub(r'^/news/amp/', '/news/', path)
+    path = re.sub(r'\.amp$', '', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(key)
+    ))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def url_id(url):
+    """由规范化URL生成的稳定编号"""
+    return hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest()[:16]
+
+
+def url_type(url):
+    """判断规范化URL的类型"""
+    parts = urlsplit(url)
+    if not BBC_HOST_PATTERN.search(parts.hostname or ''):
+        return 'external'
+    for name, pattern in URL_TYPES:
+        if pattern.match(parts.path):
+            return name
+    return 'other'
+
+
+class UrlRouter:
+    def __init__(self, skipped_types=SKIPPED_URL_TYPES):
+        self.skipped_types = set(skipped_types)
+        self.lock = threading.Lock()
+        self.stats = {'accepted': 0, 'aliases': 0, 'skipped': {}}
+
+    def route(self, url):
+        """返回 (规范化URL, 类型, 是否抓取)"""
+        canonical = canonicalize_url(url)
+        kind = url_type(canonical)
+        accepted = kind not in self.skipped_types
+        with self.lock:
+            if canonical != url:
+                self.stats['aliases'] += 1
+            if accepted:
+                self.stats['accepted'] += 1
+            else:
+                self.stats['skipped'][kind] = self.stats['skipped'].get(kind, 0) + 1
+        return canonical, kind, accepted
+
+    def print_summary(self):
+        skipped = "，".join(f"{kind} {count}" for kind, count in
+                           sorted(self.stats['skipped'].items(), key=lambda item: -item[1]))
+        print(f"URL路由: 接受 {self.stats['accepted']} 个，规范化改写 {self.stats['aliases']} 个，"
+              f"跳过 {sum(self.stats['skipped'].values())} 个" + (f"（{skipped}）" if skipped else ""))
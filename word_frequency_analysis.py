@@ -1,39 +1,9 @@
-import os
 import re
 import pandas as pd
 from collections import Counter
 import string
 
-def extract_content(file_path):
-    """从文章文件中提取正文内容"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 使用正则表达式提取正文部分
-    # 正文在"正文内容:"和"图片列表:"之间
-    # 如果没有图片列表，正文到文件末尾
-    content_pattern = re.compile(r'正文内容:\n(.*?)(?:\n\n图片列表:|$)', re.DOTALL)
-    match = content_pattern.search(content)
-    
-    if match:
-        return match.group(1).strip()
-    
-    # 如果没有明确的"正文内容:"标记，尝试其他方法提取
-    # 通常正文开始于第三行，结束于特定标记前
-    lines = content.split('\n')
-    if len(lines) > 2:
-        content_start = "\n".join(lines[2:])
-        
-        # 找到结束标记
-        end_markers = ["What are these?", "Most Popular Now", "These are links to other BBC pages"]
-        for marker in end_markers:
-            pos = content_start.find(marker)
-            if pos > 0:
-                return content_start[:pos].strip()
-        
-        return content_start.strip()
-    
-    return ""
+from corpus_loader import iter_articles
 
 def tokenize_english_text(text):
     """英文文本分词处理"""
@@ -70,22 +40,9 @@ def normalize_words(words):
 
 def analyze_word_frequency():
     """分析所有文章的词频并保存结果"""
-    articles_dir = 'articles'
     all_words = []
     
-    # 确保articles文件夹存在
-    if not os.path.exists(articles_dir):
-        print(f"错误: {articles_dir}文件夹不存在")
-        return
-    
-    # 读取所有文章文件
-    article_files = [f for f in os.listdir(articles_dir) if f.endswith('.txt')]
-    
-    if not article_files:
-        print(f"错误: {articles_dir}文件夹中没有txt文件")
-        return
-    
-    print(f"开始分析{len(article_files)}篇文章...")
+    print("开始分析文章...")
     
     # 定义停用词列表（常见的英文停用词）
     stop_words = {'a', 'an', 'the', 'and', 'or', 'but', 'is', 'are', 'was', 'were', 
@@ -112,10 +69,10 @@ def analyze_word_frequency():
     
     # 提取并分析每篇文章的正文
     processed_files = 0
-    for filename in article_files:
-        file_path = os.path.join(articles_dir, filename)
+    for article in iter_articles():
+        filename = article.filename
         try:
-            content = extract_content(file_path)
+            content = article.text
             
             if not content:
                 print(f"警告: 无法从{filename}中提取正文内容")
@@ -134,7 +91,7 @@ def analyze_word_frequency():
             processed_files += 1
             
             if processed_files % 10 == 0:
-                print(f"已处理 {processed_files}/{len(article_files)} 篇文章")
+                print(f"已处理 {processed_files} 篇文章")
                 
         except Exception as e:
             print(f"处理文件 {filename} 时出错: {e}")